@@ -0,0 +1 @@
+"""Microbenchmarks for the MCP Ask Questions server hot paths."""
@@ -0,0 +1,65 @@
+"""Realistic payloads for the hot-path benchmarks."""
+
+import json
+from typing import Dict
+
+import pytest
+
+# From a short question up to a very large plan
+PAYLOAD_SIZES: Dict[str, int] = {
+    "1kb": 1024,
+    "16kb": 16 * 1024,
+    "256kb": 256 * 1024,
+    "1mb": 1024 * 1024,
+}
+
+PLAN_SECTION = """## {n}. Migrate service {n} to the shared queue
+
+- Owner: platform team; rollout behind the `queue_v2_{n}` flag
+- Risk: duplicate delivery during cutover, mitigated by idempotency keys
+- Metric: p99 enqueue latency under 50ms, error budget 0.1%
+
+```sql
+CREATE INDEX CONCURRENTLY jobs_{n}_claim ON jobs_{n} (state, run_at);
+```
+
+"""
+
+
+def make_plan(size: int) -> str:
+    """Markdown plan of roughly ``size`` bytes with many headed sections."""
+    parts = ["# Plan: queue consolidation\n\nBackground and goals.\n\n"]
+    total, n = len(parts[0]), 0
+    while total < size:
+        n += 1
+        section = PLAN_SECTION.format(n=n)
+        parts.append(section)
+        total += len(section)
+    return "".join(parts)[:size]
+
+
+def make_review_response(plan_size: int) -> str:
+    """Model output: prose around a JSON review whose feedback scales with size."""
+    review = {
+        "overall_score": 0.82,
+        "strengths": ["Clear ownership", "Flagged rollout"],
+        "weaknesses": ["No load test before cutover"],
+        "suggestions": ["Add a shadow-traffic phase"],
+        "detailed_feedback": make_plan(plan_size),
+    }
+    return f"Here is the review:\n\n```json\n{json.dumps(review)}\n```\nThanks!"
+
+
+@pytest.fixture(params=list(PAYLOAD_SIZES), ids=list(PAYLOAD_SIZES))
+def payload_size(request: pytest.FixtureRequest) -> int:
+    return PAYLOAD_SIZES[request.param]
+
+
+@pytest.fixture
+def plan(payload_size: int) -> str:
+    return make_plan(payload_size)
+
+
+@pytest.fixture
+def review_response(payload_size: int) -> str:
+    return make_review_response(payload_size)
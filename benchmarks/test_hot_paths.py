@@ -0,0 +1,104 @@
+"""Benchmarks for helpers that run on every tool call.
+
+Run with ``pytest benchmarks/``; see TESTING.md for saving and comparing
+baselines.
+"""
+
+from typing import Any, Dict, List
+
+import pytest
+
+import server
+from server import (
+    ReviewLevel,
+    build_review_messages,
+    get_config_from_headers,
+    hash_plan_sections,
+    log_mcp_call,
+    log_openai_request,
+    parse_review_json,
+    split_plan_sections,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+HEADERS = {
+    "x-openai-api-key": "sk-proj-" + "x" * 156,
+    "x-openai-model": "gpt-4o",
+    "x-openai-max-tokens": "2000",
+    "x-request-deadline": "45",
+    "x-stream": "false",
+    "cache-control": "no-cache",
+    "accept": "application/json, text/event-stream",
+    "content-type": "application/json",
+    "user-agent": "cursor/1.7 mcp-client",
+    "mcp-session-id": "9f8a5c2e0d0b4c6f8e1a2b3c4d5e6f70",
+}
+
+CONTEXT = "Team of six, two quarters, no dedicated SRE. " * 24  # ~1 KB
+
+
+def test_get_config_from_headers(
+    benchmark: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(server, "get_http_headers", lambda: HEADERS)
+    config = benchmark(get_config_from_headers)
+    assert config["model"] == "gpt-4o"
+
+
+def test_log_mcp_call(benchmark: Any, plan: str) -> None:
+    benchmark(
+        log_mcp_call,
+        "review_plan",
+        plan_content=plan,
+        context=CONTEXT,
+        review_level="standard",
+        focus_areas=["risk", "rollout"],
+        model="gpt-4o",
+    )
+
+
+def test_log_openai_request_text(benchmark: Any, plan: str) -> None:
+    messages = build_review_messages(ReviewLevel.STANDARD, plan)
+    benchmark(log_openai_request, "gpt-4o", messages, 2000, HEADERS["x-openai-api-key"])
+
+
+def test_log_openai_request_content_parts(benchmark: Any, plan: str) -> None:
+    """Non-string content is serialized just to measure its length."""
+    messages: List[Dict[str, Any]] = [
+        {
+            "role": "system",
+            "content": server.REVIEW_SYSTEM_PROMPTS[ReviewLevel.STANDARD],
+        },
+        {"role": "user", "content": [{"type": "text", "text": plan}]},
+    ]
+    benchmark(log_openai_request, "gpt-4o", messages, 2000, HEADERS["x-openai-api-key"])
+
+
+def test_review_prompt_assembly(benchmark: Any, plan: str) -> None:
+    """Section split and hashing plus message assembly, as review_plan does."""
+
+    def assemble() -> List[Dict[str, str]]:
+        hash_plan_sections(split_plan_sections(plan))
+        return build_review_messages(
+            ReviewLevel.COMPREHENSIVE,
+            f"Plan Content:\n{plan}",
+            ["risk", "rollout"],
+            CONTEXT,
+        )
+
+    messages = benchmark(assemble)
+    assert messages[1]["content"].endswith(plan)
+
+
+def test_parse_review_json(benchmark: Any, review_response: str) -> None:
+    review = benchmark(parse_review_json, review_response)
+    assert review is not None and review["overall_score"] == 0.82
+
+
+def test_parse_review_json_trailing_braces(
+    benchmark: Any, review_response: str
+) -> None:
+    """Worst case: braces after the object make the whole slice fail to decode."""
+    text = f"{review_response} See {{appendix}}."
+    assert benchmark(parse_review_json, text) is None
@@ -34,11 +34,51 @@ export default function Metrics() {
     }
   }
 
+  function applyDelta(delta) {
+    setData(prev => {
+      const tallies = { ...prev.tallies }
+      Object.entries(delta.tallies || {}).forEach(([tool, statuses]) => {
+        const merged = { ...(tallies[tool] || {}) }
+        Object.entries(statuses).forEach(([status, count]) => {
+          merged[status] = Number(merged[status] || 0) + Number(count)
+        })
+        tallies[tool] = merged
+      })
+      return { ...prev, tallies, generated_at: delta.generated_at }
+    })
+  }
+
   useEffect(() => {
     const ac = new AbortController()
-    fetchSummary(ac.signal)
-    const id = setInterval(() => fetchSummary(ac.signal), 10000)
-    return () => { ac.abort(); clearInterval(id) }
+    let pollId = null
+    const startPolling = () => {
+      if (pollId) return
+      fetchSummary(ac.signal)
+      pollId = setInterval(() => fetchSummary(ac.signal), 10000)
+    }
+
+    // Prefer server push; fall back to polling where SSE is unavailable
+    let source = null
+    if (typeof EventSource !== 'undefined') {
+      source = new EventSource('/api/metrics/stream')
+      source.addEventListener('snapshot', e => {
+        setData(JSON.parse(e.data))
+        setError('')
+        setLoading(false)
+      })
+      source.addEventListener('delta', e => applyDelta(JSON.parse(e.data)))
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) startPolling()
+      }
+    } else {
+      startPolling()
+    }
+
+    return () => {
+      ac.abort()
+      if (pollId) clearInterval(pollId)
+      if (source) source.close()
+    }
   }, [])
 
   const { rows, total } = formatTallies(data.tallies)
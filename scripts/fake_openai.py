@@ -0,0 +1,322 @@
+"""Local stand-in for the OpenAI chat completions API, for load testing.
+
+Point the server at it with ``OPENAI_BASE_URL=http://127.0.0.1:9000/v1`` and
+any API key. Latency, streaming pace, injected errors and malformed reviews,
+and the advertised ``x-ratelimit-*`` budget are configurable, so throughput
+can be measured without spending tokens.
+
+Usage:
+    python -m scripts.fake_openai --latency lognormal:0.8,0.4 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+WORDS = (
+    "risk scope rollout owner metric budget latency test rollback dependency "
+    "milestone review cache queue schema migration alert capacity"
+).split()
+
+# Shape of the review JSON that prompt-format (non json_schema) reviews ask for
+REVIEW_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "overall_score": {"type": "number"},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "weaknesses": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+        "detailed_feedback": {"type": "string"},
+    },
+}
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Sampler for a latency spec, in seconds.
+
+    ``fixed:0.5``, ``uniform:0.2,1.5``, ``normal:0.8,0.2`` (mean, stddev) or
+    ``lognormal:0.8,0.5`` (median, sigma). Samples are never negative.
+    """
+    kind, _, raw = spec.partition(":")
+    try:
+        params = [float(part) for part in raw.split(",") if part]
+    except ValueError as exc:
+        raise ValueError(f"Invalid latency spec: {spec!r}") from exc
+    samplers: Dict[str, tuple[int, Callable[..., float]]] = {
+        "fixed": (1, lambda value: value),
+        "uniform": (2, random.uniform),
+        "normal": (2, random.gauss),
+        "lognormal": (
+            2,
+            lambda median, sigma: random.lognormvariate(math.log(median), sigma),
+        ),
+    }
+    if kind not in samplers or len(params) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    sampler = samplers[kind][1]
+    return lambda: max(0.0, sampler(*params))
+
+
+@dataclass
+class FakeOpenAIConfig:
+    """Behaviour of the fake server."""
+
+    latency: Callable[[], float] = field(default=lambda: 0.0)
+    token_interval: float = 0.0
+    completion_tokens: int = 64
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [500, 502, 503])
+    throttle_rate: float = 0.0
+    malformed_rate: float = 0.0
+    rpm: int = 10_000
+    tpm: int = 2_000_000
+
+
+class RateWindow:
+    """Requests and tokens spent in the trailing minute."""
+
+    def __init__(self) -> None:
+        self._events: Deque[tuple[float, int]] = deque()
+
+    def spent(self, now: float) -> tuple[int, int]:
+        while self._events and self._events[0][0] <= now - 60:
+            self._events.popleft()
+        return len(self._events), sum(tokens for _at, tokens in self._events)
+
+    def add(self, now: float, tokens: int) -> None:
+        self._events.append((now, tokens))
+
+    def reset_in(self, now: float) -> float:
+        return max(0.0, self._events[0][0] + 60 - now) if self._events else 0.0
+
+
+def schema_instance(schema: Dict[str, Any], words: List[str]) -> Any:
+    """A value matching a ``json_schema`` response format, filled with words."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: schema_instance(field_schema, words)
+            for name, field_schema in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        items = schema.get("items", {})
+        return [schema_instance(items, words[n::3]) for n in range(3)]
+    if kind in ("number", "integer"):
+        return 1 if kind == "integer" else 0.75
+    if kind == "boolean":
+        return True
+    return " ".join(words)
+
+
+def asks_for_review_json(messages: List[Dict[str, Any]]) -> bool:
+    return any('"overall_score"' in str(m.get("content", "")) for m in messages)
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+
+
+def format_reset(seconds: float) -> str:
+    return f"{int(seconds * 1000)}ms" if seconds < 1 else f"{seconds:.3f}s"
+
+
+def create_app(config: Optional[FakeOpenAIConfig] = None) -> Starlette:
+    """ASGI app serving ``POST /v1/chat/completions``."""
+    config = config or FakeOpenAIConfig()
+    window = RateWindow()
+
+    def ratelimit_headers(now: float) -> Dict[str, str]:
+        requests, tokens = window.spent(now)
+        reset = format_reset(window.reset_in(now))
+        return {
+            "x-ratelimit-limit-requests": str(config.rpm),
+            "x-ratelimit-remaining-requests": str(max(config.rpm - requests, 0)),
+            "x-ratelimit-reset-requests": reset,
+            "x-ratelimit-limit-tokens": str(config.tpm),
+            "x-ratelimit-remaining-tokens": str(max(config.tpm - tokens, 0)),
+            "x-ratelimit-reset-tokens": reset,
+        }
+
+    def error(status: int, message: str, headers: Dict[str, str]) -> Response:
+        kind = "rate_limit_exceeded" if status == 429 else "server_error"
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": kind, "code": kind}},
+            headers=headers,
+        )
+
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        model = body.get("model", "gpt-4")
+        prompt_tokens = estimate_tokens(body.get("messages", []))
+        completion_tokens = min(
+            int(body.get("max_tokens") or config.completion_tokens),
+            config.completion_tokens,
+        )
+        now = time.monotonic()
+        requests, tokens = window.spent(now)
+        if requests >= config.rpm or tokens + prompt_tokens > config.tpm:
+            headers = ratelimit_headers(now)
+            headers["retry-after"] = f"{max(window.reset_in(now), 0.1):.1f}"
+            return error(429, "Rate limit reached", headers)
+        window.add(now, prompt_tokens + completion_tokens)
+        headers = ratelimit_headers(now)
+
+        await asyncio.sleep(config.latency())
+        if random.random() < config.throttle_rate:
+            return error(429, "Rate limit reached", {**headers, "retry-after": "1"})
+        if random.random() < config.error_rate:
+            status = random.choice(config.error_statuses)
+            return error(status, "Injected upstream failure", headers)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        words = [random.choice(WORDS) for _ in range(completion_tokens)]
+        response_format = body.get("response_format") or {}
+        schema: Optional[Dict[str, Any]] = None
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"].get("schema", {})
+        elif asks_for_review_json(body.get("messages", [])):
+            schema = REVIEW_SCHEMA
+        if schema is not None and random.random() >= config.malformed_rate:
+            content = json.dumps(schema_instance(schema, words))
+        else:
+            content = " ".join(words)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+        if not body.get("stream"):
+            return JSONResponse(
+                content={
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": content,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                },
+                headers=headers,
+            )
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            yield chunk({"role": "assistant", "content": ""})
+            for index, word in enumerate(content.split(" ")):
+                if config.token_interval:
+                    await asyncio.sleep(config.token_interval)
+                yield chunk({"content": word if index == 0 else f" {word}"})
+            yield chunk({}, "stop")
+            if include_usage:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(
+            events(), media_type="text/event-stream", headers=headers
+        )
+
+    return Starlette(
+        routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--latency",
+        default="fixed:0.2",
+        help="fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA",
+    )
+    parser.add_argument(
+        "--token-interval",
+        type=float,
+        default=0.01,
+        help="seconds between streamed chunks",
+    )
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 5xx responses"
+    )
+    parser.add_argument(
+        "--error-statuses",
+        default="500,502,503",
+        help="comma-separated statuses to inject",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="fraction of spurious 429 responses",
+    )
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="fraction of review requests answered with prose instead of JSON",
+    )
+    parser.add_argument("--rpm", type=int, default=10_000, help="requests per minute")
+    parser.add_argument("--tpm", type=int, default=2_000_000, help="tokens per minute")
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(
+        latency=parse_latency(args.latency),
+        token_interval=args.token_interval,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",") if s],
+        throttle_rate=args.throttle_rate,
+        malformed_rate=args.malformed_rate,
+        rpm=args.rpm,
+        tpm=args.tpm,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
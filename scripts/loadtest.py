@@ -0,0 +1,267 @@
+"""Asyncio load generator for the MCP endpoint and the demo routes.
+
+Runs ``--concurrency`` workers against one or more targets for ``--duration``
+seconds (or ``--requests`` calls) and prints a JSON report with throughput,
+error counts and p50/p95/p99 latency, overall and per target, so runs can be
+diffed. Pair it with ``scripts/fake_openai.py`` to measure the server rather
+than OpenAI.
+
+Targets:
+    mcp:phone_a_friend    phone_a_friend over streamable HTTP
+    mcp:review_plan       review_plan over streamable HTTP
+    demo:phone-a-friend   POST /api/demo/phone-a-friend
+    demo:review-plan      POST /api/demo/review-plan
+
+Usage:
+    python -m scripts.loadtest --target mcp:phone_a_friend --concurrency 32
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import time
+import uuid
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastmcp import Client
+from fastmcp.client.transports import StreamableHttpTransport
+
+TARGETS = (
+    "mcp:phone_a_friend",
+    "mcp:review_plan",
+    "demo:phone-a-friend",
+    "demo:review-plan",
+)
+
+PLAN = """# Plan: {nonce}
+
+## Goal
+Move nightly report generation onto a queue-backed worker pool.
+
+## Steps
+1. Add a jobs table and enqueue reports from the scheduler.
+2. Run N workers that claim jobs with SELECT ... FOR UPDATE SKIP LOCKED.
+3. Alert when queue depth exceeds one hour of work.
+"""
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class TargetStats:
+    """Outcomes recorded for one target."""
+
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency: float, error: Optional[str]) -> None:
+        if error is None:
+            self.latencies.append(latency)
+        else:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        ok = sorted(self.latencies)
+        errors = sum(self.errors.values())
+        return {
+            "requests": len(ok) + errors,
+            "errors": errors,
+            "error_types": dict(sorted(self.errors.items())),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(ok, 50) * 1000, 1),
+                "p95": round(percentile(ok, 95) * 1000, 1),
+                "p99": round(percentile(ok, 99) * 1000, 1),
+                "mean": round(sum(ok) / len(ok) * 1000, 1) if ok else 0.0,
+                "max": round(ok[-1] * 1000, 1) if ok else 0.0,
+            },
+        }
+
+
+class LoadTest:
+    """Drive a running server at a fixed concurrency."""
+
+    def __init__(
+        self,
+        url: str,
+        targets: List[str],
+        concurrency: int,
+        duration: Optional[float],
+        requests: Optional[int],
+        warmup: float,
+        api_key: str,
+        review_level: str,
+        timeout: float,
+    ) -> None:
+        self.url = url.rstrip("/")
+        self.targets = targets
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.warmup = warmup
+        self.api_key = api_key
+        self.review_level = review_level
+        self.timeout = timeout
+        self.stats = {target: TargetStats() for target in targets}
+        self._issued = 0
+        self._recording = False
+
+    def _claim(self, deadline: float) -> bool:
+        if time.monotonic() >= deadline:
+            return False
+        if self._recording and self.requests is not None:
+            if self._issued >= self.requests:
+                return False
+            self._issued += 1
+        return True
+
+    def _mcp_client(self) -> Client:
+        transport = StreamableHttpTransport(
+            f"{self.url}/mcp", headers={"X-OpenAI-API-Key": self.api_key}
+        )
+        return Client(transport, timeout=self.timeout)
+
+    async def _call_mcp(self, client: Client, tool: str, nonce: str) -> None:
+        if tool == "phone_a_friend":
+            arguments = {"question": f"What should we check before a deploy? ({nonce})"}
+        else:
+            arguments = {
+                "plan_content": PLAN.format(nonce=nonce),
+                "review_level": self.review_level,
+            }
+        await client.call_tool(tool, arguments, timeout=self.timeout)
+
+    async def _call_demo(self, http: httpx.AsyncClient, route: str, nonce: str) -> None:
+        payload: Dict[str, Any] = {"api_key": self.api_key}
+        if route == "phone-a-friend":
+            payload["question"] = f"What should we check before a deploy? ({nonce})"
+        else:
+            payload["plan_content"] = PLAN.format(nonce=nonce)
+            payload["review_level"] = self.review_level
+        response = await http.post(f"{self.url}/api/demo/{route}", json=payload)
+        response.raise_for_status()
+
+    async def _worker(
+        self, index: int, http: httpx.AsyncClient, deadline: float
+    ) -> None:
+        async with AsyncExitStack() as stack:
+            mcp_client: Optional[Client] = None
+            if any(target.startswith("mcp:") for target in self.targets):
+                # One session per worker, opened outside the timed calls
+                mcp_client = await stack.enter_async_context(self._mcp_client())
+            targets = itertools.islice(
+                itertools.cycle(self.targets), index % len(self.targets), None
+            )
+            for target in targets:
+                if not self._claim(deadline):
+                    return
+                kind, _, name = target.partition(":")
+                nonce = uuid.uuid4().hex[:12]
+                started = time.monotonic()
+                error: Optional[str] = None
+                try:
+                    if mcp_client is not None and kind == "mcp":
+                        await self._call_mcp(mcp_client, name, nonce)
+                    else:
+                        await self._call_demo(http, name, nonce)
+                except httpx.HTTPStatusError as exc:
+                    error = f"http_{exc.response.status_code}"
+                except Exception as exc:
+                    error = type(exc).__name__
+                if self._recording:
+                    self.stats[target].record(time.monotonic() - started, error)
+
+    async def _run_phase(self, http: httpx.AsyncClient, seconds: float) -> float:
+        started = time.monotonic()
+        deadline = started + seconds
+        await asyncio.gather(
+            *(self._worker(i, http, deadline) for i in range(self.concurrency))
+        )
+        return time.monotonic() - started
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as http:
+            if self.warmup:
+                await self._run_phase(http, self.warmup)
+            self._recording = True
+            started_at = datetime.now(timezone.utc).isoformat()
+            elapsed = await self._run_phase(http, self.duration or math.inf)
+
+        overall = TargetStats()
+        for stats in self.stats.values():
+            overall.latencies.extend(stats.latencies)
+            for error, count in stats.errors.items():
+                overall.errors[error] = overall.errors.get(error, 0) + count
+        return {
+            "started_at": started_at,
+            "url": self.url,
+            "concurrency": self.concurrency,
+            "review_level": self.review_level,
+            "duration_s": round(elapsed, 3),
+            **overall.report(elapsed),
+            "targets": {
+                target: stats.report(elapsed) for target, stats in self.stats.items()
+            },
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--target",
+        action="append",
+        choices=TARGETS,
+        help="repeat to mix targets (default: mcp:phone_a_friend)",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument(
+        "--requests", type=int, help="stop after this many calls instead"
+    )
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds")
+    parser.add_argument("--api-key", default="sk-loadtest")
+    parser.add_argument("--review-level", default="quick")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    loadtest = LoadTest(
+        url=args.url,
+        targets=args.target or ["mcp:phone_a_friend"],
+        concurrency=args.concurrency,
+        duration=None if args.requests else args.duration,
+        requests=args.requests,
+        warmup=args.warmup,
+        api_key=args.api_key,
+        review_level=args.review_level,
+        timeout=args.timeout,
+    )
+    report = json.dumps(asyncio.run(loadtest.run()), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
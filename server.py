@@ -3,25 +3,53 @@
 Contextual Q&A MCP Server with OpenAI integration and plan review capabilities.
 """
 
+import abc
 import asyncio
+import atexit
+import base64
+import hashlib
+import hmac
 import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import random
+import re
+import sqlite3
+import textwrap
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime
 from enum import Enum
 from pathlib import Path
-from typing import Annotated, Any, Dict, List, Optional, cast
+from queue import Full, Queue
+from typing import (
+    Annotated,
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NoReturn,
+    Optional,
+    Set,
+    cast,
+)
 
+import httpx
 import openai
 import structlog
 from fastapi import HTTPException, Request
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastmcp import FastMCP
-from fastmcp.server.dependencies import get_http_headers
-from openai.types.chat import ChatCompletionMessageParam
-from pydantic import BaseModel, Field
-from starlette.responses import Response
+from fastmcp import Context, FastMCP
+from fastmcp.server.dependencies import get_context, get_http_headers
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
+from pydantic import BaseModel, Field, ValidationError
+from starlette.middleware import Middleware
+from starlette.responses import Response, StreamingResponse
 from starlette.status import HTTP_404_NOT_FOUND
 
 try:
@@ -30,6 +58,8 @@ try:
     _pc = importlib.import_module("prometheus_client")
     CONTENT_TYPE_LATEST = _pc.CONTENT_TYPE_LATEST
     Counter = _pc.Counter  # type: ignore[attr-defined]
+    Gauge = _pc.Gauge  # type: ignore[attr-defined]
+    Histogram = _pc.Histogram  # type: ignore[attr-defined]
     generate_latest = _pc.generate_latest  # type: ignore[attr-defined]
     PROMETHEUS_AVAILABLE = True
 except (
@@ -39,29 +69,102 @@ except (
 ):  # pragma: no cover - optional dependency fallback
     PROMETHEUS_AVAILABLE = False
 
-    class _DummyCounter:
-        def labels(self, *args: Any, **kwargs: Any) -> "_DummyCounter":
+    class _DummyMetric:
+        def labels(self, *args: Any, **kwargs: Any) -> "_DummyMetric":
             _ = (args, kwargs)
             return self
 
-        def inc(self, n: int = 1) -> None:
+    class _DummyCounter(_DummyMetric):
+        def inc(self, n: float = 1) -> None:
+            _ = n
+            return None
+
+    class _DummyGauge(_DummyCounter):
+        def dec(self, n: float = 1) -> None:
             _ = n
             return None
 
-    def Counter(_name: str, _desc: str, _labelnames: List[str]) -> _DummyCounter:  # type: ignore[misc]
+        def set(self, value: float) -> None:
+            _ = value
+            return None
+
+    class _DummyHistogram(_DummyMetric):
+        def observe(self, value: float) -> None:
+            _ = value
+            return None
+
+    def Counter(  # type: ignore[misc]
+        _name: str, _desc: str, _labelnames: Optional[List[str]] = None
+    ) -> _DummyCounter:
         return _DummyCounter()
 
+    def Gauge(  # type: ignore[misc]
+        _name: str, _desc: str, _labelnames: Optional[List[str]] = None
+    ) -> _DummyGauge:
+        return _DummyGauge()
+
+    def Histogram(  # type: ignore[misc]
+        _name: str,
+        _desc: str,
+        _labelnames: Optional[List[str]] = None,
+        buckets: Optional[tuple[float, ...]] = None,
+    ) -> _DummyHistogram:
+        _ = buckets
+        return _DummyHistogram()
+
     CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
 
     def generate_latest() -> bytes:  # type: ignore[misc]
         return b""
 
 
+try:
+    _orjson = importlib.import_module("orjson")
+
+    def render_json(obj: Any, **kwargs: Any) -> str:
+        """Serialize a log event with orjson, falling back to ``default``."""
+        return cast(
+            str,
+            _orjson.dumps(
+                obj,
+                default=kwargs.get("default", str),
+                option=_orjson.OPT_NON_STR_KEYS,
+            ).decode("utf-8"),
+        )
+
+except ImportError:  # pragma: no cover - optional dependency fallback
+
+    def render_json(obj: Any, **kwargs: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), **kwargs)
+
+
 # Get environment and log level from environment variables
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if ENVIRONMENT == "development" else "INFO")
+# Render and write logs on a background thread via a bounded queue; records
+# are dropped (and counted) rather than blocking when the queue is full
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").strip().lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 TRACK_METRICS_DB = os.getenv("TRACK_METRICS_DB", "false").strip().lower() == "true"
 DATABASE_URL = os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL")
+# Async connection pool for the metrics DB
+METRICS_DB_POOL_MIN_SIZE = int(os.getenv("METRICS_DB_POOL_MIN_SIZE", "1"))
+METRICS_DB_POOL_MAX_SIZE = int(os.getenv("METRICS_DB_POOL_MAX_SIZE", "5"))
+METRICS_DB_TIMEOUT = float(os.getenv("METRICS_DB_TIMEOUT", "5"))
+METRICS_DB_RECONNECT_TIMEOUT = float(os.getenv("METRICS_DB_RECONNECT_TIMEOUT", "300"))
+# Server-side prepared statements; disable behind transaction-mode PgBouncer
+METRICS_DB_PREPARE = os.getenv("METRICS_DB_PREPARE", "true").strip().lower() == "true"
+# Seconds between background refreshes of /api/metrics/summary from the DB
+METRICS_SUMMARY_REFRESH_INTERVAL = float(
+    os.getenv("METRICS_SUMMARY_REFRESH_INTERVAL", "30")
+)
+# Live metrics stream: min seconds between pushes, keepalive and viewer cap
+METRICS_STREAM_INTERVAL = float(os.getenv("METRICS_STREAM_INTERVAL", "1"))
+METRICS_STREAM_KEEPALIVE = float(os.getenv("METRICS_STREAM_KEEPALIVE", "15"))
+METRICS_STREAM_MAX_CLIENTS = int(os.getenv("METRICS_STREAM_MAX_CLIENTS", "1000"))
+# Write-behind batching of request_counts upserts
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_FLUSH_MAX_PENDING = int(os.getenv("METRICS_FLUSH_MAX_PENDING", "500"))
 ENABLE_DEMOS = (
     os.getenv("ENABLE_DEMOS", "true" if ENVIRONMENT == "development" else "false")
     .strip()
@@ -69,34 +172,277 @@ ENABLE_DEMOS = (
     == "true"
 )
 
-# Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer(),
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
+# Upstream OpenAI connection pool settings
+OPENAI_POOL_MAX_CONNECTIONS = int(os.getenv("OPENAI_POOL_MAX_CONNECTIONS", "100"))
+OPENAI_POOL_MAX_KEEPALIVE = int(os.getenv("OPENAI_POOL_MAX_KEEPALIVE", "20"))
+OPENAI_POOL_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_POOL_KEEPALIVE_EXPIRY", "30"))
+OPENAI_CLIENT_CACHE_SIZE = int(os.getenv("OPENAI_CLIENT_CACHE_SIZE", "64"))
+OPENAI_CLIENT_IDLE_TTL = float(os.getenv("OPENAI_CLIENT_IDLE_TTL", "600"))
+
+# Client-side upstream rate limiting, seeded from x-ratelimit-* headers
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() == "true"
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "1024"))
+
+# Upstream retries (0 disables) and per-model circuit breaker
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.5"))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "20"))
+CIRCUIT_BREAKER_ENABLED = (
+    os.getenv("CIRCUIT_BREAKER_ENABLED", "true").strip().lower() == "true"
+)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")
+)
+CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", "30"))
+
+# Default per-call time budget for phone_a_friend (review_plan budgets are
+# per review level, see REVIEW_TIMEOUTS)
+PHONE_A_FRIEND_TIMEOUT = float(os.getenv("PHONE_A_FRIEND_TIMEOUT", "60"))
+
+# Optional latency-aware model routing (used when no model is given by the
+# caller). MODEL_ROUTES is JSON mapping a review level or "phone_a_friend" to
+# candidate models in order of preference.
+MODEL_ROUTER_ENABLED = (
+    os.getenv("MODEL_ROUTER_ENABLED", "false").strip().lower() == "true"
+)
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+MODEL_ROUTER_LATENCY_SLO = float(os.getenv("MODEL_ROUTER_LATENCY_SLO", "30"))
+MODEL_ROUTER_MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.2"))
+MODEL_ROUTER_EWMA_ALPHA = float(os.getenv("MODEL_ROUTER_EWMA_ALPHA", "0.2"))
+MODEL_ROUTER_STATS_TTL = float(os.getenv("MODEL_ROUTER_STATS_TTL", "300"))
+
+# Token usage and estimated cost accounting. MODEL_PRICING is JSON mapping a
+# model name prefix to USD per million input, cached_input and output tokens.
+MODEL_PRICING = os.getenv("MODEL_PRICING", "")
+USAGE_KEY_BUCKET_CHARS = int(os.getenv("USAGE_KEY_BUCKET_CHARS", "2"))
+USAGE_WINDOW = float(os.getenv("USAGE_WINDOW", "3600"))
+USAGE_BUCKET_SECONDS = float(os.getenv("USAGE_BUCKET_SECONDS", "60"))
+USAGE_MAX_KEYS = int(os.getenv("USAGE_MAX_KEYS", "1000"))
+USAGE_ADMIN_TOKEN = os.getenv("USAGE_ADMIN_TOKEN", "")
+
+# Share one upstream completion between identical concurrent requests
+SINGLE_FLIGHT_ENABLED = (
+    os.getenv("SINGLE_FLIGHT_ENABLED", "true").strip().lower() == "true"
+)
+
+# Map-reduce review of large plans (threshold 0 disables)
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "12000"))
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "4000"))
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "8"))
+
+# Schema-constrained review output. Models matching a STRUCTURED_OUTPUT_MODELS
+# prefix get a JSON schema response_format; every review stream is validated
+# as it arrives and retried when it goes wrong early.
+STRUCTURED_OUTPUT_MODELS = [
+    prefix.strip()
+    for prefix in os.getenv(
+        "STRUCTURED_OUTPUT_MODELS", "gpt-4o,gpt-4.1,gpt-5,o3,o4-mini"
+    ).split(",")
+    if prefix.strip()
+]
+REVIEW_MALFORMED_RETRIES = int(os.getenv("REVIEW_MALFORMED_RETRIES", "1"))
+
+# phone_a_friend_batch limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Minimum seconds between streamed partial-output notifications
+STREAM_NOTIFY_INTERVAL = float(os.getenv("STREAM_NOTIFY_INTERVAL", "0.25"))
+
+# Opt-in exact-match response cache for phone_a_friend
+RESPONSE_CACHE_ENABLED = (
+    os.getenv("RESPONSE_CACHE_ENABLED", "false").strip().lower() == "true"
+)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 << 20)))
+
+# Incremental re-review: fall back to a full review above this share of changes
+INCREMENTAL_REVIEW_MAX_CHANGED_RATIO = float(
+    os.getenv("INCREMENTAL_REVIEW_MAX_CHANGED_RATIO", "0.6")
+)
+
+# Content-addressed plan review cache
+REVIEW_CACHE_ENABLED = (
+    os.getenv("REVIEW_CACHE_ENABLED", "true").strip().lower() == "true"
+)
+REVIEW_CACHE_TTL = float(os.getenv("REVIEW_CACHE_TTL", "3600"))
+REVIEW_CACHE_MAX_BYTES = int(os.getenv("REVIEW_CACHE_MAX_BYTES", str(64 << 20)))
+
+# Bounds for the in-memory plan_reviews store
+PLAN_REVIEWS_MAX_ENTRIES = int(os.getenv("PLAN_REVIEWS_MAX_ENTRIES", "1000"))
+PLAN_REVIEWS_MAX_BYTES = int(os.getenv("PLAN_REVIEWS_MAX_BYTES", str(64 << 20)))
+PLAN_REVIEWS_TTL = float(os.getenv("PLAN_REVIEWS_TTL", "86400"))
+
+# Persistent plan review history: "sqlite" (default), "postgres" or "none"
+PLAN_REVIEW_REPOSITORY = os.getenv("PLAN_REVIEW_REPOSITORY", "sqlite").strip().lower()
+PLAN_REVIEW_SQLITE_PATH = os.getenv("PLAN_REVIEW_SQLITE_PATH", "plan_reviews.db")
+PLAN_REVIEW_LIST_MAX_LIMIT = int(os.getenv("PLAN_REVIEW_LIST_MAX_LIMIT", "100"))
+PLAN_REVIEW_DB_POOL_MAX_SIZE = int(os.getenv("PLAN_REVIEW_DB_POOL_MAX_SIZE", "4"))
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
 )
 
-# Set the log level
-logging.basicConfig(level=LOG_LEVEL)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hand log records to the writer thread without ever blocking.
+
+    Records are queued unformatted, so rendering happens on the writer thread.
+    When the bounded queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, queue: "Queue[Any]") -> None:
+        super().__init__(queue)
+        self.dropped = 0
+        self.listener: Optional[LogWriter] = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class LogWriter(logging.handlers.QueueListener):
+    """Background thread that formats and writes queued log records."""
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than lose the sentinel; the thread is draining
+        cast("Queue[Any]", self.queue).put(self._sentinel)  # type: ignore[attr-defined]
+
+    def stop(self) -> None:
+        if self._thread is not None:  # type: ignore[attr-defined]
+            super().stop()
+
+
+def configure_logging() -> logging.Handler:
+    """Route structlog and stdlib records through one JSON formatter.
+
+    structlog processors run in the caller up to the level filter and event
+    dict; JSON rendering and the stderr write happen in the root handler,
+    which with LOG_ASYNC is a queue drained by a ``LogWriter`` thread.
+    """
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.JSONRenderer(serializer=render_json),
+            ],
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+            ],
+        )
+    )
+
+    root = logging.getLogger()
+    for previous in root.handlers:
+        # Reconfiguring (e.g. a module reload) retires the old writer thread
+        if getattr(previous, "listener", None) is not None:
+            previous.listener.stop()  # type: ignore[attr-defined]
+    handler: logging.Handler = stream_handler
+    if LOG_ASYNC:
+        queue_handler = DroppingQueueHandler(Queue(LOG_QUEUE_SIZE))
+        queue_handler.listener = LogWriter(queue_handler.queue, stream_handler)
+        queue_handler.listener.start()
+        atexit.register(queue_handler.listener.stop)
+        handler = queue_handler
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+    return handler
+
+
+log_handler = configure_logging()
 logger = structlog.get_logger()
 
+# Application lifecycle hooks, run around the ASGI lifespan of the HTTP app
+_startup_hooks: List[Callable[[], Awaitable[None]]] = []
+_shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+
+def on_startup(hook: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """Register a coroutine function to run when the HTTP app starts."""
+    _startup_hooks.append(hook)
+    return hook
+
+
+def on_shutdown(hook: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """Register a coroutine function to run when the HTTP app shuts down."""
+    _shutdown_hooks.append(hook)
+    return hook
+
+
+async def _run_hooks(phase: str, hooks: List[Callable[[], Awaitable[None]]]) -> None:
+    for hook in hooks:
+        try:
+            await hook()
+        except Exception as exc:  # never let one hook block the others
+            logger.error(
+                "Lifespan hook failed",
+                phase=phase,
+                hook=getattr(hook, "__name__", repr(hook)),
+                error=str(exc),
+            )
+
+
+class LifespanHooksMiddleware:
+    """ASGI middleware that runs registered startup/shutdown hooks.
+
+    FastMCP builds its own Starlette app (and lifespan) for every ``http_app()``
+    or ``run()`` call, so hooks are attached by intercepting lifespan messages.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope["type"] != "lifespan":
+            await self.app(scope, receive, send)
+            return
+
+        async def receive_with_hooks() -> Any:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await _run_hooks("startup", _startup_hooks)
+            elif message["type"] == "lifespan.shutdown":
+                await _run_hooks("shutdown", list(reversed(_shutdown_hooks)))
+            return message
+
+        await self.app(scope, receive_with_hooks, send)
+
+
+SERVER_MIDDLEWARE = [Middleware(LifespanHooksMiddleware)]
+
 # Initialize FastMCP server
 mcp = FastMCP("brain-trust")
 
 # Create HTTP app for custom routes/static assets
-http_app = mcp.http_app()
+http_app = mcp.http_app(middleware=SERVER_MIDDLEWARE)
 
 # Serve static files from dist directory
 dist_path = Path(__file__).parent / "dist"
@@ -127,13 +473,38 @@ def get_config_from_headers() -> Dict[str, Any]:
         except ValueError:
             logger.warning(f"Invalid max_tokens header: {max_tokens_str}")
 
-    logger.debug(
-        "Configuration from headers",
-        has_api_key=bool(config.get("api_key")),
-        api_key_length=len(config.get("api_key", "")),
-        model=config.get("model"),
-        max_tokens=config.get("max_tokens"),
-    )
+    # Caller deadline: seconds remaining, or an absolute Unix timestamp
+    if deadline_str := headers.get("x-request-deadline"):
+        try:
+            deadline = float(deadline_str)
+            if deadline > 1e9:
+                deadline -= time.time()
+            config["deadline"] = max(0.0, deadline)
+        except ValueError:
+            logger.warning(f"Invalid X-Request-Deadline header: {deadline_str}")
+
+    # Stream partial output as MCP notifications
+    if headers.get("x-stream", "").strip().lower() in {"1", "true", "yes"}:
+        config["stream"] = True
+
+    # Skip the response cache for this request
+    cache_control = headers.get("cache-control", "").lower()
+    if (
+        headers.get("x-cache-bypass", "").strip().lower() in {"1", "true", "yes"}
+        or "no-cache" in cache_control
+        or "no-store" in cache_control
+    ):
+        config["cache_bypass"] = True
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Configuration from headers",
+            has_api_key=bool(config.get("api_key")),
+            api_key_length=len(config.get("api_key", "")),
+            model=config.get("model"),
+            max_tokens=config.get("max_tokens"),
+            cache_bypass=config.get("cache_bypass", False),
+        )
 
     return config
 
@@ -152,6 +523,8 @@ def log_openai_request(
     model: str, messages: List[Dict[str, Any]], max_tokens: int, api_key: str
 ) -> None:
     """Log OpenAI request details."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     # Only log minimal, aggregate details; never log prompts or headers
     message_count = len(messages)
     prompt_chars = 0
@@ -176,6 +549,8 @@ def log_openai_request(
 
 def log_openai_response(response: Any) -> None:
     """Log OpenAI response details."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     logger.debug(
         "OpenAI API Response",
         environment=ENVIRONMENT,
@@ -192,6 +567,8 @@ def log_openai_response(response: Any) -> None:
 
 def log_mcp_call(tool_name: str, **kwargs: Any) -> None:
     """Log incoming MCP tool call."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     # Mask sensitive parameters
     safe_kwargs: Dict[str, Any] = {}
     for key, value in kwargs.items():
@@ -234,21 +611,601 @@ class ReviewLevel(str, Enum):
     EXPERT = "expert"  # Professional-level review with best practices
 
 
-class PlanReview(BaseModel):
-    """Plan review result."""
+# Default time budget per review level, in seconds
+REVIEW_TIMEOUTS: Dict[ReviewLevel, float] = {
+    level: float(os.getenv(f"REVIEW_TIMEOUT_{level.name}", default))
+    for level, default in {
+        ReviewLevel.QUICK: "60",
+        ReviewLevel.STANDARD: "90",
+        ReviewLevel.COMPREHENSIVE: "150",
+        ReviewLevel.DEEP_DIVE: "240",
+        ReviewLevel.EXPERT: "300",
+    }.items()
+}
 
-    plan_id: str
-    review_level: ReviewLevel
-    overall_score: float
+
+class ReviewOutput(BaseModel):
+    """The review fields a model is asked to produce."""
+
+    overall_score: float = Field(description="Overall plan quality from 0.0 to 1.0")
     strengths: List[str]
     weaknesses: List[str]
     suggestions: List[str]
-    detailed_feedback: str
+    detailed_feedback: str = Field(description="Comprehensive feedback text")
+
+
+class PlanReview(ReviewOutput):
+    """Plan review result."""
+
+    plan_id: str
+    review_level: ReviewLevel
     reviewed_at: datetime = Field(default_factory=datetime.now)
+    # Section title -> content hash, used for incremental re-reviews
+    section_hashes: Dict[str, str] = Field(default_factory=dict)
+    # Hash of the focus areas, context and model the review was produced with
+    inputs_key: str = ""
+
+
+PLAN_REVIEWS_ENTRIES = Gauge("plan_reviews_entries", "Plan reviews held in memory")
+PLAN_REVIEWS_BYTES = Gauge(
+    "plan_reviews_bytes", "Approximate serialized size of stored plan reviews"
+)
+
+
+# (owner, plan_id): plan_ids are caller-chosen, so reviews are scoped per API key
+PlanReviewKey = tuple[str, str]
+
+
+class PlanReviewStore:
+    """Bounded in-memory store of the latest review per owner and plan_id.
+
+    Entries are evicted least recently used first once either the entry or the
+    byte budget is exceeded, and lazily once older than the TTL. Sizes are the
+    serialized JSON length, so byte figures are approximate.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[PlanReviewKey, tuple[PlanReview, float, int]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(cast(PlanReviewKey, key)) is not None
+
+    def __getitem__(self, key: PlanReviewKey) -> PlanReview:
+        review = self.get(key)
+        if review is None:
+            raise KeyError(key)
+        return review
+
+    def __setitem__(self, key: PlanReviewKey, review: PlanReview) -> None:
+        size = len(review.model_dump_json()) + sum(len(part) for part in key)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (review, time.monotonic() + self.ttl, size)
+        self.current_bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            evicted = next(iter(self._entries))
+            self._remove(evicted)
+            logger.debug("Plan review evicted", plan_id=evicted[1])
+        self._update_gauges()
+
+    def _remove(self, key: PlanReviewKey) -> None:
+        _review, _expires_at, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _update_gauges(self) -> None:
+        PLAN_REVIEWS_ENTRIES.set(len(self._entries))
+        PLAN_REVIEWS_BYTES.set(self.current_bytes)
+
+    def get(self, key: PlanReviewKey) -> Optional[PlanReview]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        review, expires_at, _size = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self._update_gauges()
+            return None
+        self._entries.move_to_end(key)
+        return review
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+        self._update_gauges()
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[1] <= now]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self._update_gauges()
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        self.purge_expired()
+        return {
+            "plan_reviews_count": len(self._entries),
+            "plan_reviews_bytes": self.current_bytes,
+        }
 
 
 # In-memory storage for plan reviews
-plan_reviews: Dict[str, PlanReview] = {}
+plan_reviews = PlanReviewStore(
+    PLAN_REVIEWS_MAX_ENTRIES, PLAN_REVIEWS_MAX_BYTES, PLAN_REVIEWS_TTL
+)
+
+
+def plan_review_result(plan_review: PlanReview) -> Dict[str, Any]:
+    """Serialize a stored review into the review_plan tool result."""
+    reviewed_at_value: datetime = cast(datetime, getattr(plan_review, "reviewed_at"))
+    return {
+        "plan_id": plan_review.plan_id,
+        "review_level": plan_review.review_level,
+        "overall_score": plan_review.overall_score,
+        "strengths": plan_review.strengths,
+        "weaknesses": plan_review.weaknesses,
+        "suggestions": plan_review.suggestions,
+        "detailed_feedback": plan_review.detailed_feedback,
+        "reviewed_at": reviewed_at_value.isoformat(),
+    }
+
+
+def parse_review_json(review_text: str) -> Optional[Dict[str, Any]]:
+    """Extract and validate the JSON review object in a model response.
+
+    Structured output is the whole response; otherwise the object is cut out
+    of any surrounding prose.
+    """
+    try:
+        review_data = json.loads(review_text)
+    except json.JSONDecodeError:
+        start_idx = review_text.find("{")
+        end_idx = review_text.rfind("}") + 1
+        if start_idx == -1 or end_idx == 0:
+            return None
+        try:
+            review_data = json.loads(review_text[start_idx:end_idx])
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(review_data, dict):
+        return None
+    try:
+        review = ReviewOutput.model_validate(review_data)
+    except ValidationError:
+        return None
+    if not 0.0 <= review.overall_score <= 1.0:
+        return None
+    return review.model_dump()
+
+
+def strict_json_schema(model: type[BaseModel]) -> Dict[str, Any]:
+    """Schema for strict structured outputs: all fields required, no extras."""
+    properties = {
+        name: {
+            key: value
+            for key, value in field_schema.items()
+            if key in {"type", "items", "description"}
+        }
+        for name, field_schema in model.model_json_schema()["properties"].items()
+    }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+REVIEW_JSON_SCHEMA_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "plan_review",
+        "strict": True,
+        "schema": strict_json_schema(ReviewOutput),
+    },
+}
+
+
+def supports_structured_output(model: str) -> bool:
+    return any(model.startswith(prefix) for prefix in STRUCTURED_OUTPUT_MODELS)
+
+
+class MalformedReviewError(ValueError):
+    """A review response that does not match the review schema."""
+
+
+def require_review_json(review_text: str) -> Dict[str, Any]:
+    """The review in a model response; raises rather than invent a score."""
+    review_data = parse_review_json(review_text)
+    if review_data is None:
+        raise MalformedReviewError("Review response holds no valid review object")
+    return review_data
+
+
+REVIEW_VALUE_STARTS: Dict[str, str] = {
+    "overall_score": "-0123456789",
+    "strengths": "[",
+    "weaknesses": "[",
+    "suggestions": "[",
+    "detailed_feedback": '"',
+}
+
+
+class ReviewStreamValidator:
+    """Check a review against ``ReviewOutput`` while it streams in.
+
+    Only top-level JSON structure is tracked: each key, the first character
+    of its value, list items and the score. An unknown field, a value of the
+    wrong type or a score outside 0..1 raises ``MalformedReviewError`` within
+    a few tokens instead of after the whole generation. With ``strict`` (a
+    JSON schema was requested) the response must be just the object;
+    otherwise prose around it is skipped.
+    """
+
+    def __init__(self, strict: bool) -> None:
+        self.strict = strict
+        self.chars = 0
+        self.started = False
+        self.closed = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.expect = "key"  # key, colon, value, scalar, comma
+        self.key: Optional[str] = None
+        self._token: Optional[List[str]] = None
+        self.seen: Set[str] = set()
+
+    def fail(self, reason: str) -> NoReturn:
+        raise MalformedReviewError(f"Malformed review at char {self.chars}: {reason}")
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            self.chars += 1
+            self._step(char)
+
+    def finish(self) -> None:
+        """Raise unless a complete review object was seen."""
+        if not self.closed:
+            self.fail("review object is incomplete")
+        missing = set(REVIEW_VALUE_STARTS) - self.seen
+        if missing:
+            self.fail(f"missing {', '.join(sorted(missing))}")
+
+    def _step(self, char: str) -> None:
+        if self.in_string:
+            if self.escaped:
+                self.escaped = False
+            elif char == "\\":
+                self.escaped = True
+            elif char == '"':
+                self.in_string = False
+                if self.depth == 1 and self.expect == "key":
+                    self._end_key()
+                return
+            if self._token is not None:
+                self._token.append(char)
+            return
+        if self.closed or not self.started:
+            if char == "{" and not self.started:
+                self.started = True
+                self.depth = 1
+            elif self.strict and not char.isspace():
+                self.fail("expected only a JSON object")
+            return
+        if self.depth > 1:
+            self._step_nested(char)
+        else:
+            self._step_top(char)
+
+    def _step_nested(self, char: str) -> None:
+        in_list = REVIEW_VALUE_STARTS.get(cast(str, self.key)) == "["
+        if in_list and self.depth == 2 and not char.isspace() and char not in '",]':
+            self.fail(f"{self.key} must be a list of strings")
+        if char == '"':
+            self.in_string = True
+        elif char in "[{":
+            self.depth += 1
+        elif char in "]}":
+            self.depth -= 1
+
+    def _step_top(self, char: str) -> None:
+        if self.expect == "scalar":
+            if char.isalnum() or char in ".+-":
+                cast(List[str], self._token).append(char)
+                return
+            self._end_scalar()
+        if char.isspace():
+            return
+        if self.expect == "key":
+            if char == '"':
+                self.in_string = True
+                self._token = []
+            elif char == "}" and not self.seen:
+                self._close()
+            else:
+                self.fail("expected a field name")
+        elif self.expect == "colon":
+            if char != ":":
+                self.fail("expected ':'")
+            self.expect = "value"
+        elif self.expect == "value":
+            allowed = REVIEW_VALUE_STARTS.get(cast(str, self.key))
+            if allowed is not None and char not in allowed:
+                self.fail(f"{self.key} has the wrong type")
+            self.expect = "comma"
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            else:
+                self.expect = "scalar"
+                self._token = [char]
+        elif char == ",":
+            self.expect = "key"
+        elif char == "}":
+            self._close()
+        else:
+            self.fail("expected ',' or '}'")
+
+    def _end_key(self) -> None:
+        self.key = "".join(cast(List[str], self._token))
+        self._token = None
+        if self.key not in REVIEW_VALUE_STARTS and self.strict:
+            self.fail(f"unknown field {self.key!r}")
+        self.seen.add(self.key)
+        self.expect = "colon"
+
+    def _end_scalar(self) -> None:
+        token = "".join(cast(List[str], self._token))
+        self._token = None
+        self.expect = "comma"
+        if self.key != "overall_score":
+            return
+        try:
+            score = float(token)
+        except ValueError:
+            self.fail(f"invalid number {token!r}")
+        if not 0.0 <= score <= 1.0:
+            self.fail(f"overall_score {score} is outside 0..1")
+
+    def _close(self) -> None:
+        self.depth = 0
+        self.closed = True
+
+
+_LINE_BREAKS = re.compile(r"\r\n?")
+_HEADING = re.compile(r"^(#{1,6})\s*(.*?)\s*#*$")
+_BULLET = re.compile(r"^[*+\-\u2022]\s+")
+_NUMBERED = re.compile(r"^\d+[.)]\s+")
+_STRONG = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize_plan(text: str) -> str:
+    """Normalize whitespace and markdown formatting that does not change meaning.
+
+    Indentation, blank lines, trailing spaces, bullet markers, list numbering,
+    closing heading hashes and bold markers are normalized so that formatting-only
+    edits hash to the same review cache key.
+    """
+    lines: List[str] = []
+    for raw_line in _LINE_BREAKS.sub("\n", text).split("\n"):
+        line = raw_line.strip()
+        if not line:
+            continue
+        if heading := _HEADING.match(line):
+            line = f"{heading.group(1)} {heading.group(2)}"
+        elif _BULLET.match(line):
+            line = _BULLET.sub("- ", line, count=1)
+        elif _NUMBERED.match(line):
+            line = _NUMBERED.sub("1. ", line, count=1)
+        line = _STRONG.sub(r"\2", line)
+        lines.append(_WHITESPACE.sub(" ", line))
+    return "\n".join(lines)
+
+
+_SECTION_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+\S")
+_CODE_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def split_plan_sections(plan_content: str) -> List[tuple[str, str]]:
+    """Split a markdown plan into ``(title, text)`` sections at headings.
+
+    Text before the first heading becomes a section titled ``"(preamble)"``.
+    Headings inside fenced code blocks are ignored, and repeated titles are
+    disambiguated with a counter so every section has a unique title.
+    """
+    sections: List[tuple[str, List[str]]] = [("(preamble)", [])]
+    in_fence = False
+    for line in _LINE_BREAKS.sub("\n", plan_content).split("\n"):
+        if _CODE_FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _SECTION_HEADING.match(line):
+            sections.append((line.strip().lstrip("#").strip(" #"), []))
+        sections[-1][1].append(line)
+
+    result: List[tuple[str, str]] = []
+    seen: Dict[str, int] = {}
+    for title, body in sections:
+        text = "\n".join(body).strip()
+        if not text:
+            continue
+        seen[title] = seen.get(title, 0) + 1
+        if seen[title] > 1:
+            title = f"{title} ({seen[title]})"
+        result.append((title, text))
+    return result
+
+
+def hash_plan_sections(sections: List[tuple[str, str]]) -> Dict[str, str]:
+    """Content hash per section, insensitive to formatting-only edits."""
+    return {
+        title: hashlib.sha256(canonicalize_plan(text).encode("utf-8")).hexdigest()[:16]
+        for title, text in sections
+    }
+
+
+def plan_section_delta(
+    previous: Dict[str, str], current: Dict[str, str]
+) -> tuple[List[str], List[str]]:
+    """Return ``(changed_or_added, removed)`` section titles."""
+    changed = [
+        title for title, digest in current.items() if previous.get(title) != digest
+    ]
+    removed = [title for title in previous if title not in current]
+    return changed, removed
+
+
+def format_findings(
+    prefix: str,
+    overall_score: float,
+    strengths: List[str],
+    weaknesses: List[str],
+    suggestions: List[str],
+    limit: int = 8,
+) -> str:
+    """Render review findings as compact bullet lists for a follow-up prompt."""
+
+    def bullets(items: List[str]) -> str:
+        shown = [f"- {str(item)[:200]}" for item in items[:limit]]
+        if len(items) > limit:
+            shown.append(f"- ... {len(items) - limit} more")
+        return "\n".join(shown) or "- (none)"
+
+    return (
+        f"{prefix} overall score: {overall_score:.2f}\n"
+        f"{prefix} strengths:\n{bullets(strengths)}\n"
+        f"{prefix} weaknesses:\n{bullets(weaknesses)}\n"
+        f"{prefix} suggestions:\n{bullets(suggestions)}"
+    )
+
+
+def summarize_prior_review(plan_review: PlanReview, limit: int = 8) -> str:
+    """Compact summary of earlier findings to carry into an incremental review."""
+    return format_findings(
+        "Prior",
+        plan_review.overall_score,
+        plan_review.strengths,
+        plan_review.weaknesses,
+        plan_review.suggestions,
+        limit,
+    )
+
+
+def build_incremental_plan_section(
+    previous_review: PlanReview,
+    sections: List[tuple[str, str]],
+    changed: List[str],
+    removed: List[str],
+) -> str:
+    """Prompt text that carries only the changed sections of a plan."""
+    changed_set = set(changed)
+    unchanged = [title for title, _text in sections if title not in changed_set]
+    changed_text = "\n\n".join(text for title, text in sections if title in changed_set)
+    return (
+        "This is an incremental re-review of a plan you reviewed before. "
+        "Only the sections that changed since that review are included.\n\n"
+        f"{summarize_prior_review(previous_review)}\n\n"
+        f"Unchanged sections (not shown): {', '.join(unchanged) or '(none)'}\n"
+        f"Removed sections: {', '.join(removed) or '(none)'}\n\n"
+        f"Changed or new sections:\n{changed_text or '(none)'}\n\n"
+        "Return the complete, updated review for the whole plan: keep prior "
+        "findings that still apply, drop those the changes resolve, and add "
+        "findings for the changed sections. Focus detailed_feedback on what "
+        "changed."
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _split_oversized_section(
+    title: str, text: str, max_tokens: int
+) -> List[tuple[str, str]]:
+    """Split one section at line boundaries into pieces within ``max_tokens``."""
+    max_chars = max_tokens * 4
+    pieces: List[str] = []
+    current: List[str] = []
+    current_chars = 0
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            # A single line over budget is split hard
+            if current:
+                pieces.append("\n".join(current))
+                current, current_chars = [], 0
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and current_chars + len(line) + 1 > max_chars:
+            pieces.append("\n".join(current))
+            current, current_chars = [], 0
+        current.append(line)
+        current_chars += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return [(f"{title} (part {i})", piece) for i, piece in enumerate(pieces, 1)]
+
+
+def chunk_plan_sections(
+    sections: List[tuple[str, str]], max_tokens: int
+) -> List[List[tuple[str, str]]]:
+    """Greedily pack consecutive sections into chunks of at most ``max_tokens``."""
+    chunks: List[List[tuple[str, str]]] = []
+    current: List[tuple[str, str]] = []
+    current_tokens = 0
+    for title, text in sections:
+        pieces = (
+            _split_oversized_section(title, text, max_tokens)
+            if estimate_tokens(text) > max_tokens
+            else [(title, text)]
+        )
+        for piece_title, piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append((piece_title, piece))
+            current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_findings(
+    partials: List[Dict[str, Any]], key: str, limit: int = 12
+) -> List[str]:
+    """Order-preserving, case-insensitive union of one finding list."""
+    seen: set[str] = set()
+    merged: List[str] = []
+    for partial in partials:
+        for item in partial.get(key) or []:
+            normalized = " ".join(str(item).lower().split())
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                merged.append(str(item))
+    return merged[:limit]
+
+
+def review_score(review_data: Dict[str, Any], default: float = 0.7) -> float:
+    """The review's overall_score clamped to [0, 1], or ``default``."""
+    try:
+        score = float(review_data.get("overall_score", default))
+    except (TypeError, ValueError):
+        return default
+    return min(1.0, max(0.0, score))
 
 
 # Metrics: minimal, aggregate counters
@@ -258,99 +1215,2021 @@ REQUEST_COUNTER = Counter(
     ["tool", "status"],
 )
 
+# Latency and size distributions for capacity planning. review_level is
+# "none" for tools other than review_plan.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 131072)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+TOOL_DURATION = Histogram(
+    "tool_duration_seconds",
+    "End-to-end tool call duration",
+    ["tool", "model", "review_level"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_REQUEST_BYTES = Histogram(
+    "tool_request_bytes",
+    "Size of the text a tool call sends for completion (question, context, plan)",
+    ["tool", "model", "review_level"],
+    buckets=BYTES_BUCKETS,
+)
+UPSTREAM_REQUEST_PROMPT_TOKENS = Histogram(
+    "upstream_request_prompt_tokens",
+    "Prompt tokens per upstream completion",
+    ["tool", "model", "review_level"],
+    buckets=TOKEN_BUCKETS,
+)
+UPSTREAM_REQUEST_COMPLETION_TOKENS = Histogram(
+    "upstream_request_completion_tokens",
+    "Completion tokens per upstream completion",
+    ["tool", "model", "review_level"],
+    buckets=TOKEN_BUCKETS,
+)
+
+
+def text_bytes(*parts: Optional[str]) -> int:
+    return sum(len(part.encode("utf-8")) for part in parts if part)
+
+
+class ToolCallMetrics:
+    """Duration and payload histograms for one tool call.
+
+    The model label is only known once the call has resolved it, so the body
+    reports it through ``request`` and the caller observes the duration with
+    ``finish``.
+    """
+
+    def __init__(self, tool: str, review_level: str = "none") -> None:
+        self.tool = tool
+        self.review_level = review_level
+        self.model = "unknown"
+        self.started = time.monotonic()
+
+    def labels(self) -> Dict[str, str]:
+        return {
+            "tool": self.tool,
+            "model": self.model,
+            "review_level": self.review_level,
+        }
+
+    def request(self, model: str, request_bytes: int) -> None:
+        self.model = model
+        TOOL_REQUEST_BYTES.labels(**self.labels()).observe(request_bytes)
+
+    def finish(self) -> None:
+        TOOL_DURATION.labels(**self.labels()).observe(time.monotonic() - self.started)
+
+
 # Simple in-memory tallies for homepage display
 REQUEST_TALLIES: Dict[str, Dict[str, int]] = {}
 
 
+class TallyBroadcaster:
+    """Fan out coalesced REQUEST_TALLIES deltas to live metrics viewers.
+
+    Increments are accumulated while viewers are connected and published at
+    most once per ``interval`` as a single pre-formatted SSE event shared by
+    every subscriber queue. A viewer that falls ``max_queue`` events behind has
+    its backlog replaced by a full ``snapshot`` event.
+    """
+
+    def __init__(self, interval: float, max_queue: int = 16) -> None:
+        self.interval = interval
+        self.max_queue = max_queue
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._subscribers: Set["asyncio.Queue[str]"] = set()
+        self._scheduled = False
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> "asyncio.Queue[str]":
+        queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[str]") -> None:
+        self._subscribers.discard(queue)
+
+    def mark(self, tool: str, status: str) -> None:
+        if not self._subscribers:
+            return
+        per = self._pending.setdefault(tool, {})
+        per[status] = per.get(status, 0) + 1
+        if not self._scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.publish()
+                return
+            self._scheduled = True
+            loop.call_later(self.interval, self.publish)
+
+    def publish(self) -> None:
+        self._scheduled = False
+        if not self._pending:
+            return
+        event = sse_event(
+            "delta",
+            {"tallies": self._pending, "generated_at": datetime.now().isoformat()},
+        )
+        self._pending = {}
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for deltas: resync from a fresh snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(metrics_snapshot_event())
+
+
 def increment_tally(tool: str, status: str) -> None:
     tool_map = REQUEST_TALLIES.setdefault(tool, {})
     tool_map[status] = tool_map.get(status, 0) + 1
+    tally_broadcaster.mark(tool, status)
+
+
+tally_broadcaster = TallyBroadcaster(METRICS_STREAM_INTERVAL)
+
+
+# Response cache metrics, labeled by tool
+CACHE_HITS = Counter("response_cache_hits_total", "Response cache hits", ["tool"])
+CACHE_MISSES = Counter("response_cache_misses_total", "Response cache misses", ["tool"])
+CACHE_EVICTIONS = Counter(
+    "response_cache_evictions_total",
+    "Response cache entries evicted for TTL expiry or memory budget",
+    ["tool"],
+)
+
+
+def cache_key(*parts: Any) -> str:
+    """Hash request parameters into a fixed-size cache key."""
+    encoded = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
 
-# Optional Postgres metrics storage
-_db_conn: Any = None
+class TTLCache:
+    """In-memory LRU cache with per-entry TTL and a total byte budget.
+
+    Entry sizes are supplied by the caller (or estimated from ``str(value)``), so
+    the budget bounds the payload memory rather than exact interpreter overhead.
+    """
+
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, tool: str, max_bytes: int, ttl: float) -> None:
+        self.tool = tool
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, tuple[Any, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, key: str) -> None:
+        _value, _expires_at, size = self._entries.pop(key)
+        self.current_bytes -= size
+        CACHE_EVICTIONS.labels(tool=self.tool).inc()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_MISSES.labels(tool=self.tool).inc()
+            return None
+        value, expires_at, _size = entry
+        if expires_at <= time.monotonic():
+            self._evict(key)
+            CACHE_MISSES.labels(tool=self.tool).inc()
+            return None
+        self._entries.move_to_end(key)
+        CACHE_HITS.labels(tool=self.tool).inc()
+        return value
+
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = len(str(value).encode("utf-8"))
+        size += len(key) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            _old, _expires_at, old_size = self._entries.pop(key)
+            self.current_bytes -= old_size
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+
+phone_a_friend_cache = TTLCache(
+    "phone_a_friend", RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL
+)
+review_plan_cache = TTLCache("review_plan", REVIEW_CACHE_MAX_BYTES, REVIEW_CACHE_TTL)
+
+
+# Optional Postgres metrics storage, through an async connection pool
+_metrics_pool: Any = None
 _metrics_table_ready: bool = False
 
+METRICS_POOL_SIZE = Gauge("metrics_db_pool_size", "Connections in the metrics DB pool")
+METRICS_POOL_AVAILABLE = Gauge(
+    "metrics_db_pool_available", "Idle connections in the metrics DB pool"
+)
+METRICS_POOL_WAITING = Gauge(
+    "metrics_db_pool_requests_waiting", "Requests waiting for a metrics DB connection"
+)
 
-def initialize_metrics_db() -> None:
-    """Initialize DB connection and ensure metrics table exists if enabled."""
-    global _db_conn, _metrics_table_ready
-    if not TRACK_METRICS_DB:
+UPSERT_REQUEST_COUNTS_SQL = """
+insert into public.request_counts (tool, status, day, count)
+select * from unnest(%s::text[], %s::text[], %s::date[], %s::bigint[])
+on conflict (tool, status, day)
+do update set count = public.request_counts.count + excluded.count
+"""
+
+SUMMARY_REQUEST_COUNTS_SQL = """
+select tool, status, sum(count) as total
+from public.request_counts
+group by tool, status
+order by tool, status
+"""
+
+
+def update_metrics_pool_gauges() -> None:
+    if _metrics_pool is None:
         return
+    stats = _metrics_pool.get_stats()
+    METRICS_POOL_SIZE.set(stats.get("pool_size", 0))
+    METRICS_POOL_AVAILABLE.set(stats.get("pool_available", 0))
+    METRICS_POOL_WAITING.set(stats.get("requests_waiting", 0))
+
+
+async def initialize_metrics_db() -> Any:
+    """Open the metrics pool and ensure the table exists; None if unavailable."""
+    global _metrics_pool, _metrics_table_ready
+    if not TRACK_METRICS_DB:
+        return None
     if not DATABASE_URL:
         logger.error(
             "DB metrics enabled but DATABASE_URL/SUPABASE_DB_URL is not set",
             track_metrics_db=TRACK_METRICS_DB,
         )
-        return
+        return None
     # Import lazily to avoid hard dependency when disabled
     try:
-        psycopg = __import__("psycopg")
+        psycopg = importlib.import_module("psycopg")
+        psycopg_pool = importlib.import_module("psycopg_pool")
     except ImportError as exc:
-        _metrics_table_ready = False
-        logger.error("DB metrics init failed: psycopg not installed", error=str(exc))
-        return
+        logger.error(
+            "DB metrics init failed: psycopg/psycopg_pool not installed",
+            error=str(exc),
+        )
+        return None
+
+    if _metrics_pool is None:
+        # Connections are health-checked on checkout, and the pool re-establishes
+        # failed ones in the background with exponential backoff
+        _metrics_pool = psycopg_pool.AsyncConnectionPool(
+            DATABASE_URL,
+            min_size=METRICS_DB_POOL_MIN_SIZE,
+            max_size=METRICS_DB_POOL_MAX_SIZE,
+            timeout=METRICS_DB_TIMEOUT,
+            reconnect_timeout=METRICS_DB_RECONNECT_TIMEOUT,
+            check=psycopg_pool.AsyncConnectionPool.check_connection,
+            kwargs={"autocommit": True},
+            open=False,
+        )
+        await _metrics_pool.open(wait=False)
 
-    try:
-        if _db_conn is None:
-            _db_conn = psycopg.connect(DATABASE_URL, autocommit=True)  # type: ignore[arg-type]
-        with _db_conn.cursor() as cur:  # type: ignore[union-attr]
-            cur.execute(
-                """
-                create table if not exists public.request_counts (
-                    tool text not null,
-                    status text not null,
-                    day date not null,
-                    count bigint not null default 0,
-                    primary key (tool, status, day)
-                );
-                """
-            )
-        _metrics_table_ready = True
-        logger.info("Metrics table ready", table="public.request_counts")
-    except psycopg.Error as exc:  # type: ignore[attr-defined]
+    if not _metrics_table_ready:
+        try:
+            async with _metrics_pool.connection() as conn:
+                await conn.execute(
+                    """
+                    create table if not exists public.request_counts (
+                        tool text not null,
+                        status text not null,
+                        day date not null,
+                        count bigint not null default 0,
+                        primary key (tool, status, day)
+                    );
+                    """
+                )
+            _metrics_table_ready = True
+            logger.info("Metrics table ready", table="public.request_counts")
+        except psycopg.Error as exc:  # includes psycopg_pool.PoolTimeout
+            logger.error("DB metrics init failed", error=str(exc))
+    update_metrics_pool_gauges()
+    return _metrics_pool
+
+
+@on_startup
+async def open_metrics_db() -> None:
+    await initialize_metrics_db()
+
+
+@on_shutdown
+async def close_metrics_db() -> None:
+    global _metrics_pool, _metrics_table_ready
+    if _metrics_pool is not None:
+        await _metrics_pool.close()
+        _metrics_pool = None
         _metrics_table_ready = False
-        logger.error("DB metrics init failed", error=str(exc))
 
 
-def db_increment(tool: str, status: str) -> None:
-    """Increment DB counters; safe no-op if disabled or unavailable."""
-    if not TRACK_METRICS_DB or not DATABASE_URL:
-        return
-    # Read-only access to globals; no global declaration needed
-    # Import lazily; if missing, log and return
-    try:
-        psycopg = __import__("psycopg")
-    except ImportError as exc:
-        logger.error(
-            "DB metrics increment failed: psycopg not installed", error=str(exc)
-        )
-        return
+async def db_flush_counts(counts: Dict[tuple[str, str, date], int]) -> bool:
+    """Upsert aggregated request counts in one prepared statement.
 
-    if _db_conn is None or not _metrics_table_ready:
-        initialize_metrics_db()
-    if _db_conn is None or not _metrics_table_ready:
-        return
+    Returns False when the write failed and the counts should be retried;
+    disabled or unavailable tracking drops them and returns True.
+    """
+    if not counts or not TRACK_METRICS_DB or not DATABASE_URL:
+        return True
+    pool = await initialize_metrics_db()
+    if pool is None:
+        return True
+    if not _metrics_table_ready:
+        return False
+    psycopg = importlib.import_module("psycopg")
+    keys = list(counts)
     try:
-        with _db_conn.cursor() as cur:  # type: ignore[union-attr]
-            cur.execute(
-                """
-                insert into public.request_counts (tool, status, day, count)
-                values (%s, %s, current_date, 1)
-                on conflict (tool, status, day)
-                do update set count = public.request_counts.count + 1;
-                """,
-                (tool, status),
+        async with pool.connection() as conn:
+            await conn.execute(
+                UPSERT_REQUEST_COUNTS_SQL,
+                (
+                    [key[0] for key in keys],
+                    [key[1] for key in keys],
+                    [key[2] for key in keys],
+                    [counts[key] for key in keys],
+                ),
+                prepare=METRICS_DB_PREPARE,
             )
-    except psycopg.Error as exc:  # type: ignore[attr-defined]
-        logger.error("DB metrics increment failed", error=str(exc))
+        return True
+    except psycopg.Error as exc:
+        logger.error("DB metrics flush failed", error=str(exc))
+        return False
+    finally:
+        update_metrics_pool_gauges()
 
 
-async def async_db_increment(tool: str, status: str) -> None:
-    await asyncio.to_thread(db_increment, tool, status)
+METRICS_BUFFERED = Gauge(
+    "metrics_db_buffered_increments", "Request count increments awaiting DB flush"
+)
+METRICS_FLUSH_SECONDS = Histogram(
+    "metrics_db_flush_seconds", "Time spent flushing buffered request counts"
+)
 
 
-# OpenAI Integration Tools
+class RequestCountBuffer:
+    """Write-behind aggregation of request_counts increments.
+
+    Increments are coalesced per (tool, status, day) in memory and written with
+    a single batched upsert every ``interval`` seconds, as soon as ``max_pending``
+    increments are buffered, and on shutdown. Failed flushes are merged back and
+    retried on the next one.
+    """
+
+    def __init__(self, interval: float, max_pending: int) -> None:
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pending = 0
+        self._counts: Dict[tuple[str, str, date], int] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional["asyncio.Task[None]"] = None
+        self._flushes: Set["asyncio.Task[None]"] = set()
+
+    def add(self, tool: str, status: str) -> None:
+        key = (tool, status, date.today())
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.pending += 1
+        METRICS_BUFFERED.set(self.pending)
+        loop = asyncio.get_running_loop()
+        if (
+            self._timer is None
+            or self._timer.done()
+            or self._timer.get_loop() is not loop
+        ):
+            self._timer = loop.create_task(self._run_timer())
+        if self.pending >= self.max_pending and not self._flushes:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _run_timer(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._counts:
+                return
+            counts, self._counts = self._counts, {}
+            pending, self.pending = self.pending, 0
+            started = time.perf_counter()
+            try:
+                flushed = await db_flush_counts(counts)
+            finally:
+                METRICS_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            if not flushed:
+                for key, count in counts.items():
+                    self._counts[key] = self._counts.get(key, 0) + count
+                self.pending += pending
+            METRICS_BUFFERED.set(self.pending)
+
+    async def aclose(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+
+request_count_buffer = RequestCountBuffer(
+    METRICS_FLUSH_INTERVAL, METRICS_FLUSH_MAX_PENDING
+)
+
+
+@on_shutdown
+async def flush_request_counts() -> None:
+    await request_count_buffer.aclose()
+
+
+def record_request(tool: str, status: str) -> None:
+    """Record a handled request in Prometheus, the tallies and the DB."""
+    REQUEST_COUNTER.labels(tool=tool, status=status).inc()
+    increment_tally(tool, status)
+    if TRACK_METRICS_DB and DATABASE_URL:
+        request_count_buffer.add(tool, status)
+
+
+# Persistent plan review repository
+class ReviewRepository(abc.ABC):
+    """Append-only history of plan reviews, scoped by API key fingerprint.
+
+    Every review is a new row. Composite indexes on ``(owner, plan_id,
+    reviewed_at, id)`` and ``(owner, reviewed_at, id)`` keep latest-by-plan
+    lookups and keyset-paginated listings at index-seek cost however long the
+    history grows. Methods are blocking; the ``a*`` wrappers run them in a
+    worker thread so the event loop never waits on disk or network I/O.
+    """
+
+    placeholder = "?"
+    schema: List[str] = []
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._conn: Any = None
+
+    @abc.abstractmethod
+    def _connect(self) -> Any:
+        """Open the connection (or pool) the repository's queries run on."""
+
+    def _timestamp(self, value: datetime) -> Any:
+        return value
+
+    def _execute(self, sql: str, params: tuple[Any, ...] = ()) -> List[Any]:
+        sql = sql.replace("?", self.placeholder)
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+                for statement in self.schema:
+                    self._conn.execute(statement)
+            cur = self._conn.execute(sql, params)
+            rows = cur.fetchall() if cur.description else []
+            self._conn.commit()
+            return rows
+
+    def save(self, owner: str, review: PlanReview) -> None:
+        reviewed_at = cast(datetime, getattr(review, "reviewed_at"))
+        self._execute(
+            "insert into plan_reviews (owner, plan_id, reviewed_at, data)"
+            " values (?, ?, ?, ?)",
+            (
+                owner,
+                review.plan_id,
+                self._timestamp(reviewed_at),
+                review.model_dump_json(),
+            ),
+        )
+
+    def get(self, owner: str, plan_id: str) -> Optional[PlanReview]:
+        rows = self._execute(
+            "select data from plan_reviews where owner = ? and plan_id = ?"
+            " order by reviewed_at desc, id desc limit 1",
+            (owner, plan_id),
+        )
+        return PlanReview.model_validate_json(rows[0][0]) if rows else None
+
+    def list(
+        self,
+        owner: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        plan_id: Optional[str] = None,
+    ) -> tuple[List[PlanReview], Optional[str]]:
+        """Newest first; returns a page and the cursor for the next one."""
+        clauses = ["owner = ?"]
+        params: List[Any] = [owner]
+        if plan_id is not None:
+            clauses.append("plan_id = ?")
+            params.append(plan_id)
+        if cursor:
+            after_at, after_id = decode_review_cursor(cursor)
+            clauses.append("(reviewed_at < ? or (reviewed_at = ? and id < ?))")
+            params.extend(
+                [self._timestamp(after_at), self._timestamp(after_at), after_id]
+            )
+        rows = self._execute(
+            "select id, reviewed_at, data from plan_reviews where "
+            + " and ".join(clauses)
+            + " order by reviewed_at desc, id desc limit ?",
+            (*params, limit + 1),
+        )
+        reviews = [PlanReview.model_validate_json(row[2]) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last_id, last_at = rows[limit - 1][0], rows[limit - 1][1]
+            if isinstance(last_at, str):
+                last_at = datetime.fromisoformat(last_at)
+            next_cursor = encode_review_cursor(last_at, last_id)
+        return reviews, next_cursor
+
+    async def asave(self, owner: str, review: PlanReview) -> None:
+        await asyncio.to_thread(self.save, owner, review)
+
+    async def aget(self, owner: str, plan_id: str) -> Optional[PlanReview]:
+        return await asyncio.to_thread(self.get, owner, plan_id)
+
+    async def alist(
+        self,
+        owner: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        plan_id: Optional[str] = None,
+    ) -> tuple[List[PlanReview], Optional[str]]:
+        return await asyncio.to_thread(self.list, owner, limit, cursor, plan_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SQLiteReviewRepository(ReviewRepository):
+    """Review history in a local SQLite file (WAL mode)."""
+
+    schema = [
+        "pragma journal_mode=wal",
+        """
+        create table if not exists plan_reviews (
+            id integer primary key autoincrement,
+            owner text not null,
+            plan_id text not null,
+            reviewed_at text not null,
+            data text not null
+        )
+        """,
+        "create index if not exists plan_reviews_owner_plan_idx"
+        " on plan_reviews (owner, plan_id, reviewed_at, id)",
+        "create index if not exists plan_reviews_owner_reviewed_idx"
+        " on plan_reviews (owner, reviewed_at, id)",
+    ]
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+
+    def _connect(self) -> Any:
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _timestamp(self, value: datetime) -> Any:
+        # Fixed-width text so lexical order matches chronological order
+        return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class PostgresReviewRepository(ReviewRepository):
+    """Review history in Postgres at ``DATABASE_URL`` (requires psycopg_pool).
+
+    Queries borrow connections from a ``psycopg_pool.ConnectionPool``, which
+    checks them on checkout and replaces dropped ones, so a lost connection
+    costs one failed query rather than persistence for the process lifetime.
+    """
+
+    placeholder = "%s"
+    schema = [
+        """
+        create table if not exists public.plan_reviews (
+            id bigserial primary key,
+            owner text not null,
+            plan_id text not null,
+            reviewed_at timestamp not null,
+            data text not null
+        )
+        """,
+        "create index if not exists plan_reviews_owner_plan_idx"
+        " on public.plan_reviews (owner, plan_id, reviewed_at, id)",
+        "create index if not exists plan_reviews_owner_reviewed_idx"
+        " on public.plan_reviews (owner, reviewed_at, id)",
+    ]
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.url = url
+
+    def _connect(self) -> Any:
+        psycopg_pool = importlib.import_module("psycopg_pool")
+        pool = psycopg_pool.ConnectionPool(
+            self.url,
+            min_size=1,
+            max_size=PLAN_REVIEW_DB_POOL_MAX_SIZE,
+            timeout=METRICS_DB_TIMEOUT,
+            reconnect_timeout=METRICS_DB_RECONNECT_TIMEOUT,
+            check=psycopg_pool.ConnectionPool.check_connection,
+            kwargs={"autocommit": True},
+            open=False,
+        )
+        try:
+            pool.open(wait=True, timeout=METRICS_DB_TIMEOUT)
+            with pool.connection() as conn:
+                for statement in self.schema:
+                    conn.execute(statement)
+        except Exception:
+            pool.close()
+            raise
+        return pool
+
+    def _execute(self, sql: str, params: tuple[Any, ...] = ()) -> List[Any]:
+        sql = sql.replace("?", self.placeholder)
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            pool = self._conn
+        with pool.connection() as conn:
+            cur = conn.execute(sql, params)
+            return cur.fetchall() if cur.description else []
+
+
+def encode_review_cursor(reviewed_at: datetime, row_id: int) -> str:
+    raw = json.dumps([reviewed_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_review_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        reviewed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(reviewed_at), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def create_review_repository() -> Optional[ReviewRepository]:
+    """Build the configured repository, or None when persistence is off."""
+    if PLAN_REVIEW_REPOSITORY == "sqlite":
+        return SQLiteReviewRepository(PLAN_REVIEW_SQLITE_PATH)
+    if PLAN_REVIEW_REPOSITORY == "postgres":
+        if not DATABASE_URL:
+            logger.error(
+                "Postgres review repository requires DATABASE_URL/SUPABASE_DB_URL"
+            )
+            return None
+        return PostgresReviewRepository(DATABASE_URL)
+    if PLAN_REVIEW_REPOSITORY != "none":
+        logger.error("Unknown PLAN_REVIEW_REPOSITORY", value=PLAN_REVIEW_REPOSITORY)
+    return None
+
+
+review_repository = create_review_repository()
+
+
+async def persist_plan_review(owner: str, review: PlanReview) -> None:
+    """Write a review to the repository; failures are logged, not raised."""
+    if review_repository is None:
+        return
+    try:
+        await review_repository.asave(owner, review)
+    except Exception as exc:  # persistence must never fail the review itself
+        logger.error(
+            "Failed to persist plan review", plan_id=review.plan_id, error=str(exc)
+        )
+
+
+async def load_plan_review(owner: str, plan_id: str) -> Optional[PlanReview]:
+    """Latest persisted review for a plan, or None if unavailable."""
+    if review_repository is None:
+        return None
+    try:
+        return await review_repository.aget(owner, plan_id)
+    except Exception as exc:
+        logger.error("Failed to load plan review", plan_id=plan_id, error=str(exc))
+        return None
+
+
+@on_shutdown
+async def close_review_repository() -> None:
+    if review_repository is not None:
+        await asyncio.to_thread(review_repository.close)
+
+
+# Upstream OpenAI client pool
+def api_key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class OpenAIClientPool:
+    """LRU cache of ``AsyncOpenAI`` clients sharing one bounded connection pool.
+
+    Clients are keyed by a fingerprint of the API key, so each key keeps its own
+    auth configuration while every request reuses the same warm keep-alive
+    connections. Idle keep-alive sockets are expired by httpx; clients unused for
+    ``idle_ttl`` seconds are dropped on the next access.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = OPENAI_CLIENT_CACHE_SIZE,
+        idle_ttl: float = OPENAI_CLIENT_IDLE_TTL,
+        max_connections: int = OPENAI_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = OPENAI_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = OPENAI_POOL_KEEPALIVE_EXPIRY,
+    ) -> None:
+        self.max_clients = max(1, max_clients)
+        self.idle_ttl = idle_ttl
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: "OrderedDict[str, tuple[openai.AsyncOpenAI, float]]" = (
+            OrderedDict()
+        )
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: Set["asyncio.Future[None]"] = set()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _retire_http_client(
+        self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Schedule ``client`` to be closed, preferably on the loop that opened it."""
+        if loop is not None and loop.is_running():
+            future: "asyncio.Future[None]" = asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(_close_http_client(client), loop)
+            )
+        else:
+            future = asyncio.ensure_future(_close_http_client(client))
+        self._closing.add(future)
+        future.add_done_callback(self._closing.discard)
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # httpx connections are bound to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._http_client is None or self._loop is not loop:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._retire_http_client(self._http_client, self._loop)
+            self._http_client = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=httpx.Timeout(600.0, connect=10.0),
+                follow_redirects=True,
+            )
+            self._loop = loop
+        return self._http_client
+
+    def reap_idle(self, now: Optional[float] = None) -> int:
+        """Drop clients that have not been used within ``idle_ttl`` seconds."""
+        now = time.monotonic() if now is None else now
+        expired = [
+            key
+            for key, (_client, last_used) in self._clients.items()
+            if now - last_used > self.idle_ttl
+        ]
+        for key in expired:
+            del self._clients[key]
+        return len(expired)
+
+    def get(self, api_key: str) -> openai.AsyncOpenAI:
+        """Return a pooled client for ``api_key``, creating one if needed."""
+        http_client = self._get_http_client()
+        now = time.monotonic()
+        self.reap_idle(now)
+        key = api_key_fingerprint(api_key)
+        entry = self._clients.pop(key, None)
+        client = (
+            entry[0]
+            if entry is not None
+            else openai.AsyncOpenAI(
+                # Retries are handled by create_chat_completion
+                api_key=api_key,
+                http_client=http_client,
+                max_retries=0,
+            )
+        )
+        self._clients[key] = (client, now)
+        while len(self._clients) > self.max_clients:
+            # Evicted clients share the pool, so there is nothing to close
+            self._clients.popitem(last=False)
+        return client
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool and any pools retired earlier."""
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._loop = None
+        loop = asyncio.get_running_loop()
+        pending = [f for f in self._closing if f.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _close_http_client(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as exc:
+        # The owning loop may already be gone; the sockets are then released
+        # when their transports are collected.
+        logger.debug("Failed to close retired HTTP client", error=str(exc))
+
+
+openai_clients = OpenAIClientPool()
+
+
+@on_shutdown
+async def close_openai_clients() -> None:
+    await openai_clients.aclose()
+
+
+async def collect_stream(
+    stream: Any, on_delta: Callable[[str], Awaitable[None]]
+) -> ChatCompletion:
+    """Forward streamed text to ``on_delta`` and aggregate the final completion.
+
+    The stream is closed however the loop ends, so an ``on_delta`` that raises
+    does not leave its pooled connection checked out.
+    """
+    parts: List[str] = []
+    completion_id = ""
+    model = ""
+    created = int(time.time())
+    finish_reason = "stop"
+    usage = None
+    try:
+        async for chunk in stream:
+            completion_id = chunk.id or completion_id
+            model = chunk.model or model
+            created = chunk.created or created
+            if chunk.usage is not None:
+                usage = chunk.usage
+            for choice in chunk.choices:
+                if choice.index != 0:
+                    continue
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    await on_delta(choice.delta.content)
+    finally:
+        await stream.close()
+    return ChatCompletion.model_validate(
+        {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": finish_reason,
+                    "message": {"role": "assistant", "content": "".join(parts)},
+                }
+            ],
+            "usage": usage.model_dump() if usage is not None else None,
+        }
+    )
+
+
+def synthetic_upstream_response(status_code: int) -> httpx.Response:
+    """Stand-in response for upstream errors raised without calling out."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return httpx.Response(status_code, request=request)
+
+
+class ClientRateLimitError(openai.RateLimitError):
+    """Raised by the local rate limiter instead of queueing past its max wait."""
+
+
+class CircuitOpenError(openai.InternalServerError):
+    """Raised without calling upstream while a model's circuit breaker is open."""
+
+
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "upstream_ratelimit_wait_seconds",
+    "Time upstream calls spent queued by the client-side rate limiter",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "upstream_ratelimit_rejections_total",
+    "Upstream calls failed fast because the rate-limit wait exceeded the maximum",
+    ["model"],
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SCALE = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse an ``x-ratelimit-reset-*`` value such as ``"6m0s"`` or ``"20ms"``."""
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_SCALE[unit] for n, unit in parts)
+
+
+class TokenBucket:
+    """Bucket seeded from the provider's limit/remaining/reset headers.
+
+    Until the first headers arrive the bucket is unknown and never delays.
+    Capacity refills linearly so the bucket is full again at the reset time.
+    """
+
+    def __init__(self) -> None:
+        self.limit: Optional[float] = None
+        self.available = 0.0
+        self.rate = 0.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.limit is not None:
+            elapsed = now - self.updated_at
+            self.available = min(self.limit, self.available + elapsed * self.rate)
+        self.updated_at = now
+
+    def seed(self, limit: float, remaining: float, reset: float, now: float) -> None:
+        self.limit = limit
+        self.available = min(limit, remaining)
+        # Full again at the reset time; never slower than one window a minute
+        self.rate = max((limit - remaining) / max(reset, 0.001), limit / 60.0)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        if self.limit is None or self.available >= min(amount, self.limit):
+            return 0.0
+        return (min(amount, self.limit) - self.available) / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        if self.limit is not None:
+            self.available -= amount
+
+
+class RateLimiter:
+    """Client-side request and token buckets for one API key and model.
+
+    Callers queue in FIFO order until both buckets can cover the request, and
+    fail fast when the total wait would exceed ``max_wait``.
+    """
+
+    def __init__(self, model: str, max_wait: float) -> None:
+        self.model = model
+        self.max_wait = max_wait
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._lock.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject(started)
+        try:
+            now = time.monotonic()
+            wait = max(
+                self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now)
+            )
+            if now - started + wait > self.max_wait:
+                self._reject(started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            now = time.monotonic()
+            self.requests.consume(1, now)
+            self.tokens.consume(tokens, now)
+        finally:
+            self._lock.release()
+        RATE_LIMIT_WAIT_SECONDS.observe(time.monotonic() - started)
+
+    def _reject(self, started: float) -> NoReturn:
+        RATE_LIMIT_WAIT_SECONDS.observe(time.monotonic() - started)
+        RATE_LIMIT_REJECTIONS.labels(model=self.model).inc()
+        raise ClientRateLimitError(
+            "Client-side rate limit: queue wait would exceed "
+            f"{self.max_wait:g}s for model {self.model}",
+            response=synthetic_upstream_response(429),
+            body=None,
+        )
+
+    def update_from_headers(self, headers: Any) -> None:
+        now = time.monotonic()
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            try:
+                limit = float(headers[f"x-ratelimit-limit-{kind}"])
+                remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+            bucket.seed(limit, remaining, reset or 0.0, now)
+
+
+class RateLimiterRegistry:
+    """LRU-bounded rate limiters keyed by API key fingerprint and model."""
+
+    def __init__(self, max_keys: int, max_wait: float) -> None:
+        self.max_keys = max_keys
+        self.max_wait = max_wait
+        self._limiters: "OrderedDict[tuple[str, str], RateLimiter]" = OrderedDict()
+
+    def get(self, api_key: str, model: str) -> RateLimiter:
+        key = (api_key_fingerprint(api_key), model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = RateLimiter(model, self.max_wait)
+            while len(self._limiters) > self.max_keys:
+                self._limiters.popitem(last=False)
+        self._limiters.move_to_end(key)
+        return limiter
+
+
+rate_limiters = RateLimiterRegistry(RATE_LIMIT_MAX_KEYS, RATE_LIMIT_MAX_WAIT)
+
+
+def estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    """Prompt estimate plus the completion budget, as the provider counts it."""
+    prompt = sum(
+        estimate_tokens(str(message.get("content") or ""))
+        for message in kwargs.get("messages") or []
+    )
+    return prompt + int(kwargs.get("max_tokens") or 0)
+
+
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "Upstream completion attempts retried after a transient error",
+    ["model", "reason"],
+)
+UPSTREAM_RETRY_OUTCOMES = Counter(
+    "upstream_retry_outcomes_total",
+    "Final outcome of upstream calls that needed at least one retry",
+    ["model", "outcome"],
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "upstream_circuit_breaker_state",
+    "Circuit breaker state per model (0 closed, 1 half-open, 2 open)",
+    ["model"],
+)
+CIRCUIT_BREAKER_REJECTIONS = Counter(
+    "upstream_circuit_breaker_rejections_total",
+    "Upstream calls failed fast by an open circuit breaker",
+    ["model"],
+)
+
+
+def retry_reason(exc: BaseException) -> Optional[str]:
+    """Metric label for a retryable upstream error, or None if not retryable."""
+    if isinstance(exc, (ClientRateLimitError, CircuitOpenError)):
+        return None
+    if isinstance(exc, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(exc, (openai.APIConnectionError, httpx.TransportError)):
+        return "connection"
+    if isinstance(exc, openai.APIStatusError):
+        status = exc.status_code
+        if status == 429:
+            return "rate_limited"
+        if status in (408, 409) or status >= 500:
+            return f"http_{status}"
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested delay from ``retry-after-ms`` or ``retry-after``."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date form; fall back to our own backoff
+    return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[float]) -> float:
+    """Capped exponential backoff with full jitter, at least ``retry_after``."""
+    backoff = min(UPSTREAM_RETRY_MAX_DELAY, UPSTREAM_RETRY_BASE_DELAY * 2**attempt)
+    return max(random.uniform(0, backoff), retry_after or 0.0)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream model.
+
+    After ``failure_threshold`` consecutive upstream failures (connection errors
+    and 5xx) the circuit opens and calls fail fast for ``reset_timeout``
+    seconds. Then a single probe is let through: success closes the circuit,
+    failure re-opens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def _set_state(self, state: int) -> None:
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(model=self.model).set(state)
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self._reject()
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self._reject()
+            self._probing = True
+
+    def _reject(self) -> NoReturn:
+        CIRCUIT_BREAKER_REJECTIONS.labels(model=self.model).inc()
+        raise CircuitOpenError(
+            f"Upstream circuit open for model {self.model}; failing fast",
+            response=synthetic_upstream_response(503),
+            body=None,
+        )
+
+    def release_probe(self) -> None:
+        """End a call that says nothing about upstream health."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+            logger.info("Upstream circuit closed", model=self.model)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    "Upstream circuit opened", model=self.model, failures=self.failures
+                )
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker_for(model: str) -> CircuitBreaker:
+    breaker = circuit_breakers.get(model)
+    if breaker is None:
+        breaker = circuit_breakers[model] = CircuitBreaker(
+            model, CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT
+        )
+    return breaker
+
+
+async def create_chat_completion(
+    api_key: str,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    **kwargs: Any,
+) -> Any:
+    """Run a chat completion on a pooled async client without blocking the loop.
+
+    When ``on_delta`` is given the completion is streamed upstream, each text
+    delta is passed to it as it arrives, and the aggregated completion is
+    returned just like a non-streaming call.
+
+    Transient failures (429, 408/409, 5xx, timeouts and connection errors) are
+    retried with capped, jittered exponential backoff that honours
+    ``Retry-After``; completions have no side effects, so retrying is safe. A
+    streamed call is only retried until its first delta reaches the caller.
+    Each model has a circuit breaker that fails fast while upstream is down.
+    """
+    model = str(kwargs.get("model"))
+    breaker = circuit_breaker_for(model) if CIRCUIT_BREAKER_ENABLED else None
+    delivered = False
+
+    async def forward(text: str) -> None:
+        nonlocal delivered
+        delivered = True
+        await cast(Callable[[str], Awaitable[None]], on_delta)(text)
+
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            response = await attempt_chat_completion(
+                api_key, forward if on_delta is not None else None, kwargs
+            )
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        except Exception as exc:
+            reason = retry_reason(exc)
+            if breaker is not None:
+                # Only connection errors and 5xx trip the breaker; timeouts and
+                # 408/409 are retried but may just be a slow or busy request
+                if reason == "connection" or (
+                    reason is not None
+                    and isinstance(exc, openai.APIStatusError)
+                    and exc.status_code >= 500
+                ):
+                    breaker.record_failure()
+                elif isinstance(exc, openai.APIStatusError) and not isinstance(
+                    exc, ClientRateLimitError
+                ):
+                    # Upstream answered (4xx/429), so it is reachable
+                    breaker.record_success()
+                else:
+                    breaker.release_probe()
+            retry_after = retry_after_seconds(exc)
+            if (
+                reason is None
+                or delivered
+                or attempt >= UPSTREAM_MAX_RETRIES
+                or (retry_after or 0.0) > UPSTREAM_RETRY_MAX_DELAY
+            ):
+                if attempt:
+                    UPSTREAM_RETRY_OUTCOMES.labels(model=model, outcome="failed").inc()
+                raise
+            delay = retry_delay(attempt, retry_after)
+            UPSTREAM_RETRIES.labels(model=model, reason=reason).inc()
+            logger.warning(
+                "Retrying upstream completion",
+                model=model,
+                reason=reason,
+                attempt=attempt + 1,
+                delay=round(delay, 3),
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        if attempt:
+            UPSTREAM_RETRY_OUTCOMES.labels(model=model, outcome="success").inc()
+        return response
+
+
+async def attempt_chat_completion(
+    api_key: str,
+    on_delta: Optional[Callable[[str], Awaitable[None]]],
+    kwargs: Dict[str, Any],
+) -> Any:
+    """One upstream completion attempt, paced by the per-key rate limiter.
+
+    The limiter is re-seeded from every response's rate-limit headers.
+    """
+    client = openai_clients.get(api_key)
+    limiter = None
+    if RATE_LIMIT_ENABLED:
+        limiter = rate_limiters.get(api_key, str(kwargs.get("model")))
+        await limiter.acquire(estimate_request_tokens(kwargs))
+    if on_delta is not None:
+        kwargs = {"stream": True, "stream_options": {"include_usage": True}, **kwargs}
+    try:
+        raw = await client.chat.completions.with_raw_response.create(**kwargs)
+    except openai.APIStatusError as exc:
+        if limiter is not None:
+            limiter.update_from_headers(exc.response.headers)
+        raise
+    if limiter is not None:
+        limiter.update_from_headers(raw.headers)
+    response = raw.parse()
+    if on_delta is None:
+        return response
+    return await collect_stream(response, on_delta)
+
+
+UPSTREAM_PROMPT_TOKENS = Counter(
+    "upstream_prompt_tokens_total",
+    "Prompt tokens sent upstream",
+    ["tool", "model", "key_bucket"],
+)
+UPSTREAM_CACHED_PROMPT_TOKENS = Counter(
+    "upstream_cached_prompt_tokens_total",
+    "Prompt tokens served from the upstream prompt cache",
+    ["tool", "model", "key_bucket"],
+)
+UPSTREAM_COMPLETION_TOKENS = Counter(
+    "upstream_completion_tokens_total",
+    "Completion tokens returned by upstream",
+    ["tool", "model", "key_bucket"],
+)
+UPSTREAM_ESTIMATED_COST = Counter(
+    "upstream_estimated_cost_usd_total",
+    "Estimated upstream spend in USD, from MODEL_PRICING",
+    ["tool", "model", "key_bucket"],
+)
+
+# USD per million tokens; matched against the model name by longest prefix
+DEFAULT_MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6},
+    "gpt-4o": {"input": 2.5, "cached_input": 1.25, "output": 10.0},
+    "gpt-4-turbo": {"input": 10.0, "cached_input": 10.0, "output": 30.0},
+    "gpt-4": {"input": 30.0, "cached_input": 30.0, "output": 60.0},
+    "gpt-3.5-turbo": {"input": 0.5, "cached_input": 0.5, "output": 1.5},
+}
+
+
+def load_model_pricing() -> Dict[str, Dict[str, float]]:
+    if not MODEL_PRICING:
+        return DEFAULT_MODEL_PRICING
+    try:
+        overrides = json.loads(MODEL_PRICING)
+        pricing = dict(DEFAULT_MODEL_PRICING)
+        for prefix, rates in overrides.items():
+            input_rate = float(rates["input"])
+            pricing[str(prefix)] = {
+                "input": input_rate,
+                "cached_input": float(rates.get("cached_input", input_rate)),
+                "output": float(rates["output"]),
+            }
+        return pricing
+    except (ValueError, AttributeError, TypeError, KeyError) as exc:
+        logger.error("Invalid MODEL_PRICING, using defaults", error=str(exc))
+        return DEFAULT_MODEL_PRICING
+
+
+model_pricing = load_model_pricing()
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int
+) -> float:
+    """Estimated USD cost of one completion; 0.0 for models with no price."""
+    prefix = max(
+        (p for p in model_pricing if model.startswith(p)), key=len, default=None
+    )
+    if prefix is None:
+        return 0.0
+    rates = model_pricing[prefix]
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * rates["input"]
+        + cached_tokens * rates["cached_input"]
+        + completion_tokens * rates["output"]
+    ) / 1_000_000
+
+
+def api_key_bucket(fingerprint: str) -> str:
+    """Coarse, bounded-cardinality metric label for an API key fingerprint."""
+    return fingerprint[:USAGE_KEY_BUCKET_CHARS]
+
+
+USAGE_FIELDS = ("requests", "prompt_tokens", "cached_tokens", "completion_tokens")
+
+UsageLabels = tuple[str, str, str]  # tool, model, review_level
+UsageBucket = tuple[float, Dict[UsageLabels, Dict[str, float]]]
+
+
+def empty_usage() -> Dict[str, float]:
+    return {**dict.fromkeys(USAGE_FIELDS, 0), "cost_usd": 0.0}
+
+
+class UsageLedger:
+    """Rolling per-key token usage and estimated cost.
+
+    Each API key fingerprint keeps a deque of ``bucket_seconds`` wide buckets
+    covering the last ``window`` seconds, broken down by tool, model and review
+    level. Keys are evicted least recently used past ``max_keys``.
+    """
+
+    def __init__(self, window: float, bucket_seconds: float, max_keys: int) -> None:
+        self.window = window
+        self.bucket_seconds = max(bucket_seconds, 1.0)
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, Deque[UsageBucket]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _trim(self, buckets: Deque[UsageBucket], now: float) -> None:
+        while buckets and buckets[0][0] <= now - self.window:
+            buckets.popleft()
+
+    def record(
+        self,
+        fingerprint: str,
+        tool: str,
+        model: str,
+        review_level: str,
+        prompt_tokens: int,
+        cached_tokens: int,
+        completion_tokens: int,
+        cost: float,
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.time() if now is None else now
+        start = now - now % self.bucket_seconds
+        buckets = self._keys.get(fingerprint)
+        if buckets is None:
+            buckets = deque()
+            self._keys[fingerprint] = buckets
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        self._keys.move_to_end(fingerprint)
+        self._trim(buckets, now)
+        if not buckets or buckets[-1][0] != start:
+            buckets.append((start, {}))
+        totals = buckets[-1][1].setdefault((tool, model, review_level), empty_usage())
+        totals["requests"] += 1
+        totals["prompt_tokens"] += prompt_tokens
+        totals["cached_tokens"] += cached_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["cost_usd"] += cost
+
+    def usage(self, fingerprint: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Totals and per tool/model/review level breakdown for one key."""
+        now = time.time() if now is None else now
+        buckets: Deque[UsageBucket] = self._keys.get(fingerprint, deque())
+        self._trim(buckets, now)
+        totals = empty_usage()
+        breakdown: Dict[UsageLabels, Dict[str, float]] = {}
+        for _start, entries in buckets:
+            for labels, counts in entries.items():
+                row = breakdown.setdefault(labels, empty_usage())
+                for field, value in counts.items():
+                    row[field] += value
+                    totals[field] += value
+        rows: List[Dict[str, Any]] = [
+            {
+                "tool": tool,
+                "model": model,
+                "review_level": review_level,
+                **counts,
+                "cost_usd": round(counts["cost_usd"], 6),
+            }
+            for (tool, model, review_level), counts in breakdown.items()
+        ]
+        rows.sort(key=lambda row: row["cost_usd"], reverse=True)
+        return {
+            "key": fingerprint,
+            "window_s": self.window,
+            **totals,
+            "cost_usd": round(totals["cost_usd"], 6),
+            "breakdown": rows,
+        }
+
+    def top(self, limit: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Per-key usage for the ``limit`` keys with the highest estimated cost."""
+        usages = [self.usage(fingerprint, now) for fingerprint in list(self._keys)]
+        usages = [usage for usage in usages if usage["requests"]]
+        usages.sort(key=lambda usage: usage["cost_usd"], reverse=True)
+        return usages[:limit]
+
+
+usage_ledger = UsageLedger(USAGE_WINDOW, USAGE_BUCKET_SECONDS, USAGE_MAX_KEYS)
+
+
+def record_token_usage(
+    tool: str, model: str, api_key: str, review_level: str, response: Any
+) -> None:
+    """Count tokens, prompt cache hits and estimated cost for one completion."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    cost = estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens)
+    fingerprint = api_key_fingerprint(api_key)
+    labels = {"tool": tool, "model": model, "key_bucket": api_key_bucket(fingerprint)}
+    UPSTREAM_PROMPT_TOKENS.labels(**labels).inc(prompt_tokens)
+    UPSTREAM_CACHED_PROMPT_TOKENS.labels(**labels).inc(cached_tokens)
+    UPSTREAM_COMPLETION_TOKENS.labels(**labels).inc(completion_tokens)
+    UPSTREAM_ESTIMATED_COST.labels(**labels).inc(cost)
+    usage_ledger.record(
+        fingerprint,
+        tool,
+        model,
+        review_level,
+        prompt_tokens,
+        cached_tokens,
+        completion_tokens,
+        cost,
+    )
+    logger.debug(
+        "Upstream token usage",
+        tool=tool,
+        model=model,
+        prompt_tokens=prompt_tokens,
+        cached_tokens=cached_tokens,
+        completion_tokens=completion_tokens,
+        estimated_cost_usd=round(cost, 6),
+    )
+
+
+DEFAULT_MODEL = "gpt-4"
+
+DEFAULT_MODEL_ROUTES: Dict[str, List[str]] = {
+    "phone_a_friend": ["gpt-4o-mini", "gpt-4o"],
+    ReviewLevel.QUICK.value: ["gpt-4o-mini", "gpt-4o"],
+    ReviewLevel.STANDARD.value: ["gpt-4o", "gpt-4o-mini"],
+    ReviewLevel.COMPREHENSIVE.value: ["gpt-4o", "gpt-4"],
+    ReviewLevel.DEEP_DIVE.value: ["gpt-4", "gpt-4o"],
+    ReviewLevel.EXPERT.value: ["gpt-4", "gpt-4o"],
+}
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_latency_seconds",
+    "Latency of completed upstream completions",
+    ["tool", "model", "review_level"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_ROUTE_DECISIONS = Counter(
+    "model_route_decisions_total",
+    "Models chosen by the router, per route and reason",
+    ["route", "model", "reason"],
+)
+
+
+class ModelStats:
+    """EWMA latency (seconds) and error rate for one upstream model."""
+
+    def __init__(self) -> None:
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.updated_at = 0.0
+
+
+class ModelRouter:
+    """Pick a model per route from EWMA latency and error rate.
+
+    The first candidate whose smoothed latency is within the SLO and whose
+    error rate is acceptable wins. Models without recent observations count as
+    healthy so a degraded model is probed again once its stats go stale. When
+    every candidate is unhealthy the one with the lowest latency is used.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, List[str]],
+        latency_slo: float,
+        max_error_rate: float,
+        alpha: float,
+        stats_ttl: float,
+    ) -> None:
+        self.routes = routes
+        self.latency_slo = latency_slo
+        self.max_error_rate = max_error_rate
+        self.alpha = alpha
+        self.stats_ttl = stats_ttl
+        self._stats: Dict[str, ModelStats] = {}
+
+    def observe(self, model: str, latency: Optional[float], ok: bool) -> None:
+        stats = self._stats.setdefault(model, ModelStats())
+        now = time.monotonic()
+        if now - stats.updated_at > self.stats_ttl:
+            stats.latency, stats.error_rate = None, 0.0
+        if latency is not None:
+            stats.latency = (
+                latency
+                if stats.latency is None
+                else self.alpha * latency + (1 - self.alpha) * stats.latency
+            )
+        stats.error_rate = (
+            self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * stats.error_rate
+        )
+        stats.updated_at = now
+
+    def stats(self, model: str) -> Dict[str, Optional[float]]:
+        stats = self._stats.get(model)
+        if stats is None or time.monotonic() - stats.updated_at > self.stats_ttl:
+            return {"ewma_latency_s": None, "error_rate": None}
+        return {
+            "ewma_latency_s": stats.latency,
+            "error_rate": round(stats.error_rate, 4),
+        }
+
+    def _healthy(self, model: str) -> bool:
+        current = self.stats(model)
+        latency, error_rate = current["ewma_latency_s"], current["error_rate"]
+        return (latency is None or latency <= self.latency_slo) and (
+            error_rate is None or error_rate <= self.max_error_rate
+        )
+
+    def choose(self, route: str) -> tuple[str, str]:
+        """Return ``(model, reason)`` for a route."""
+        candidates = self.routes.get(route) if MODEL_ROUTER_ENABLED else None
+        if not candidates:
+            return DEFAULT_MODEL, "default"
+        for index, model in enumerate(candidates):
+            if self._healthy(model):
+                reason = "preferred" if index == 0 else "fallback"
+                break
+        else:
+            model = min(
+                candidates,
+                key=lambda m: self.stats(m)["ewma_latency_s"] or float("inf"),
+            )
+            reason = "degraded"
+        MODEL_ROUTE_DECISIONS.labels(route=route, model=model, reason=reason).inc()
+        logger.debug("Model routed", route=route, model=model, reason=reason)
+        return model, reason
+
+
+def load_model_routes() -> Dict[str, List[str]]:
+    if not MODEL_ROUTES:
+        return DEFAULT_MODEL_ROUTES
+    try:
+        routes = json.loads(MODEL_ROUTES)
+        return {
+            str(route): [str(m) for m in models] for route, models in routes.items()
+        }
+    except (ValueError, AttributeError, TypeError) as exc:
+        logger.error("Invalid MODEL_ROUTES, using defaults", error=str(exc))
+        return DEFAULT_MODEL_ROUTES
+
+
+model_router = ModelRouter(
+    load_model_routes(),
+    MODEL_ROUTER_LATENCY_SLO,
+    MODEL_ROUTER_MAX_ERROR_RATE,
+    MODEL_ROUTER_EWMA_ALPHA,
+    MODEL_ROUTER_STATS_TTL,
+)
+
+
+def routing_metadata(model: str, reason: str, latency: float) -> Dict[str, Any]:
+    """Routing decision and latency, for tool result metadata."""
+    return {
+        "model": model,
+        "reason": reason,
+        "latency_s": round(latency, 3),
+        **model_router.stats(model),
+    }
+
+
+def resolve_model(
+    route: str, model: Optional[str], header_config: Dict[str, Any]
+) -> tuple[str, str]:
+    """Caller's model (parameter, then header) or the router's choice."""
+    if model:
+        return model, "parameter"
+    if header_config.get("model"):
+        return str(header_config["model"]), "header"
+    return model_router.choose(route)
+
+
+async def call_upstream(
+    tool: str,
+    api_key: str,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    review_level: str = "none",
+    **kwargs: Any,
+) -> Any:
+    """Instrumented upstream completion; runs once per actual upstream request."""
+    model = str(kwargs.get("model"))
+    labels = {"tool": tool, "model": model, "review_level": review_level}
+    started = time.monotonic()
+    try:
+        response = await create_chat_completion(api_key, on_delta=on_delta, **kwargs)
+    except Exception as exc:
+        # Only transport errors and upstream faults say the model is unhealthy;
+        # caller errors, rate limits and open circuits do not.
+        reason = retry_reason(exc)
+        if reason is not None and reason != "rate_limited":
+            model_router.observe(model, None, ok=False)
+        raise
+    latency = time.monotonic() - started
+    UPSTREAM_LATENCY.labels(**labels).observe(latency)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        UPSTREAM_REQUEST_PROMPT_TOKENS.labels(**labels).observe(
+            getattr(usage, "prompt_tokens", 0) or 0
+        )
+        UPSTREAM_REQUEST_COMPLETION_TOKENS.labels(**labels).observe(
+            getattr(usage, "completion_tokens", 0) or 0
+        )
+    model_router.observe(model, latency, ok=True)
+    record_token_usage(tool, model, api_key, review_level, response)
+    return response
+
+
+class MCPProgressStreamer:
+    """Forward streamed text to the MCP client as progress or log notifications.
+
+    Deltas are coalesced so at most one notification goes out per ``interval``
+    seconds. Clients that sent a progress token receive progress notifications
+    (progress counts characters generated so far); others receive log messages.
+    """
+
+    def __init__(
+        self, ctx: Context, tool: str, interval: float = STREAM_NOTIFY_INTERVAL
+    ) -> None:
+        self.ctx = ctx
+        self.tool = tool
+        self.interval = interval
+        self.chars_sent = 0
+        self._buffer: List[str] = []
+        self._last_sent = 0.0
+        meta = ctx.request_context.meta
+        self._has_progress_token = bool(meta and meta.progressToken is not None)
+
+    async def __call__(self, delta: str) -> None:
+        self._buffer.append(delta)
+        if time.monotonic() - self._last_sent >= self.interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self.chars_sent += len(text)
+        self._last_sent = time.monotonic()
+        try:
+            if self._has_progress_token:
+                await self.ctx.report_progress(self.chars_sent, None, text)
+            else:
+                await self.ctx.log(text, level="info", logger_name=self.tool)
+        except Exception as exc:  # a lost notification must not fail the call
+            logger.debug("Stream notification failed", tool=self.tool, error=str(exc))
+
+
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Requests served by joining an identical in-flight upstream completion",
+    ["tool"],
+)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce identical concurrent upstream calls onto one shared task.
+
+    The first caller for a key starts the call as its own task; later callers
+    with the same key await that task instead of issuing another request. The
+    shared task only gets cancelled once every waiting caller has gone, so the
+    leader disconnecting does not fail the followers.
+
+    Followers only receive the final result, so callers streaming deltas to
+    their client pass ``join=False``: they never wait on another caller's call,
+    though later non-streaming callers may still join theirs.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[tuple[str, str], _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        tool: str,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        join: bool = True,
+    ) -> Any:
+        if not SINGLE_FLIGHT_ENABLED:
+            return await call()
+        flight_key = (tool, key)
+        flight = self._flights.get(flight_key)
+        if flight is not None and not join:
+            return await call()
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(flight_key, task))
+        else:
+            COALESCED_REQUESTS.labels(tool=tool).inc()
+            logger.debug("Joined in-flight upstream request", tool=tool)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(flight_key, flight.task)
+
+    def _forget(self, flight_key: tuple[str, str], task: "asyncio.Task[Any]") -> None:
+        flight = self._flights.get(flight_key)
+        if flight is not None and flight.task is task:
+            del self._flights[flight_key]
+
+
+upstream_flights = SingleFlight()
+
+
+def mcp_progress_streamer(tool: str) -> Optional[MCPProgressStreamer]:
+    """Streamer for the current MCP request, or None outside of one."""
+    try:
+        ctx = get_context()
+        return MCPProgressStreamer(ctx, tool)
+    except (RuntimeError, ValueError):
+        return None
+
+
+def resolve_timeout(
+    default: float, timeout_s: Optional[float], header_config: Dict[str, Any]
+) -> float:
+    """Call budget: ``timeout_s`` or the default, capped by X-Request-Deadline."""
+    budget = timeout_s if timeout_s and timeout_s > 0 else default
+    if "deadline" in header_config:
+        budget = min(budget, header_config["deadline"])
+    return budget
+
+
+async def run_with_deadline(
+    tool: str,
+    budget: float,
+    call: Awaitable[Any],
+    metrics: Optional[ToolCallMetrics] = None,
+) -> Any:
+    """Await ``call`` within ``budget`` seconds, cancelling it on expiry.
+
+    Cancellation propagates into the upstream HTTP request, which is closed
+    rather than left running. Expiry is recorded as ``status="timeout"`` and a
+    client-side cancellation as ``status="cancelled"``.
+    """
+    try:
+        async with asyncio.timeout(budget):
+            return await call
+    except TimeoutError as exc:
+        record_request(tool, "timeout")
+        logger.warning("Tool call timed out", tool=tool, timeout_s=budget)
+        raise TimeoutError(f"{tool} exceeded its {budget:g}s time budget") from exc
+    except asyncio.CancelledError:
+        record_request(tool, "cancelled")
+        raise
+    finally:
+        if metrics is not None:
+            metrics.finish()
+
+
+async def ask_friend(
+    tool: str,
+    header_config: Dict[str, Any],
+    question: str,
+    context: Optional[str] = None,
+    model: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    bypass_cache: bool = False,
+    streamer: Optional["MCPProgressStreamer"] = None,
+    metrics: Optional[ToolCallMetrics] = None,
+    routed: Optional[tuple[str, str]] = None,
+) -> str:
+    """Answer one question upstream, shared by phone_a_friend and its batch form.
+
+    ``routed`` is a ``(model, source)`` pair the caller already resolved.
+    """
+    # Use parameters if provided, otherwise fall back to headers
+    final_api_key = header_config.get("api_key")
+    final_model, model_source = routed or resolve_model(
+        "phone_a_friend", model, header_config
+    )
+    final_max_tokens = max_tokens or header_config.get("max_tokens", 1000)
+    if metrics is not None:
+        metrics.request(final_model, text_bytes(question, context))
+
+    # Validate API key is available
+    if not final_api_key:
+        raise ValueError("API key must be provided in X-OpenAI-API-Key header")
+
+    # Build prompt with optional context
+    if context:
+        prompt = (
+            f"Context: {context}\n\n"
+            f"Question: {question}\n\n"
+            f"Please provide a comprehensive answer."
+        )
+    else:
+        prompt = f"Question: {question}\n\nPlease provide a comprehensive answer."
+
+    messages = cast(
+        List[ChatCompletionMessageParam], [{"role": "user", "content": prompt}]
+    )
+    temperature = 0.3
+
+    # Serve exact repeats from the response cache (scoped per API key)
+    use_cache = (
+        RESPONSE_CACHE_ENABLED
+        and not bypass_cache
+        and not header_config.get("cache_bypass")
+    )
+    response_key = cache_key(
+        api_key_fingerprint(final_api_key),
+        final_model,
+        prompt,
+        final_max_tokens,
+        temperature,
+    )
+    if use_cache:
+        cached_answer = phone_a_friend_cache.get(response_key)
+        if cached_answer is not None:
+            logger.debug("Friend answer served from cache", model=final_model)
+            record_request(tool, "success")
+            return cast(str, cached_answer)
+
+    try:
+        # Log OpenAI request
+        log_openai_request(
+            final_model,
+            [{"role": "user", "content": prompt}],
+            final_max_tokens,
+            final_api_key,
+        )
+
+        # Single and batch calls for the same question share one completion
+        response = await upstream_flights.run(
+            "phone_a_friend",
+            response_key,
+            lambda: call_upstream(
+                tool,
+                final_api_key,
+                on_delta=streamer,
+                model=final_model,
+                messages=messages,  # type: ignore[arg-type]
+                max_tokens=final_max_tokens,
+                temperature=temperature,
+            ),
+            join=streamer is None,
+        )
+        if streamer is not None:
+            await streamer.flush()
+
+        # Log OpenAI response
+        log_openai_response(response)
+
+        answer = response.choices[0].message.content
+        if not answer:
+            raise ValueError("Empty response from OpenAI")
+
+        logger.info(
+            "Friend called successfully",
+            question=question[:50],
+            model=final_model,
+            model_source=model_source,
+        )
+        result: str = answer.strip()
+        if use_cache:
+            phone_a_friend_cache.set(response_key, result)
+        # Avoid logging content; record only length
+        logger.debug("Friend answer produced", question_length=len(question))
+        # Metrics: success
+        record_request(tool, "success")
+        return result
+
+    except Exception as e:
+        # Metrics: error
+        record_request(tool, "error")
+        logger.error(
+            "Failed to phone a friend",
+            tool=tool,
+            error=str(e),
+            error_type=type(e).__name__,
+            api_key_provided=bool(final_api_key),
+            api_key_length=len(final_api_key) if final_api_key else 0,
+        )
+        raise
+
+
+# OpenAI Integration Tools
 @mcp.tool()
 async def phone_a_friend(
     question: Annotated[str, "The question to ask OpenAI"],
@@ -364,95 +3243,650 @@ async def phone_a_friend(
     max_tokens: Annotated[
         Optional[int], "Maximum tokens for response (optional if set in headers)"
     ] = None,
+    bypass_cache: Annotated[
+        bool, "Skip the response cache and always ask upstream"
+    ] = False,
+    stream: Annotated[
+        bool, "Stream partial output as MCP progress/log notifications"
+    ] = False,
+    timeout_s: Annotated[
+        Optional[float],
+        "Time budget in seconds (default PHONE_A_FRIEND_TIMEOUT)",
+    ] = None,
 ) -> str:
     """Phone a friend (OpenAI) to get help with a question."""
     # Get configuration from headers
     header_config = get_config_from_headers()
-
-    # Use parameters if provided, otherwise fall back to headers
-    final_api_key = header_config.get("api_key")
-    final_model = model or header_config.get("model", "gpt-4")
-    final_max_tokens = max_tokens or header_config.get("max_tokens", 1000)
-
-    # Validate API key is available
-    if not final_api_key:
-        raise ValueError("API key must be provided in X-OpenAI-API-Key header")
+    final_model, model_source = resolve_model("phone_a_friend", model, header_config)
 
     # Log incoming MCP call
-    log_mcp_call(
-        "phone_a_friend",
-        question=question[:100] if len(question) > 100 else question,
-        context=context[:100] if context and len(context) > 100 else context,
-        model=final_model,
-        model_source="parameter" if model else "header",
-        max_tokens=final_max_tokens,
-        max_tokens_source="parameter" if max_tokens else "header",
+    if logger.isEnabledFor(logging.DEBUG):
+        log_mcp_call(
+            "phone_a_friend",
+            question=question[:100] if len(question) > 100 else question,
+            context=context[:100] if context and len(context) > 100 else context,
+            model=final_model,
+            model_source=model_source,
+            max_tokens=max_tokens or header_config.get("max_tokens", 1000),
+            max_tokens_source="parameter" if max_tokens else "header",
+            bypass_cache=bypass_cache,
+            stream=stream or header_config.get("stream", False),
+            timeout_s=timeout_s,
+        )
+
+    streamer = (
+        mcp_progress_streamer("phone_a_friend")
+        if stream or header_config.get("stream")
+        else None
+    )
+    budget = resolve_timeout(PHONE_A_FRIEND_TIMEOUT, timeout_s, header_config)
+    metrics = ToolCallMetrics("phone_a_friend")
+    return cast(
+        str,
+        await run_with_deadline(
+            "phone_a_friend",
+            budget,
+            ask_friend(
+                "phone_a_friend",
+                header_config,
+                question,
+                context,
+                model=model,
+                max_tokens=max_tokens,
+                bypass_cache=bypass_cache,
+                streamer=streamer,
+                metrics=metrics,
+                routed=(final_model, model_source),
+            ),
+            metrics,
+        ),
     )
 
-    # Build prompt with optional context
-    if context:
-        prompt = (
-            f"Context: {context}\n\n"
-            f"Question: {question}\n\n"
-            f"Please provide a comprehensive answer."
+
+class BatchQuestion(BaseModel):
+    """One question in a phone_a_friend_batch call."""
+
+    question: str
+    context: Optional[str] = None
+
+
+@mcp.tool()
+async def phone_a_friend_batch(
+    items: Annotated[
+        List[BatchQuestion],
+        "Independent questions to ask, each with an optional context",
+    ],
+    model: Annotated[
+        Optional[str], "OpenAI model to use (optional if set in headers)"
+    ] = None,
+    max_tokens: Annotated[
+        Optional[int],
+        "Maximum tokens per answer (optional if set in headers)",
+    ] = None,
+    max_concurrency: Annotated[
+        Optional[int],
+        "Maximum questions in flight at once (capped by the server limit)",
+    ] = None,
+    bypass_cache: Annotated[
+        bool, "Skip the response cache and always ask upstream"
+    ] = False,
+    timeout_s: Annotated[
+        Optional[float],
+        "Time budget in seconds for the whole batch (default PHONE_A_FRIEND_TIMEOUT)",
+    ] = None,
+) -> Dict[str, Any]:
+    """
+    Ask many independent questions in one call.
+
+    Questions are sent upstream concurrently, at most ``max_concurrency`` at a
+    time. Results come back in input order; a failing question reports its error
+    in place instead of failing the whole batch. Questions still unanswered
+    when the time budget runs out are cancelled and report a TimeoutError.
+
+    Returns:
+        Dictionary with per-item ``results`` and succeeded/failed counts
+    """
+    # Resolve header configuration once for the whole batch
+    header_config = get_config_from_headers()
+    if not header_config.get("api_key"):
+        raise ValueError("API key must be provided in X-OpenAI-API-Key header")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch is limited to {BATCH_MAX_ITEMS} items")
+
+    concurrency = min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    concurrency = max(1, concurrency)
+    # One routing decision for the whole batch
+    final_model, model_source = resolve_model("phone_a_friend", model, header_config)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        log_mcp_call(
+            "phone_a_friend_batch",
+            item_count=len(items),
+            model=final_model,
+            model_source=model_source,
+            max_tokens=max_tokens or header_config.get("max_tokens", 1000),
+            max_tokens_source="parameter" if max_tokens else "header",
+            max_concurrency=concurrency,
+            bypass_cache=bypass_cache,
+            timeout_s=timeout_s,
         )
-    else:
-        prompt = f"Question: {question}\n\nPlease provide a comprehensive answer."
 
-    messages = cast(
-        List[ChatCompletionMessageParam], [{"role": "user", "content": prompt}]
+    semaphore = asyncio.Semaphore(concurrency)
+    budget = resolve_timeout(PHONE_A_FRIEND_TIMEOUT, timeout_s, header_config)
+    deadline = asyncio.get_running_loop().time() + budget
+
+    async def answer(index: int, item: BatchQuestion) -> Dict[str, Any]:
+        metrics = ToolCallMetrics("phone_a_friend_batch")
+        try:
+            async with asyncio.timeout_at(deadline):
+                async with semaphore:
+                    result = await ask_friend(
+                        "phone_a_friend_batch",
+                        header_config,
+                        item.question,
+                        item.context,
+                        model=model,
+                        max_tokens=max_tokens,
+                        bypass_cache=bypass_cache,
+                        metrics=metrics,
+                        routed=(final_model, model_source),
+                    )
+        except TimeoutError:
+            record_request("phone_a_friend_batch", "timeout")
+            return {
+                "index": index,
+                "error": f"Question exceeded the batch's {budget:g}s time budget",
+                "error_type": "TimeoutError",
+            }
+        except Exception as exc:
+            return {
+                "index": index,
+                "error": str(exc),
+                "error_type": type(exc).__name__,
+            }
+        finally:
+            metrics.finish()
+        return {"index": index, "answer": result}
+
+    results = await asyncio.gather(
+        *(answer(index, item) for index, item in enumerate(items))
     )
+    failed = sum(1 for result in results if "error" in result)
+    logger.info(
+        "Friend batch completed",
+        item_count=len(items),
+        failed=failed,
+        max_concurrency=concurrency,
+    )
+    return {
+        "results": list(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
+# Review prompts. All reviews follow the Master Review Framework with varying
+# depth. Each level is compiled once at import into a dedented, byte-stable
+# system message so upstream prompt caching can reuse the shared prefix; focus
+# areas, context and plan content always follow it in the user message.
+REVIEW_FRAMEWORKS: Dict[ReviewLevel, str] = {
+    ReviewLevel.QUICK: """
+    Provide a quick review of this plan using the following framework:
+
+    STRUCTURE & ORGANIZATION:
+    - Is the plan logically structured and easy to follow?
+
+    COMPLETENESS:
+    - Are key sections present (objectives, scope, timeline)?
+
+    CLARITY:
+    - Any obvious ambiguities or "must-fix" clarity issues?
+
+    ASSUMPTIONS & RISKS:
+    - Any glaring unstated assumptions or obvious risks?
+
+    Keep feedback concise, actionable, and in checklist form if possible.
+    Provide 1-2 key improvement suggestions.
+    """,
+    ReviewLevel.STANDARD: """
+    Provide a standard review of this plan using the following framework:
+
+    STRUCTURE & ORGANIZATION:
+    - Is the plan logically structured and easy to follow?
+
+    COMPLETENESS:
+    - Are all key sections present (objectives, scope, resources, risks, timeline, success criteria)?
+    - Is there appropriate level of detail for each section?
+
+    CLARITY:
+    - Is the language unambiguous, readable, and accessible to stakeholders?
+
+    ASSUMPTIONS & DEPENDENCIES:
+    - Are hidden assumptions, constraints, or external dependencies called out?
+
+    RISKS:
+    - What risks or failure modes are unaddressed?
+
+    FEASIBILITY:
+    - Are timeline and resource estimates realistic?
+
+    Provide specific suggestions and 2-3 clarifying questions the plan should answer.
+    """,
+    ReviewLevel.COMPREHENSIVE: """
+    Provide a comprehensive review of this plan using the following framework:
+
+    STRUCTURE & ORGANIZATION:
+    - Is the plan logically structured and easy to follow?
+    - Does it flow naturally from problem → solution → implementation?
+
+    COMPLETENESS:
+    - Are all key sections present and thoroughly developed (objectives, scope, resources, risks, timeline, success criteria)?
+    - Is the level of detail appropriate for each section?
+
+    CLARITY:
+    - Is the language unambiguous, readable, and accessible to all stakeholders?
+    - Are technical terms and concepts clearly explained?
+
+    ASSUMPTIONS & DEPENDENCIES:
+    - Are hidden assumptions, constraints, or external dependencies explicitly called out?
+    - What implicit assumptions need to be validated?
+
+    RISKS:
+    - What risks, failure modes, or edge cases are unaddressed?
+    - Are mitigation strategies defined for key risks?
+
+    FEASIBILITY:
+    - Are timeline and resource estimates realistic?
+    - Is the plan testable and measurable?
+    - Can success be validated objectively?
+
+    ALTERNATIVES:
+    - Have trade-offs and alternative approaches been considered?
+    - Are design decisions justified?
+
+    VALIDATION:
+    - Does the plan define success criteria, KPIs, or metrics?
+    - How will progress be tracked and measured?
+
+    STAKEHOLDERS:
+    - Are roles, responsibilities, and stakeholder impacts clear?
+
+    LONG-TERM SUSTAINABILITY:
+    - Does the plan account for scalability, maintainability, and adaptability?
+
+    Provide detailed feedback with examples, alternatives, and 3-5 clarifying questions that expose potential blind spots.
+    """,
+    ReviewLevel.DEEP_DIVE: """
+    Provide a deep-dive technical review of this plan using the following framework:
+
+    STRUCTURE & ORGANIZATION:
+    - Evaluate logical flow, section coherence, and information architecture
+    - Assess whether structure supports understanding and execution
+
+    COMPLETENESS:
+    - Section-by-section completeness audit (objectives, scope, resources, risks, timeline, success criteria, rollout plan)
+    - Identify missing technical details, specifications, or requirements
+
+    CLARITY:
+    - Evaluate technical precision and unambiguous language
+    - Assess readability for both technical and non-technical stakeholders
+
+    ASSUMPTIONS & DEPENDENCIES:
+    - Identify ALL stated and unstated assumptions
+    - Map out dependency chains and potential bottlenecks
+    - Validate technical feasibility of each assumption
+
+    RISKS:
+    - Comprehensive risk analysis: technical, operational, security, performance
+    - Failure mode analysis (FMEA-style): what could go wrong and when?
+    - Edge cases, race conditions, and boundary conditions
+    - Mitigation and rollback strategies for each major risk
+
+    FEASIBILITY:
+    - Detailed timeline realism check with critical path analysis
+    - Resource allocation validation (team capacity, skills, budget)
+    - Technical feasibility of proposed solutions
+    - Testing strategy and validation approach
+
+    ALTERNATIVES:
+    - Compare against alternative technical approaches
+    - Evaluate trade-offs (performance vs complexity, cost vs speed, etc.)
+    - Justify architectural and design decisions
+
+    VALIDATION:
+    - Define measurable success criteria and KPIs
+    - Specify testing, monitoring, and observability requirements
+    - Outline validation checkpoints throughout implementation
+
+    STAKEHOLDERS:
+    - Map stakeholder roles, responsibilities, and approval gates
+    - Identify communication touchpoints and escalation paths
+
+    LONG-TERM SUSTAINABILITY:
+    - Scalability analysis: how will this perform at 10x, 100x scale?
+    - Maintainability: code quality, documentation, knowledge transfer
+    - Adaptability: how easily can this evolve with changing requirements?
+    - Operational considerations: deployment, monitoring, incident response
+
+    Provide rigorous, technically detailed feedback with specific examples, actionable improvements, and 4-6 probing questions.
+    """,
+    ReviewLevel.EXPERT: """
+    Provide an expert-level review of this plan using the Master Review Framework with professional rigor:
+
+    STRUCTURE & ORGANIZATION:
+    - Evaluate against industry-standard plan structures (PRDs, RFCs, technical specifications)
+    - Assess information architecture and accessibility for diverse audiences
+
+    COMPLETENESS:
+    - Comprehensive audit of all sections (objectives, scope, resources, risks, timeline, success criteria, rollout, communication plan)
+    - Evaluate against professional planning standards and best practices
+    - Identify gaps that would concern executive stakeholders or auditors
+
+    CLARITY:
+    - Assess precision, unambiguity, and professional communication standards
+    - Evaluate for multi-stakeholder accessibility (technical, business, executive)
+    - Check for regulatory or compliance language requirements
+
+    ASSUMPTIONS & DEPENDENCIES:
+    - Exhaustive mapping of assumptions with validation requirements
+    - Dependency analysis including external systems, teams, and third parties
+    - Constraint analysis (technical, business, legal, compliance)
+    - Market or competitive landscape assumptions
+
+    RISKS:
+    - Enterprise-level risk assessment (technical, operational, business, legal, reputational)
+    - Comprehensive failure mode analysis with probability and impact assessment
+    - Security, privacy, and compliance risks
+    - Business continuity and disaster recovery considerations
+    - Risk mitigation, transfer, acceptance strategies
+
+    FEASIBILITY:
+    - Multi-dimensional feasibility analysis: technical, operational, financial, organizational
+    - Realistic timeline assessment with uncertainty ranges
+    - Resource allocation optimization and capacity planning
+    - Financial modeling and ROI analysis where applicable
+    - Testability, measurability, and validation strategy
+
+    ALTERNATIVES:
+    - Comprehensive alternatives analysis with decision matrices
+    - Trade-off evaluation across multiple dimensions (cost, time, quality, risk)
+    - Competitive analysis and industry benchmarking
+    - Build vs buy vs partner considerations
+
+    VALIDATION:
+    - Define SMART success criteria and KPIs aligned with business objectives
+    - Comprehensive testing strategy (unit, integration, system, acceptance)
+    - Monitoring, observability, and alerting requirements
+    - Metrics dashboard and reporting cadence
+    - Go/no-go decision criteria at each milestone
+
+    STAKEHOLDERS:
+    - Complete stakeholder mapping with RACI matrix
+    - Communication plan with appropriate cadence and channels
+    - Change management and stakeholder buy-in strategy
+    - Executive reporting and governance structure
+
+    LONG-TERM SUSTAINABILITY:
+    - Scalability with specific load projections and capacity planning
+    - Maintainability with documentation, knowledge transfer, and support plans
+    - Adaptability and extensibility for future requirements
+    - Total cost of ownership (TCO) analysis
+    - Technical debt management strategy
+    - Operational excellence: SLAs, SLOs, error budgets
+    - Team sustainability: on-call rotation, burnout prevention
+
+    Provide expert insights with industry context, citing best practices and standards where relevant.
+    Suggest measurable improvements with business impact.
+    Provide 5-7 strategic questions the leadership team should address before execution.
+    """,
+}
+
+REVIEW_RESPONSE_FORMAT = """Please provide your review in the following JSON format:
+{
+    "overall_score": 0.0-1.0,
+    "strengths": ["strength1", "strength2", ...],
+    "weaknesses": ["weakness1", "weakness2", ...],
+    "suggestions": ["suggestion1", "suggestion2", ...],
+    "detailed_feedback": "comprehensive feedback text"
+}"""
+
+REVIEW_SYSTEM_PROMPTS: Dict[ReviewLevel, str] = {
+    level: f"{textwrap.dedent(framework).strip()}\n\n{REVIEW_RESPONSE_FORMAT}"
+    for level, framework in REVIEW_FRAMEWORKS.items()
+}
+
+
+def build_review_messages(
+    review_level: ReviewLevel,
+    plan_section: str,
+    focus_areas: Optional[List[str]] = None,
+    context: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """Static framework as the system message, request specifics after it."""
+    parts: List[str] = []
+    if focus_areas:
+        areas = ", ".join(focus_areas)
+        parts.append(f"Focus the review specifically on these areas: {areas}")
+    if context:
+        parts.append(f"Additional Context:\n{context}")
+    parts.append(plan_section)
+    return [
+        {"role": "system", "content": REVIEW_SYSTEM_PROMPTS[review_level]},
+        {"role": "user", "content": "\n\n".join(parts)},
+    ]
+
+
+REVIEW_MALFORMED = Counter(
+    "review_malformed_total",
+    "Review responses that failed schema validation",
+    ["tool", "stage"],
+)
 
-    try:
-        # Create OpenAI client with API key from headers
-        client = openai.OpenAI(api_key=final_api_key)
 
-        # Log OpenAI request
-        log_openai_request(
-            final_model,
-            [{"role": "user", "content": prompt}],
-            final_max_tokens,
-            final_api_key,
-        )
+async def review_completion(
+    tool: str,
+    api_key: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    review_level: Optional[ReviewLevel] = None,
+) -> str:
+    """Run one review completion, validating it against the schema as it streams.
+
+    Models that support it are constrained with ``REVIEW_JSON_SCHEMA_FORMAT``.
+    The completion is always streamed upstream, so a review that goes wrong is
+    abandoned within a few tokens and retried up to REVIEW_MALFORMED_RETRIES
+    times; like transient errors, an attempt is only retried until its first
+    delta reaches ``on_delta``. ``MalformedReviewError`` is raised once retries
+    run out, and without a retry for a review that only fails once complete,
+    since a retry would pay for a second full generation.
+    """
+    structured = supports_structured_output(model)
+    extra: Dict[str, Any] = (
+        {"response_format": REVIEW_JSON_SCHEMA_FORMAT} if structured else {}
+    )
+    attempt = 0
+    while True:
+        validator = ReviewStreamValidator(strict=structured)
+        delivered = False
+
+        async def forward(text: str) -> None:
+            nonlocal delivered
+            validator.feed(text)
+            if on_delta is not None:
+                delivered = True
+                await on_delta(text)
 
-        response = client.chat.completions.create(
-            model=final_model,
-            messages=messages,  # type: ignore[arg-type]
-            max_tokens=final_max_tokens,
-            temperature=0.3,
-        )
+        try:
+            response = await call_upstream(
+                tool,
+                api_key,
+                on_delta=forward,
+                review_level=review_level.value if review_level else "none",
+                model=model,
+                messages=messages,  # type: ignore[arg-type]
+                max_tokens=max_tokens,
+                temperature=0.3,
+                **extra,
+            )
+        except MalformedReviewError as exc:
+            REVIEW_MALFORMED.labels(tool=tool, stage="stream").inc()
+            logger.warning(
+                "Abandoned malformed review stream",
+                tool=tool,
+                model=model,
+                attempt=attempt + 1,
+                error=str(exc),
+            )
+            if delivered or attempt >= REVIEW_MALFORMED_RETRIES:
+                raise
+            attempt += 1
+            continue
 
         # Log OpenAI response
         log_openai_response(response)
 
-        answer = response.choices[0].message.content
-        if not answer:
+        review_content = response.choices[0].message.content
+        if not review_content:
             raise ValueError("Empty response from OpenAI")
+        try:
+            validator.finish()
+        except MalformedReviewError as exc:
+            REVIEW_MALFORMED.labels(tool=tool, stage="complete").inc()
+            logger.warning(
+                "Malformed review response", tool=tool, model=model, error=str(exc)
+            )
+            raise
+        return cast(str, review_content).strip()
 
-        logger.info("Friend called successfully", question=question[:50])
-        result: str = answer.strip()
-        # Avoid logging content; record only length
-        logger.debug("Friend answer produced", question_length=len(question))
-        # Metrics: success
-        REQUEST_COUNTER.labels(tool="phone_a_friend", status="success").inc()
-        increment_tally("phone_a_friend", "success")
-        asyncio.create_task(async_db_increment("phone_a_friend", "success"))
-        return result
 
-    except Exception as e:
-        # Metrics: error
-        REQUEST_COUNTER.labels(tool="phone_a_friend", status="error").inc()
-        increment_tally("phone_a_friend", "error")
-        asyncio.create_task(async_db_increment("phone_a_friend", "error"))
-        logger.error(
-            "Failed to phone a friend",
-            error=str(e),
-            error_type=type(e).__name__,
-            api_key_provided=bool(final_api_key),
-            api_key_length=len(final_api_key) if final_api_key else 0,
+async def complete_review(
+    api_key: str,
+    model: str,
+    max_tokens: int,
+    messages: List[Dict[str, str]],
+    streamer: Optional[MCPProgressStreamer] = None,
+    review_level: Optional[ReviewLevel] = None,
+) -> str:
+    """Run one review completion and return its stripped text."""
+    # Log OpenAI request
+    log_openai_request(model, [dict(m) for m in messages], max_tokens, api_key)
+
+    # Identical concurrent reviews share a single upstream completion
+    review_text = await upstream_flights.run(
+        "review_plan",
+        cache_key(api_key_fingerprint(api_key), model, messages, max_tokens, 0.3),
+        lambda: review_completion(
+            "review_plan",
+            api_key,
+            model,
+            messages,
+            max_tokens,
+            on_delta=streamer,
+            review_level=review_level,
+        ),
+        join=streamer is None,
+    )
+    if streamer is not None:
+        await streamer.flush()
+    return cast(str, review_text)
+
+
+async def map_reduce_review(
+    api_key: str,
+    model: str,
+    max_tokens: int,
+    review_level: ReviewLevel,
+    focus_areas: Optional[List[str]],
+    context: Optional[str],
+    chunks: List[List[tuple[str, str]]],
+    streamer: Optional[MCPProgressStreamer] = None,
+) -> Dict[str, Any]:
+    """Review plan chunks concurrently, then merge them in one reduce step.
+
+    The overall score is the chunk scores weighted by chunk size, so a
+    malformed chunk review fails the whole review. If the reduce response is
+    malformed, the chunk findings are merged locally.
+    """
+    outline = "; ".join(title for chunk in chunks for title, _text in chunk)
+    semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+
+    async def review_chunk(index: int, chunk: List[tuple[str, str]]) -> Dict[str, Any]:
+        chunk_text = "\n\n".join(text for _title, text in chunk)
+        plan_section = (
+            f"This plan is too long to review in one pass. You are reviewing "
+            f"part {index} of {len(chunks)}. Review only this part, judged in the "
+            f"context of the whole plan.\n"
+            f"Outline of the full plan: {outline}\n\n"
+            f"Plan Content (part {index} of {len(chunks)}):\n{chunk_text}"
+        )
+        messages = build_review_messages(
+            review_level, plan_section, focus_areas, context
         )
+        async with semaphore:
+            text = await complete_review(
+                api_key, model, max_tokens, messages, review_level=review_level
+            )
+        partial = require_review_json(text)
+        partial["sections"] = [title for title, _text in chunk]
+        partial["weight"] = len(chunk_text)
+        return partial
+
+    tasks = [
+        asyncio.ensure_future(review_chunk(index, chunk))
+        for index, chunk in enumerate(chunks, 1)
+    ]
+    try:
+        partials = list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
         raise
 
+    total_weight = sum(partial["weight"] for partial in partials) or 1
+    overall_score = (
+        sum(review_score(partial) * partial["weight"] for partial in partials)
+        / total_weight
+    )
+
+    findings = "\n\n".join(
+        format_findings(
+            f"Part {index} ({', '.join(partial['sections'])})",
+            review_score(partial),
+            partial.get("strengths") or [],
+            partial.get("weaknesses") or [],
+            partial.get("suggestions") or [],
+        )
+        for index, partial in enumerate(partials, 1)
+    )
+    reduce_section = (
+        f"You reviewed a long plan in {len(partials)} parts. Merge the partial "
+        "reviews below into one review of the whole plan: combine duplicates, keep "
+        "the most important points, resolve contradictions, and write "
+        "detailed_feedback that covers the plan as a whole.\n"
+        f"The size-weighted overall score of the parts is {overall_score:.2f}.\n\n"
+        f"Partial reviews:\n{findings}"
+    )
+    reduce_messages = build_review_messages(
+        review_level, reduce_section, focus_areas, context
+    )
+    try:
+        reduce_text = await complete_review(
+            api_key, model, max_tokens, reduce_messages, streamer, review_level
+        )
+        merged = require_review_json(reduce_text)
+    except MalformedReviewError as exc:
+        logger.warning("Malformed reduce review, merging locally", error=str(exc))
+        merged = {
+            "strengths": merge_findings(partials, "strengths"),
+            "weaknesses": merge_findings(partials, "weaknesses"),
+            "suggestions": merge_findings(partials, "suggestions"),
+            "detailed_feedback": findings,
+        }
+    merged["overall_score"] = round(overall_score, 3)
+    return merged
+
 
 # Plan Review Tool
 @mcp.tool()
@@ -480,6 +3914,20 @@ async def review_plan(
     max_tokens: Annotated[
         Optional[int], "Maximum tokens for response (optional if set in headers)"
     ] = None,
+    bypass_cache: Annotated[
+        bool, "Skip the review cache and always request a fresh review"
+    ] = False,
+    incremental: Annotated[
+        bool,
+        "Only re-review sections changed since the last review of this plan_id",
+    ] = False,
+    stream: Annotated[
+        bool, "Stream partial output as MCP progress/log notifications"
+    ] = False,
+    timeout_s: Annotated[
+        Optional[float],
+        "Time budget in seconds (default depends on the review level)",
+    ] = None,
 ) -> Dict[str, Any]:
     """
     Review a plan file and provide feedback based on the specified review level.
@@ -492,382 +3940,269 @@ async def review_plan(
         focus_areas: Optional list of specific areas to focus the review on
         model: OpenAI model to use (optional if set in headers, default: gpt-4)
         max_tokens: Maximum tokens for response (optional if set in headers, default: 2000)
+        bypass_cache: Skip the review cache and always request a fresh review
+        incremental: Re-review only the sections (split at markdown headings) that
+            changed since the stored review with the same plan_id, merging the
+            result with the prior findings
+        stream: Stream the review text as MCP progress/log notifications while it
+            is generated; the parsed review is still returned at the end
+        timeout_s: Time budget in seconds; defaults to the review level's budget
+            and is capped by an X-Request-Deadline header. The upstream request
+            is cancelled when it runs out
 
     Returns:
         Dictionary containing review results and feedback
     """
     # Get configuration from headers
     header_config = get_config_from_headers()
+    budget = resolve_timeout(REVIEW_TIMEOUTS[review_level], timeout_s, header_config)
+    metrics = ToolCallMetrics("review_plan", review_level.value)
+    return cast(
+        Dict[str, Any],
+        await run_with_deadline(
+            "review_plan",
+            budget,
+            run_review_plan(
+                header_config,
+                plan_content,
+                review_level,
+                context,
+                plan_id,
+                focus_areas,
+                model,
+                max_tokens,
+                bypass_cache,
+                incremental,
+                stream,
+                metrics,
+            ),
+            metrics,
+        ),
+    )
+
+
+async def run_review_plan(
+    header_config: Dict[str, Any],
+    plan_content: str,
+    review_level: ReviewLevel,
+    context: Optional[str],
+    plan_id: Optional[str],
+    focus_areas: Optional[List[str]],
+    model: Optional[str],
+    max_tokens: Optional[int],
+    bypass_cache: bool,
+    incremental: bool,
+    stream: bool,
+    metrics: Optional[ToolCallMetrics] = None,
+) -> Dict[str, Any]:
+    """Body of the review_plan tool, run within the call's time budget."""
 
     # Use parameters if provided, otherwise fall back to headers
     final_api_key = header_config.get("api_key")
-    final_model = model or header_config.get("model", "gpt-4")
+    final_model, model_source = resolve_model(review_level.value, model, header_config)
     final_max_tokens = max_tokens or header_config.get("max_tokens", 2000)
+    started = time.monotonic()
+    if metrics is not None:
+        metrics.request(final_model, text_bytes(plan_content, context))
 
     # Validate API key is available
     if not final_api_key:
         raise ValueError("API key must be provided in X-OpenAI-API-Key header")
 
     # Log incoming MCP call
-    log_mcp_call(
-        "review_plan",
-        plan_content_length=len(plan_content),
-        review_level=review_level,
-        context_length=len(context) if context else 0,
-        plan_id=plan_id,
-        focus_areas=focus_areas,
-        model=final_model,
-        model_source="parameter" if model else "header",
-        max_tokens=final_max_tokens,
-        max_tokens_source="parameter" if max_tokens else "header",
+    if logger.isEnabledFor(logging.DEBUG):
+        log_mcp_call(
+            "review_plan",
+            plan_content_length=len(plan_content),
+            review_level=review_level,
+            context_length=len(context) if context else 0,
+            plan_id=plan_id,
+            focus_areas=focus_areas,
+            model=final_model,
+            model_source=model_source,
+            max_tokens=final_max_tokens,
+            max_tokens_source="parameter" if max_tokens else "header",
+            bypass_cache=bypass_cache,
+            incremental=incremental,
+            stream=stream or header_config.get("stream", False),
+        )
+
+    # Reviews are content-addressed, so formatting-only edits hit the cache
+    owner = api_key_fingerprint(final_api_key)
+    review_key = cache_key(
+        owner,
+        canonicalize_plan(plan_content),
+        review_level,
+        sorted(focus_areas or []),
+        canonicalize_plan(context or ""),
+        final_model,
     )
 
     # Generate plan ID if not provided
     if not plan_id:
-        plan_id = f"plan_{int(datetime.now().timestamp())}"
-
-    # Create review prompt based on level
-    # All reviews follow the Master Review Framework with varying depth
-    review_prompts = {
-        ReviewLevel.QUICK: """
-        Provide a quick review of this plan using the following framework:
-
-        STRUCTURE & ORGANIZATION:
-        - Is the plan logically structured and easy to follow?
-
-        COMPLETENESS:
-        - Are key sections present (objectives, scope, timeline)?
-
-        CLARITY:
-        - Any obvious ambiguities or "must-fix" clarity issues?
-
-        ASSUMPTIONS & RISKS:
-        - Any glaring unstated assumptions or obvious risks?
-
-        Keep feedback concise, actionable, and in checklist form if possible.
-        Provide 1-2 key improvement suggestions.
-        """,
-        ReviewLevel.STANDARD: """
-        Provide a standard review of this plan using the following framework:
-
-        STRUCTURE & ORGANIZATION:
-        - Is the plan logically structured and easy to follow?
-
-        COMPLETENESS:
-        - Are all key sections present (objectives, scope, resources, risks, timeline, success criteria)?
-        - Is there appropriate level of detail for each section?
-
-        CLARITY:
-        - Is the language unambiguous, readable, and accessible to stakeholders?
-
-        ASSUMPTIONS & DEPENDENCIES:
-        - Are hidden assumptions, constraints, or external dependencies called out?
-
-        RISKS:
-        - What risks or failure modes are unaddressed?
-
-        FEASIBILITY:
-        - Are timeline and resource estimates realistic?
-
-        Provide specific suggestions and 2-3 clarifying questions the plan should answer.
-        """,
-        ReviewLevel.COMPREHENSIVE: """
-        Provide a comprehensive review of this plan using the following framework:
-
-        STRUCTURE & ORGANIZATION:
-        - Is the plan logically structured and easy to follow?
-        - Does it flow naturally from problem → solution → implementation?
-
-        COMPLETENESS:
-        - Are all key sections present and thoroughly developed (objectives, scope, resources, risks, timeline, success criteria)?
-        - Is the level of detail appropriate for each section?
-
-        CLARITY:
-        - Is the language unambiguous, readable, and accessible to all stakeholders?
-        - Are technical terms and concepts clearly explained?
-
-        ASSUMPTIONS & DEPENDENCIES:
-        - Are hidden assumptions, constraints, or external dependencies explicitly called out?
-        - What implicit assumptions need to be validated?
-
-        RISKS:
-        - What risks, failure modes, or edge cases are unaddressed?
-        - Are mitigation strategies defined for key risks?
-
-        FEASIBILITY:
-        - Are timeline and resource estimates realistic?
-        - Is the plan testable and measurable?
-        - Can success be validated objectively?
+        plan_id = f"plan_{review_key[:16]}"
 
-        ALTERNATIVES:
-        - Have trade-offs and alternative approaches been considered?
-        - Are design decisions justified?
-
-        VALIDATION:
-        - Does the plan define success criteria, KPIs, or metrics?
-        - How will progress be tracked and measured?
-
-        STAKEHOLDERS:
-        - Are roles, responsibilities, and stakeholder impacts clear?
-
-        LONG-TERM SUSTAINABILITY:
-        - Does the plan account for scalability, maintainability, and adaptability?
-
-        Provide detailed feedback with examples, alternatives, and 3-5 clarifying questions that expose potential blind spots.
-        """,
-        ReviewLevel.DEEP_DIVE: """
-        Provide a deep-dive technical review of this plan using the following framework:
-
-        STRUCTURE & ORGANIZATION:
-        - Evaluate logical flow, section coherence, and information architecture
-        - Assess whether structure supports understanding and execution
-
-        COMPLETENESS:
-        - Section-by-section completeness audit (objectives, scope, resources, risks, timeline, success criteria, rollout plan)
-        - Identify missing technical details, specifications, or requirements
-
-        CLARITY:
-        - Evaluate technical precision and unambiguous language
-        - Assess readability for both technical and non-technical stakeholders
-
-        ASSUMPTIONS & DEPENDENCIES:
-        - Identify ALL stated and unstated assumptions
-        - Map out dependency chains and potential bottlenecks
-        - Validate technical feasibility of each assumption
-
-        RISKS:
-        - Comprehensive risk analysis: technical, operational, security, performance
-        - Failure mode analysis (FMEA-style): what could go wrong and when?
-        - Edge cases, race conditions, and boundary conditions
-        - Mitigation and rollback strategies for each major risk
-
-        FEASIBILITY:
-        - Detailed timeline realism check with critical path analysis
-        - Resource allocation validation (team capacity, skills, budget)
-        - Technical feasibility of proposed solutions
-        - Testing strategy and validation approach
-
-        ALTERNATIVES:
-        - Compare against alternative technical approaches
-        - Evaluate trade-offs (performance vs complexity, cost vs speed, etc.)
-        - Justify architectural and design decisions
-
-        VALIDATION:
-        - Define measurable success criteria and KPIs
-        - Specify testing, monitoring, and observability requirements
-        - Outline validation checkpoints throughout implementation
-
-        STAKEHOLDERS:
-        - Map stakeholder roles, responsibilities, and approval gates
-        - Identify communication touchpoints and escalation paths
-
-        LONG-TERM SUSTAINABILITY:
-        - Scalability analysis: how will this perform at 10x, 100x scale?
-        - Maintainability: code quality, documentation, knowledge transfer
-        - Adaptability: how easily can this evolve with changing requirements?
-        - Operational considerations: deployment, monitoring, incident response
-
-        Provide rigorous, technically detailed feedback with specific examples, actionable improvements, and 4-6 probing questions.
-        """,
-        ReviewLevel.EXPERT: """
-        Provide an expert-level review of this plan using the Master Review Framework with professional rigor:
-
-        STRUCTURE & ORGANIZATION:
-        - Evaluate against industry-standard plan structures (PRDs, RFCs, technical specifications)
-        - Assess information architecture and accessibility for diverse audiences
-
-        COMPLETENESS:
-        - Comprehensive audit of all sections (objectives, scope, resources, risks, timeline, success criteria, rollout, communication plan)
-        - Evaluate against professional planning standards and best practices
-        - Identify gaps that would concern executive stakeholders or auditors
-
-        CLARITY:
-        - Assess precision, unambiguity, and professional communication standards
-        - Evaluate for multi-stakeholder accessibility (technical, business, executive)
-        - Check for regulatory or compliance language requirements
-
-        ASSUMPTIONS & DEPENDENCIES:
-        - Exhaustive mapping of assumptions with validation requirements
-        - Dependency analysis including external systems, teams, and third parties
-        - Constraint analysis (technical, business, legal, compliance)
-        - Market or competitive landscape assumptions
-
-        RISKS:
-        - Enterprise-level risk assessment (technical, operational, business, legal, reputational)
-        - Comprehensive failure mode analysis with probability and impact assessment
-        - Security, privacy, and compliance risks
-        - Business continuity and disaster recovery considerations
-        - Risk mitigation, transfer, acceptance strategies
-
-        FEASIBILITY:
-        - Multi-dimensional feasibility analysis: technical, operational, financial, organizational
-        - Realistic timeline assessment with uncertainty ranges
-        - Resource allocation optimization and capacity planning
-        - Financial modeling and ROI analysis where applicable
-        - Testability, measurability, and validation strategy
-
-        ALTERNATIVES:
-        - Comprehensive alternatives analysis with decision matrices
-        - Trade-off evaluation across multiple dimensions (cost, time, quality, risk)
-        - Competitive analysis and industry benchmarking
-        - Build vs buy vs partner considerations
-
-        VALIDATION:
-        - Define SMART success criteria and KPIs aligned with business objectives
-        - Comprehensive testing strategy (unit, integration, system, acceptance)
-        - Monitoring, observability, and alerting requirements
-        - Metrics dashboard and reporting cadence
-        - Go/no-go decision criteria at each milestone
-
-        STAKEHOLDERS:
-        - Complete stakeholder mapping with RACI matrix
-        - Communication plan with appropriate cadence and channels
-        - Change management and stakeholder buy-in strategy
-        - Executive reporting and governance structure
-
-        LONG-TERM SUSTAINABILITY:
-        - Scalability with specific load projections and capacity planning
-        - Maintainability with documentation, knowledge transfer, and support plans
-        - Adaptability and extensibility for future requirements
-        - Total cost of ownership (TCO) analysis
-        - Technical debt management strategy
-        - Operational excellence: SLAs, SLOs, error budgets
-        - Team sustainability: on-call rotation, burnout prevention
-
-        Provide expert insights with industry context, citing best practices and standards where relevant.
-        Suggest measurable improvements with business impact.
-        Provide 5-7 strategic questions the leadership team should address before execution.
-        """,
-    }
-
-    base_prompt = review_prompts[review_level]
-
-    # Add focus areas if specified
-    if focus_areas:
-        areas = ", ".join(focus_areas)
-        focus_text = f"\n\nFocus the review specifically on these areas: {areas}"
-        base_prompt += focus_text
-
-    # Add context if provided
-    context_section = ""
-    if context:
-        context_section = f"\n\nAdditional Context:\n{context}\n"
-
-    prompt = f"""
-    {base_prompt}
-    {context_section}
-    Plan Content:
-    {plan_content}
-
-    Please provide your review in the following JSON format:
-    {{
-        "overall_score": 0.0-1.0,
-        "strengths": ["strength1", "strength2", ...],
-        "weaknesses": ["weakness1", "weakness2", ...],
-        "suggestions": ["suggestion1", "suggestion2", ...],
-        "detailed_feedback": "comprehensive feedback text"
-    }}
-    """
-
-    messages = [{"role": "user", "content": prompt}]
-
-    try:
-        # Create OpenAI client with API key from headers
-        client = openai.OpenAI(api_key=final_api_key)
-
-        # Log OpenAI request
-        log_openai_request(
-            final_model, [dict(m) for m in messages], final_max_tokens, final_api_key
+    use_cache = (
+        REVIEW_CACHE_ENABLED
+        and not bypass_cache
+        and not header_config.get("cache_bypass")
+    )
+    if use_cache:
+        cached_review = review_plan_cache.get(review_key)
+        if cached_review is not None:
+            plan_review = cached_review.model_copy(
+                update={"plan_id": plan_id, "reviewed_at": datetime.now()}
+            )
+            plan_reviews[owner, plan_id] = plan_review
+            await persist_plan_review(owner, plan_review)
+            logger.debug("Plan review served from cache", plan_id=plan_id)
+            record_request("review_plan", "success")
+            result = plan_review_result(plan_review)
+            result["routing"] = routing_metadata(
+                final_model, model_source, time.monotonic() - started
+            )
+            return result
+
+    # Incremental mode: diff sections against the stored review for this plan_id
+    sections = split_plan_sections(plan_content)
+    section_hashes = hash_plan_sections(sections)
+    # A stored review is only reused for the same focus areas, context and model
+    inputs_key = cache_key(
+        sorted(focus_areas or []), canonicalize_plan(context or ""), final_model
+    )
+    previous_review = None
+    if incremental:
+        previous_review = plan_reviews.get((owner, plan_id)) or await load_plan_review(
+            owner, plan_id
         )
-
-        response = client.chat.completions.create(
-            model=final_model,
-            messages=messages,  # type: ignore[arg-type]
-            max_tokens=final_max_tokens,
-            temperature=0.3,
+    changed_sections: List[str] = []
+    removed_sections: List[str] = []
+    if previous_review is not None and (
+        previous_review.review_level != review_level
+        or previous_review.inputs_key != inputs_key
+        or not previous_review.section_hashes
+    ):
+        previous_review = None
+    if previous_review is not None:
+        changed_sections, removed_sections = plan_section_delta(
+            previous_review.section_hashes, section_hashes
         )
+        changed_set = set(changed_sections)
+        changed_chars = sum(
+            len(text) for title, text in sections if title in changed_set
+        )
+        if not changed_sections and not removed_sections:
+            logger.debug("Plan unchanged since last review", plan_id=plan_id)
+            record_request("review_plan", "success")
+            return {
+                **plan_review_result(previous_review),
+                "incremental": {"changed_sections": [], "removed_sections": []},
+                "routing": routing_metadata(
+                    final_model, model_source, time.monotonic() - started
+                ),
+            }
+        if changed_chars > INCREMENTAL_REVIEW_MAX_CHANGED_RATIO * len(plan_content):
+            # Most of the plan changed; a full review is cheaper to reason about
+            previous_review = None
+
+    # Plans too large for one pass are reviewed chunk by chunk, then merged
+    use_map_reduce = (
+        previous_review is None
+        and MAP_REDUCE_THRESHOLD_TOKENS > 0
+        and estimate_tokens(plan_content) > MAP_REDUCE_THRESHOLD_TOKENS
+    )
 
-        # Log OpenAI response
-        log_openai_response(response)
-
-        # Parse JSON response
-        review_content = response.choices[0].message.content
-        if not review_content:
-            raise ValueError("Empty response from OpenAI")
-        review_text: str = review_content.strip()
+    try:
+        streamer = (
+            mcp_progress_streamer("review_plan")
+            if stream or header_config.get("stream")
+            else None
+        )
 
-        # Try to extract JSON from the response
-        try:
-            # Look for JSON in the response
-            start_idx = review_text.find("{")
-            end_idx = review_text.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_text = review_text[start_idx:end_idx]
-                review_data = json.loads(json_text)
+        chunk_count = 0
+        if use_map_reduce:
+            chunks = chunk_plan_sections(sections, MAP_REDUCE_CHUNK_TOKENS)
+            chunk_count = len(chunks)
+            review_data = await map_reduce_review(
+                final_api_key,
+                final_model,
+                final_max_tokens,
+                review_level,
+                focus_areas,
+                context,
+                chunks,
+                streamer,
+            )
+            review_text: str = review_data["detailed_feedback"]
+        else:
+            if previous_review is not None:
+                plan_section = build_incremental_plan_section(
+                    previous_review, sections, changed_sections, removed_sections
+                )
             else:
-                # Fallback if no JSON found
-                review_data = {
-                    "overall_score": 0.7,
-                    "strengths": ["Plan structure is present"],
-                    "weaknesses": ["Unable to parse detailed review"],
-                    "suggestions": ["Review the plan manually"],
-                    "detailed_feedback": review_text,
-                }
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            review_data = {
-                "overall_score": 0.7,
-                "strengths": ["Plan structure is present"],
-                "weaknesses": ["Unable to parse detailed review"],
-                "suggestions": ["Review the plan manually"],
-                "detailed_feedback": review_text,
-            }
+                plan_section = f"Plan Content:\n{plan_content}"
+            messages = build_review_messages(
+                review_level, plan_section, focus_areas, context
+            )
+            review_text = await complete_review(
+                final_api_key,
+                final_model,
+                final_max_tokens,
+                messages,
+                streamer,
+                review_level,
+            )
+            review_data = require_review_json(review_text)
 
         # Create plan review object
         plan_review = PlanReview(
             plan_id=plan_id,
             review_level=review_level,
-            overall_score=review_data.get("overall_score", 0.7),
-            strengths=review_data.get("strengths", []),
-            weaknesses=review_data.get("weaknesses", []),
-            suggestions=review_data.get("suggestions", []),
-            detailed_feedback=review_data.get("detailed_feedback", review_text),
+            overall_score=review_data["overall_score"],
+            strengths=review_data["strengths"],
+            weaknesses=review_data["weaknesses"],
+            suggestions=review_data["suggestions"],
+            detailed_feedback=review_data["detailed_feedback"],
+            section_hashes=section_hashes,
+            inputs_key=inputs_key,
         )
 
         # Store the review
-        plan_reviews[plan_id] = plan_review
+        plan_reviews[owner, plan_id] = plan_review
+        await persist_plan_review(owner, plan_review)
+        if use_cache:
+            review_plan_cache.set(
+                review_key, plan_review, len(plan_review.model_dump_json())
+            )
 
         logger.info(
             "Plan reviewed",
             plan_id=plan_id,
             review_level=review_level,
             score=plan_review.overall_score,
+            incremental=previous_review is not None,
+            changed_sections=len(changed_sections),
+            map_reduce_chunks=chunk_count,
         )
 
-        reviewed_at_value: datetime = cast(
-            datetime, getattr(plan_review, "reviewed_at")
-        )
-        reviewed_at_iso: str = reviewed_at_value.isoformat()
         # Metrics: success
-        REQUEST_COUNTER.labels(tool="review_plan", status="success").inc()
-        increment_tally("review_plan", "success")
-        asyncio.create_task(async_db_increment("review_plan", "success"))
-        return {
-            "plan_id": plan_id,
-            "review_level": review_level,
-            "overall_score": plan_review.overall_score,
-            "strengths": plan_review.strengths,
-            "weaknesses": plan_review.weaknesses,
-            "suggestions": plan_review.suggestions,
-            "detailed_feedback": plan_review.detailed_feedback,
-            "reviewed_at": reviewed_at_iso,
-        }
+        record_request("review_plan", "success")
+        result = plan_review_result(plan_review)
+        result["routing"] = routing_metadata(
+            final_model, model_source, time.monotonic() - started
+        )
+        if previous_review is not None:
+            result["incremental"] = {
+                "changed_sections": changed_sections,
+                "removed_sections": removed_sections,
+            }
+        if use_map_reduce:
+            result["map_reduce"] = {"chunks": chunk_count}
+        return result
 
     except Exception as e:
         # Metrics: error
-        REQUEST_COUNTER.labels(tool="review_plan", status="error").inc()
-        increment_tally("review_plan", "error")
-        asyncio.create_task(async_db_increment("review_plan", "error"))
+        record_request("review_plan", "error")
         logger.error(
             "Failed to review plan",
             error=str(e),
@@ -879,6 +4214,67 @@ async def review_plan(
         raise
 
 
+def require_api_key() -> str:
+    api_key = get_config_from_headers().get("api_key")
+    if not api_key:
+        raise ValueError("API key must be provided in X-OpenAI-API-Key header")
+    return str(api_key)
+
+
+@mcp.tool()
+async def get_plan_review(plan_id: str) -> Dict[str, Any]:
+    """
+    Fetch the most recent stored review for a plan.
+
+    Reviews are scoped to the API key in the X-OpenAI-API-Key header and
+    survive server restarts when a review repository is configured.
+
+    Args:
+        plan_id: Plan identifier returned by review_plan
+
+    Returns:
+        The review in the same shape review_plan returns
+    """
+    owner = api_key_fingerprint(require_api_key())
+    log_mcp_call("get_plan_review", plan_id=plan_id)
+    review = await load_plan_review(owner, plan_id)
+    if review is None:
+        record_request("get_plan_review", "not_found")
+        raise ValueError(f"No review found for plan_id {plan_id!r}")
+    record_request("get_plan_review", "success")
+    return plan_review_result(review)
+
+
+@mcp.tool()
+async def list_plan_reviews(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    plan_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    List stored plan reviews, newest first, with cursor pagination.
+
+    Args:
+        limit: Page size (capped by PLAN_REVIEW_LIST_MAX_LIMIT)
+        cursor: next_cursor from a previous page, to continue after it
+        plan_id: Only list the review history of this plan
+
+    Returns:
+        Dictionary with the page of reviews and next_cursor (None on the last page)
+    """
+    owner = api_key_fingerprint(require_api_key())
+    log_mcp_call("list_plan_reviews", limit=limit, cursor=cursor, plan_id=plan_id)
+    if review_repository is None:
+        raise ValueError("Plan review persistence is disabled")
+    limit = max(1, min(limit, PLAN_REVIEW_LIST_MAX_LIMIT))
+    reviews, next_cursor = await review_repository.alist(owner, limit, cursor, plan_id)
+    record_request("list_plan_reviews", "success")
+    return {
+        "reviews": [plan_review_result(review) for review in reviews],
+        "next_cursor": next_cursor,
+    }
+
+
 # Health check endpoint
 @mcp.tool()
 async def health_check() -> Dict[str, Any]:
@@ -886,7 +4282,7 @@ async def health_check() -> Dict[str, Any]:
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "plan_reviews_count": len(plan_reviews),
+        **plan_reviews.stats(),
     }
 
 
@@ -900,10 +4296,83 @@ class DemoRequest(BaseModel):
     review_level: Optional[str] = "standard"
     focus_areas: Optional[List[str]] = None
     api_key: str
+    stream: bool = False
+
+
+DEMO_REVIEW_SYSTEM_PROMPTS: Dict[ReviewLevel, str] = {
+    level: f"{instruction}\n\n{REVIEW_RESPONSE_FORMAT}"
+    for level, instruction in {
+        ReviewLevel.QUICK: "Provide a quick review focusing on structure and completeness.",
+        ReviewLevel.STANDARD: "Provide a standard review covering key areas.",
+        ReviewLevel.COMPREHENSIVE: "Provide a comprehensive review with detailed analysis.",
+        ReviewLevel.DEEP_DIVE: "Provide a deep-dive technical review.",
+        ReviewLevel.EXPERT: "Provide an expert-level professional review.",
+    }.items()
+}
+
+
+def wants_event_stream(request: Request, data: DemoRequest) -> bool:
+    """Whether a demo request asked for a server-sent event stream."""
+    return data.stream or "text/event-stream" in request.headers.get("accept", "")
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def demo_event_stream(
+    tool: str,
+    run: Callable[[Callable[[str], Awaitable[None]]], Awaitable[Dict[str, Any]]],
+) -> StreamingResponse:
+    """Stream a demo completion as SSE ``delta`` events and a final ``result``.
+
+    Failures are reported as an ``error`` event carrying the HTTP status the
+    JSON endpoint would have returned.
+    """
+    queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def on_delta(text: str) -> None:
+        await queue.put(sse_event("delta", {"text": text}))
+
+    async def produce() -> None:
+        try:
+            result = await run(on_delta)
+            record_request(tool, "success")
+            await queue.put(sse_event("result", result))
+        except Exception as exc:
+            record_request(tool, "error")
+            if isinstance(exc, HTTPException):
+                status, detail = exc.status_code, str(exc.detail)
+            elif isinstance(exc, openai.AuthenticationError):
+                status, detail = 401, "Invalid API key"
+            elif isinstance(exc, openai.RateLimitError):
+                status, detail = 429, "Rate limit exceeded"
+            else:
+                logger.error("Demo API error", error=str(exc))
+                status, detail = 500, str(exc)
+            await queue.put(sse_event("error", {"status": status, "detail": detail}))
+        finally:
+            await queue.put(None)
+
+    async def events() -> Any:
+        task = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+        finally:
+            # Client went away: stop generating upstream
+            task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @mcp.custom_route("/api/demo/phone-a-friend", methods=["POST"])
-async def demo_phone_a_friend(request: Request) -> JSONResponse:
+async def demo_phone_a_friend(request: Request) -> Response:
     """REST API endpoint for phone_a_friend demo."""
     try:
         if not ENABLE_DEMOS:
@@ -932,91 +4401,216 @@ async def demo_phone_a_friend(request: Request) -> JSONResponse:
             List[ChatCompletionMessageParam], [{"role": "user", "content": prompt}]
         )
 
-        client = openai.OpenAI(api_key=data.api_key)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.3,
-        )
+        api_key = data.api_key
+
+        async def run(
+            on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        ) -> Dict[str, Any]:
+            response = await call_upstream(
+                "demo_phone_a_friend",
+                api_key,
+                on_delta=on_delta,
+                model="gpt-4",
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.3,
+            )
+            answer = response.choices[0].message.content
+            if not answer:
+                raise HTTPException(
+                    status_code=500, detail="Empty response from OpenAI"
+                )
+            return {"answer": answer.strip()}
 
-        answer = response.choices[0].message.content
-        if not answer:
-            raise HTTPException(status_code=500, detail="Empty response from OpenAI")
+        if wants_event_stream(request, data):
+            return demo_event_stream("demo_phone_a_friend", run)
+
+        content = await run()
 
         # Metrics: success
-        REQUEST_COUNTER.labels(tool="demo_phone_a_friend", status="success").inc()
-        increment_tally("demo_phone_a_friend", "success")
-        asyncio.create_task(async_db_increment("demo_phone_a_friend", "success"))
-        return JSONResponse(content={"answer": answer.strip()})
+        record_request("demo_phone_a_friend", "success")
+        return JSONResponse(content=content)
 
     except openai.AuthenticationError as exc:
-        REQUEST_COUNTER.labels(tool="demo_phone_a_friend", status="error").inc()
-        increment_tally("demo_phone_a_friend", "error")
-        asyncio.create_task(async_db_increment("demo_phone_a_friend", "error"))
+        record_request("demo_phone_a_friend", "error")
         raise HTTPException(status_code=401, detail="Invalid API key") from exc
     except openai.RateLimitError as exc:
-        REQUEST_COUNTER.labels(tool="demo_phone_a_friend", status="error").inc()
-        increment_tally("demo_phone_a_friend", "error")
-        asyncio.create_task(async_db_increment("demo_phone_a_friend", "error"))
+        record_request("demo_phone_a_friend", "error")
         raise HTTPException(status_code=429, detail="Rate limit exceeded") from exc
     except Exception as exc:
         logger.error("Demo API error", error=str(exc))
-        REQUEST_COUNTER.labels(tool="demo_phone_a_friend", status="error").inc()
-        increment_tally("demo_phone_a_friend", "error")
-        asyncio.create_task(async_db_increment("demo_phone_a_friend", "error"))
+        record_request("demo_phone_a_friend", "error")
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@mcp.custom_route("/api/metrics/summary", methods=["GET"])
-async def metrics_summary(_request: Request) -> JSONResponse:
-    """Return minimal in-memory tallies for homepage display."""
-    # Prefer DB totals when enabled; fall back to in-memory tallies
-    if TRACK_METRICS_DB and DATABASE_URL and _metrics_table_ready:
+class MetricsSummaryCache:
+    """Materialized request totals for the homepage.
+
+    Database totals are refreshed by a background task every ``interval``
+    seconds, so requests never query the DB. Without a database (or before the
+    first refresh) the in-process tallies are served instead.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.db_tallies: Optional[Dict[str, Dict[str, int]]] = None
+        self.db_generated_at = ""
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def refresh(self) -> bool:
+        """Reload totals from the database; True if the snapshot was updated."""
+        pool = await initialize_metrics_db()
+        if pool is None or not _metrics_table_ready:
+            return False
+        psycopg = importlib.import_module("psycopg")
         try:
-            psycopg = __import__("psycopg")
-            if _db_conn is None:
-                initialize_metrics_db()
-            if _db_conn is not None and _metrics_table_ready:
-                with _db_conn.cursor() as cur:  # type: ignore[union-attr]
-                    cur.execute(
-                        """
-                        select tool, status, sum(count) as total
-                        from public.request_counts
-                        group by tool, status
-                        order by tool, status;
-                        """
-                    )
-                    rows = cur.fetchall()
-                tallies: Dict[str, Dict[str, int]] = {}
-                for tool, status, total in rows:
-                    per = tallies.setdefault(tool, {})
-                    per[status] = int(total)
-                return JSONResponse(
-                    content={
-                        "tallies": tallies,
-                        "source": "database",
-                        "generated_at": datetime.now().isoformat(),
-                    }
+            async with pool.connection() as conn:
+                cur = await conn.execute(
+                    SUMMARY_REQUEST_COUNTS_SQL, prepare=METRICS_DB_PREPARE
                 )
-        except psycopg.Error as exc:  # type: ignore[attr-defined]
+                rows = await cur.fetchall()
+        except psycopg.Error as exc:
             logger.error("DB metrics summary query failed", error=str(exc))
+            return False
+        finally:
+            update_metrics_pool_gauges()
+        tallies: Dict[str, Dict[str, int]] = {}
+        for tool, status, total in rows:
+            per = tallies.setdefault(tool, {})
+            per[status] = int(total)
+        self.db_tallies = tallies
+        self.db_generated_at = datetime.now().isoformat()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if TRACK_METRICS_DB and DATABASE_URL and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> tuple[Dict[str, Any], str]:
+        """Current summary payload and an ETag over its tallies."""
+        if self.db_tallies is not None:
+            tallies, source = self.db_tallies, "database"
+            generated_at = self.db_generated_at
+        else:
+            # Shallow copy to avoid mutation during serialization
+            tallies = {k: dict(v) for k, v in REQUEST_TALLIES.items()}
+            source, generated_at = "memory", datetime.now().isoformat()
+        etag = '"' + cache_key(source, tallies)[:32] + '"'
+        return {
+            "tallies": tallies,
+            "source": source,
+            "generated_at": generated_at,
+        }, etag
+
+
+metrics_summary_cache = MetricsSummaryCache(METRICS_SUMMARY_REFRESH_INTERVAL)
 
-    # Shallow copy to avoid mutation during serialization
-    snapshot: Dict[str, Dict[str, int]] = {
-        k: dict(v) for k, v in REQUEST_TALLIES.items()
+
+@on_startup
+async def start_metrics_summary_refresh() -> None:
+    metrics_summary_cache.start()
+
+
+@on_shutdown
+async def stop_metrics_summary_refresh() -> None:
+    await metrics_summary_cache.stop()
+
+
+@mcp.custom_route("/api/metrics/summary", methods=["GET"])
+async def metrics_summary(request: Request) -> Response:
+    """Return request tallies for homepage display, with ETag revalidation."""
+    content, etag = metrics_summary_cache.snapshot()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(metrics_summary_cache.interval)}",
     }
-    return JSONResponse(
-        content={
-            "tallies": snapshot,
-            "source": "memory",
-            "generated_at": datetime.now().isoformat(),
-        }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
+def metrics_snapshot_event() -> str:
+    content, _etag = metrics_summary_cache.snapshot()
+    return sse_event("snapshot", content)
+
+
+@mcp.custom_route("/api/metrics/stream", methods=["GET"])
+async def metrics_stream(request: Request) -> Response:
+    """Push live tally updates as SSE: a ``snapshot`` then coalesced ``delta``s."""
+    if len(tally_broadcaster) >= METRICS_STREAM_MAX_CLIENTS:
+        return JSONResponse(
+            status_code=503, content={"detail": "Too many metrics viewers"}
+        )
+    queue = tally_broadcaster.subscribe()
+
+    async def events() -> Any:
+        try:
+            yield metrics_snapshot_event()
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), METRICS_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            tally_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+def is_usage_admin(request: Request) -> bool:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return bool(USAGE_ADMIN_TOKEN) and (
+        scheme.lower() == "bearer" and hmac.compare_digest(token, USAGE_ADMIN_TOKEN)
+    )
+
+
+@mcp.custom_route("/api/metrics/usage", methods=["GET"])
+async def metrics_usage(request: Request) -> Response:
+    """Rolling token usage and estimated cost per API key.
+
+    Callers see their own key's usage (X-OpenAI-API-Key). With
+    ``Authorization: Bearer $USAGE_ADMIN_TOKEN`` the top keys by estimated cost
+    are listed, identified only by fingerprint.
+    """
+    headers = {"Cache-Control": "no-store"}
+    if is_usage_admin(request):
+        try:
+            limit = int(request.query_params.get("limit", "20"))
+        except ValueError:
+            return JSONResponse(
+                status_code=400, content={"detail": "Invalid limit"}, headers=headers
+            )
+        limit = max(1, min(limit, USAGE_MAX_KEYS))
+        content = {"window_s": usage_ledger.window, "keys": usage_ledger.top(limit)}
+        return JSONResponse(content=content, headers=headers)
+    api_key = request.headers.get("x-openai-api-key")
+    if not api_key:
+        return JSONResponse(
+            status_code=401,
+            content={"detail": "API key must be provided in X-OpenAI-API-Key header"},
+            headers=headers,
+        )
+    usage = usage_ledger.usage(api_key_fingerprint(api_key))
+    return JSONResponse(content=usage, headers=headers)
+
+
 @mcp.custom_route("/api/demo/review-plan", methods=["POST"])
-async def demo_review_plan(request: Request) -> JSONResponse:
+async def demo_review_plan(request: Request) -> Response:
     """REST API endpoint for review_plan demo."""
     try:
         if not ENABLE_DEMOS:
@@ -1031,92 +4625,45 @@ async def demo_review_plan(request: Request) -> JSONResponse:
 
         review_level = ReviewLevel(data.review_level or "standard")
 
-        review_prompts = {
-            ReviewLevel.QUICK: "Provide a quick review focusing on structure and completeness.",
-            ReviewLevel.STANDARD: "Provide a standard review covering key areas.",
-            ReviewLevel.COMPREHENSIVE: "Provide a comprehensive review with detailed analysis.",
-            ReviewLevel.DEEP_DIVE: "Provide a deep-dive technical review.",
-            ReviewLevel.EXPERT: "Provide an expert-level professional review.",
-        }
-
-        prompt = f"""
-        {review_prompts[review_level]}
-
-        Plan Content:
-        {data.plan_content}
-
-        Please provide your review in JSON format:
-        {{
-            "overall_score": 0.0-1.0,
-            "strengths": ["strength1", "strength2"],
-            "weaknesses": ["weakness1", "weakness2"],
-            "suggestions": ["suggestion1", "suggestion2"],
-            "detailed_feedback": "comprehensive feedback text"
-        }}
-        """
-
-        messages = cast(
-            List[ChatCompletionMessageParam], [{"role": "user", "content": prompt}]
-        )
-
-        client = openai.OpenAI(api_key=data.api_key)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            max_tokens=2000,
-            temperature=0.3,
-        )
-
-        review_content = response.choices[0].message.content
-        if not review_content:
-            raise HTTPException(status_code=500, detail="Empty response from OpenAI")
+        messages = [
+            {"role": "system", "content": DEMO_REVIEW_SYSTEM_PROMPTS[review_level]},
+            {"role": "user", "content": f"Plan Content:\n{data.plan_content}"},
+        ]
+
+        api_key = data.api_key
+
+        async def run(
+            on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        ) -> Dict[str, Any]:
+            review_text = await review_completion(
+                "demo_review_plan",
+                api_key,
+                "gpt-4",
+                messages,
+                2000,
+                on_delta=on_delta,
+                review_level=review_level,
+            )
+            return require_review_json(review_text)
 
-        review_text = review_content.strip()
+        if wants_event_stream(request, data):
+            return demo_event_stream("demo_review_plan", run)
 
-        try:
-            start_idx = review_text.find("{")
-            end_idx = review_text.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_text = review_text[start_idx:end_idx]
-                review_data = json.loads(json_text)
-            else:
-                review_data = {
-                    "overall_score": 0.7,
-                    "strengths": ["Plan structure is present"],
-                    "weaknesses": ["Unable to parse detailed review"],
-                    "suggestions": ["Review the plan manually"],
-                    "detailed_feedback": review_text,
-                }
-        except json.JSONDecodeError:
-            review_data = {
-                "overall_score": 0.7,
-                "strengths": ["Plan structure is present"],
-                "weaknesses": ["Unable to parse detailed review"],
-                "suggestions": ["Review the plan manually"],
-                "detailed_feedback": review_text,
-            }
+        review_data = await run()
 
         # Metrics: success
-        REQUEST_COUNTER.labels(tool="demo_review_plan", status="success").inc()
-        increment_tally("demo_review_plan", "success")
-        asyncio.create_task(async_db_increment("demo_review_plan", "success"))
+        record_request("demo_review_plan", "success")
         return JSONResponse(content=review_data)
 
     except openai.AuthenticationError as exc:
-        REQUEST_COUNTER.labels(tool="demo_review_plan", status="error").inc()
-        increment_tally("demo_review_plan", "error")
-        asyncio.create_task(async_db_increment("demo_review_plan", "error"))
+        record_request("demo_review_plan", "error")
         raise HTTPException(status_code=401, detail="Invalid API key") from exc
     except openai.RateLimitError as exc:
-        REQUEST_COUNTER.labels(tool="demo_review_plan", status="error").inc()
-        increment_tally("demo_review_plan", "error")
-        asyncio.create_task(async_db_increment("demo_review_plan", "error"))
+        record_request("demo_review_plan", "error")
         raise HTTPException(status_code=429, detail="Rate limit exceeded") from exc
     except Exception as exc:
         logger.error("Demo API error", error=str(exc))
-        REQUEST_COUNTER.labels(tool="demo_review_plan", status="error").inc()
-        increment_tally("demo_review_plan", "error")
-        asyncio.create_task(async_db_increment("demo_review_plan", "error"))
+        record_request("demo_review_plan", "error")
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
@@ -1127,7 +4674,7 @@ async def demo_health(_request: Request) -> JSONResponse:
         content={
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
-            "plan_reviews_count": len(plan_reviews),
+            **plan_reviews.stats(),
         }
     )
 
@@ -1148,7 +4695,7 @@ async def health_route(_request: Request) -> JSONResponse:
         content={
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
-            "plan_reviews_count": len(plan_reviews),
+            **plan_reviews.stats(),
         }
     )
 
@@ -1208,16 +4755,15 @@ logger.info(
 # Metrics exposition endpoint
 @mcp.custom_route("/metrics", methods=["GET"])
 async def metrics_endpoint(_request: Request) -> Response:
+    update_metrics_pool_gauges()
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 # Rebind exported http_app after all routes are registered, for tests and embedding
-http_app = mcp.http_app()
+http_app = mcp.http_app(middleware=SERVER_MIDDLEWARE)
 
 if __name__ == "__main__":
-    # Run the server
-    # Initialize DB metrics table if enabled
-    initialize_metrics_db()
+    # Run the server (the metrics DB pool opens on app startup)
     logger.info(
         "Starting MCP server",
         transport="http",
@@ -1226,4 +4772,4 @@ if __name__ == "__main__":
         environment=ENVIRONMENT,
         log_level=LOG_LEVEL,
     )
-    mcp.run(transport="http", host="0.0.0.0", port=8000)
+    mcp.run(transport="http", host="0.0.0.0", port=8000, middleware=SERVER_MIDDLEWARE)
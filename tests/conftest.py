@@ -1,6 +1,10 @@
 """Pytest configuration and shared fixtures."""
+import asyncio
+import json
 import os
-from typing import Generator
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional
 
 import pytest
 from dotenv import load_dotenv
@@ -42,3 +46,78 @@ def test_environment() -> Generator[None, None, None]:
         os.environ["LOG_LEVEL"] = original_log_level
     else:
         os.environ.pop("LOG_LEVEL", None)
+
+
+REVIEW_REPLY = json.dumps(
+    {
+        "overall_score": 0.7,
+        "strengths": ["clear goal"],
+        "weaknesses": [],
+        "suggestions": ["add risks"],
+        "detailed_feedback": "ok",
+    }
+)
+
+
+def default_reply(kwargs: Dict[str, Any]) -> str:
+    """A valid review for review prompts, "ok" for anything else."""
+    messages = kwargs.get("messages") or []
+    if any('"overall_score"' in str(m.get("content", "")) for m in messages):
+        return REVIEW_REPLY
+    return "ok"
+
+
+class FakeUpstream:
+    """Records upstream completion calls and replies with canned text."""
+
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+        self.reply: Callable[[Dict[str, Any]], str] = default_reply
+        self.usage: Any = None
+        self.delay: Callable[[Dict[str, Any]], float] = lambda _kwargs: 0.0
+        self.cancelled = 0
+
+    async def create(
+        self,
+        api_key: str,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        self.calls.append(kwargs)
+        try:
+            await asyncio.sleep(self.delay(kwargs))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        text = self.reply(kwargs)
+        if on_delta is not None:
+            for word in text.split(" "):
+                await on_delta(word + " ")
+        message = SimpleNamespace(content=text)
+        return SimpleNamespace(
+            id=f"chatcmpl-{len(self.calls)}",
+            model=kwargs.get("model"),
+            usage=self.usage,
+            choices=[SimpleNamespace(message=message)],
+        )
+
+
+@pytest.fixture
+def fake_upstream(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Generator[FakeUpstream, None, None]:
+    """Stub header config and upstream completions for offline tool tests."""
+    import server
+
+    upstream = FakeUpstream()
+    repository = server.SQLiteReviewRepository(str(tmp_path / "reviews.db"))
+    monkeypatch.setattr(server, "review_repository", repository)
+    monkeypatch.setattr(
+        server, "get_config_from_headers", lambda: {"api_key": "sk-test"}
+    )
+    monkeypatch.setattr(server, "create_chat_completion", upstream.create)
+    server.phone_a_friend_cache.clear()
+    server.review_plan_cache.clear()
+    server.plan_reviews.clear()
+    yield upstream
+    repository.close()
@@ -0,0 +1,85 @@
+"""Tests for the phone_a_friend_batch tool."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import pytest
+
+import server
+from server import BatchQuestion, mcp
+from tests.conftest import FakeUpstream
+
+phone_a_friend_batch = mcp._tool_manager._tools["phone_a_friend_batch"].fn  # type: ignore[attr-defined]
+
+
+def echo_question(kwargs: Dict[str, Any]) -> str:
+    """Reply with the question line, failing on request."""
+    prompt = kwargs["messages"][-1]["content"]
+    if "fail" in prompt:
+        raise RuntimeError("upstream exploded")
+    return prompt.split("\n")[0]
+
+
+class TestPhoneAFriendBatch:
+    """Tests for batched questions."""
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_order_with_item_errors(
+        self, fake_upstream: FakeUpstream
+    ) -> None:
+        """Each item gets its own answer or error, in input order."""
+        fake_upstream.reply = echo_question
+        result = await phone_a_friend_batch(
+            items=[
+                BatchQuestion(question="one"),
+                BatchQuestion(question="please fail"),
+                BatchQuestion(question="three", context="ctx"),
+            ]
+        )
+        assert result["succeeded"] == 2
+        assert result["failed"] == 1
+        first, second, third = result["results"]
+        assert first == {"index": 0, "answer": "Question: one"}
+        assert second["index"] == 1
+        assert second["error_type"] == "RuntimeError"
+        assert third == {"index": 2, "answer": "Context: ctx"}
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """No more than max_concurrency questions are in flight at once."""
+        in_flight = 0
+        peak = 0
+        original = fake_upstream.create
+
+        async def slow_create(
+            api_key: str,
+            on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+            **kwargs: Any,
+        ) -> Any:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return await original(api_key, on_delta, **kwargs)
+
+        monkeypatch.setattr(server, "create_chat_completion", slow_create)
+        result = await phone_a_friend_batch(
+            items=[BatchQuestion(question=f"q{i}") for i in range(10)],
+            max_concurrency=3,
+        )
+        assert result["succeeded"] == 10
+        assert 1 < peak <= 3
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Oversized batches are rejected up front."""
+        monkeypatch.setattr(server, "BATCH_MAX_ITEMS", 2)
+        with pytest.raises(ValueError):
+            await phone_a_friend_batch(
+                items=[BatchQuestion(question=f"q{i}") for i in range(3)]
+            )
+        assert fake_upstream.calls == []
@@ -0,0 +1,74 @@
+"""Tests for per-call time budgets and deadline propagation."""
+import asyncio
+from typing import Any
+
+import pytest
+
+import server
+from server import ReviewLevel, resolve_timeout
+
+
+def tool(name: str) -> Any:
+    return server.mcp._tool_manager._tools[name].fn
+
+
+class TestResolveTimeout:
+    """Tests for resolve_timeout."""
+
+    def test_defaults_and_overrides(self) -> None:
+        assert resolve_timeout(60, None, {}) == 60
+        assert resolve_timeout(60, 5, {}) == 5
+        assert resolve_timeout(60, 120, {"deadline": 10}) == 10
+
+    def test_review_levels_have_budgets(self) -> None:
+        assert set(server.REVIEW_TIMEOUTS) == set(ReviewLevel)
+        assert (
+            server.REVIEW_TIMEOUTS[ReviewLevel.QUICK]
+            < server.REVIEW_TIMEOUTS[ReviewLevel.EXPERT]
+        )
+
+
+class TestDeadlines:
+    """Tool calls are cancelled when their budget runs out."""
+
+    @pytest.mark.asyncio
+    async def test_phone_a_friend_timeout(self, fake_upstream: Any) -> None:
+        """The upstream call is cancelled and recorded as a timeout."""
+        fake_upstream.delay = lambda _kwargs: 5
+        before = server.REQUEST_TALLIES.get("phone_a_friend", {}).get("timeout", 0)
+        with pytest.raises(TimeoutError):
+            await tool("phone_a_friend")(question="Slow?", timeout_s=0.05)
+        await asyncio.sleep(0)  # let the shared upstream task process its cancel
+        assert fake_upstream.cancelled == 1
+        after = server.REQUEST_TALLIES["phone_a_friend"]["timeout"]
+        assert after == before + 1
+
+    @pytest.mark.asyncio
+    async def test_header_deadline_caps_review(
+        self, fake_upstream: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """X-Request-Deadline caps even an explicit, larger timeout_s."""
+        monkeypatch.setattr(
+            server,
+            "get_config_from_headers",
+            lambda: {"api_key": "sk-test", "deadline": 0.05},
+        )
+        fake_upstream.delay = lambda _kwargs: 5
+        with pytest.raises(TimeoutError):
+            await tool("review_plan")(plan_content="# Plan\nSlow", timeout_s=60)
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_finished_answers(self, fake_upstream: Any) -> None:
+        """Only questions still running at the deadline report a timeout."""
+        fake_upstream.delay = lambda kwargs: (
+            5 if "slow" in kwargs["messages"][0]["content"] else 0
+        )
+        result = await tool("phone_a_friend_batch")(
+            items=[
+                server.BatchQuestion(question="fast one"),
+                server.BatchQuestion(question="slow one"),
+            ],
+            timeout_s=0.1,
+        )
+        assert "answer" in result["results"][0]
+        assert result["results"][1]["error_type"] == "TimeoutError"
@@ -0,0 +1,52 @@
+"""Tests for the latency, token and payload-size histograms."""
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+import server
+from server import ReviewLevel, ToolCallMetrics, text_bytes
+
+pytestmark = pytest.mark.skipif(
+    not server.PROMETHEUS_AVAILABLE, reason="prometheus_client not installed"
+)
+
+
+def sample(name: str, **labels: str) -> float:
+    value = server._pc.REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+class TestToolCallMetrics:
+    """Tests for ToolCallMetrics."""
+
+    def test_request_and_finish_share_labels(self) -> None:
+        labels = {"tool": "probe", "model": "m-1", "review_level": "quick"}
+        before = sample("tool_duration_seconds_count", **labels)
+        metrics = ToolCallMetrics("probe", "quick")
+        metrics.request("m-1", text_bytes("héllo", None, "x"))
+        metrics.finish()
+        assert sample("tool_request_bytes_sum", **labels) >= 7
+        assert sample("tool_duration_seconds_count", **labels) == before + 1
+
+
+class TestToolHistograms:
+    """review_plan observes duration, payload size and token usage."""
+
+    @pytest.mark.asyncio
+    async def test_review_plan_observes_histograms(self, fake_upstream: Any) -> None:
+        labels = {"tool": "review_plan", "model": "gpt-4", "review_level": "quick"}
+        before = sample("tool_duration_seconds_count", **labels)
+        fake_upstream.usage = SimpleNamespace(prompt_tokens=120, completion_tokens=40)
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        await review_plan(
+            plan_content="# Plan\nShip it",
+            review_level=ReviewLevel.QUICK,
+            model="gpt-4",
+        )
+        assert sample("tool_duration_seconds_count", **labels) == before + 1
+        assert sample("tool_request_bytes_count", **labels) >= 1
+        assert sample("upstream_latency_seconds_count", **labels) >= 1
+        assert sample("upstream_request_completion_tokens_sum", **labels) >= 40
+        exposition = server.generate_latest().decode()
+        assert "tool_duration_seconds_bucket" in exposition
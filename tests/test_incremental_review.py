@@ -0,0 +1,145 @@
+"""Tests for incremental plan re-reviews."""
+import json
+from typing import Any, Dict
+
+import pytest
+
+import server
+from server import (
+    api_key_fingerprint,
+    hash_plan_sections,
+    mcp,
+    plan_reviews,
+    plan_section_delta,
+    split_plan_sections,
+)
+from tests.conftest import FakeUpstream
+
+review_plan = mcp._tool_manager._tools["review_plan"].fn  # type: ignore[attr-defined]
+
+PLAN = """Intro paragraph.
+
+# Objectives
+- Ship authentication
+
+## Timeline
+- Week 1: Design
+- Week 2: Build
+
+## Risks
+- Integration complexity
+"""
+
+
+def review_reply(kwargs: Dict[str, Any]) -> str:
+    """Reply with a review whose feedback records the prompt size."""
+    prompt = kwargs["messages"][-1]["content"]
+    return json.dumps(
+        {
+            "overall_score": 0.75,
+            "strengths": ["clear objectives"],
+            "weaknesses": ["thin risks"],
+            "suggestions": ["add mitigations"],
+            "detailed_feedback": f"prompt chars: {len(prompt)}",
+        }
+    )
+
+
+class TestPlanSections:
+    """Tests for section splitting and diffing."""
+
+    def test_split_sections(self) -> None:
+        """Headings start sections and leading text becomes a preamble."""
+        titles = [title for title, _text in split_plan_sections(PLAN)]
+        assert titles == ["(preamble)", "Objectives", "Timeline", "Risks"]
+
+    def test_headings_in_code_fences_are_ignored(self) -> None:
+        """A '#' comment inside a fenced block does not start a section."""
+        plan = "# Setup\n```bash\n# install deps\npip install x\n```\n"
+        assert [t for t, _ in split_plan_sections(plan)] == ["Setup"]
+
+    def test_delta(self) -> None:
+        """Only edited, added and removed sections are reported."""
+        before = hash_plan_sections(split_plan_sections(PLAN))
+        edited = PLAN.replace("Week 2: Build", "Week 2-3: Build").replace(
+            "## Risks\n- Integration complexity\n", "## Budget\n- $10k\n"
+        )
+        after = hash_plan_sections(split_plan_sections(edited))
+        changed, removed = plan_section_delta(before, after)
+        assert changed == ["Timeline", "Budget"]
+        assert removed == ["Risks"]
+
+
+class TestIncrementalReview:
+    """Tests for review_plan(incremental=True)."""
+
+    @pytest.fixture
+    def upstream(self, fake_upstream: FakeUpstream) -> FakeUpstream:
+        """Reply with a fixed review."""
+        fake_upstream.reply = review_reply
+        return fake_upstream
+
+    @pytest.mark.asyncio
+    async def test_only_changed_sections_are_sent(self, upstream: FakeUpstream) -> None:
+        """The follow-up prompt carries the changed section, not the whole plan."""
+        await review_plan(plan_content=PLAN, plan_id="p1", incremental=True)
+        edited = PLAN.replace("Week 2: Build", "Week 2-3: Build")
+        result = await review_plan(plan_content=edited, plan_id="p1", incremental=True)
+
+        prompt = upstream.calls[-1]["messages"][-1]["content"]
+        assert "Week 2-3: Build" in prompt
+        assert "Ship authentication" not in prompt
+        assert "Prior weaknesses" in prompt
+        assert result["incremental"]["changed_sections"] == ["Timeline"]
+        stored = plan_reviews[api_key_fingerprint("sk-test"), "p1"]
+        assert stored.section_hashes == hash_plan_sections(split_plan_sections(edited))
+
+    @pytest.mark.asyncio
+    async def test_unchanged_plan_skips_upstream(self, upstream: FakeUpstream) -> None:
+        """Re-reviewing an unchanged plan returns the stored review."""
+        await review_plan(plan_content=PLAN, plan_id="p2", bypass_cache=True)
+        result = await review_plan(
+            plan_content=PLAN, plan_id="p2", incremental=True, bypass_cache=True
+        )
+        assert len(upstream.calls) == 1
+        assert result["incremental"]["changed_sections"] == []
+        assert result["routing"]["model"] == upstream.calls[0]["model"]
+
+    @pytest.mark.asyncio
+    async def test_changed_inputs_run_a_full_review(
+        self, upstream: FakeUpstream
+    ) -> None:
+        """New focus areas, context or model are not answered from the old review."""
+        await review_plan(plan_content=PLAN, plan_id="p3", bypass_cache=True)
+        for changes in (
+            {"focus_areas": ["budget"]},
+            {"context": "Two engineers"},
+            {"model": "gpt-4o"},
+        ):
+            result = await review_plan(
+                plan_content=PLAN,
+                plan_id="p3",
+                incremental=True,
+                bypass_cache=True,
+                **changes,
+            )
+            assert "incremental" not in result
+            assert (
+                "Ship authentication" in upstream.calls[-1]["messages"][-1]["content"]
+            )
+        assert len(upstream.calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_reviews_are_not_shared_across_api_keys(
+        self, upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Another key reusing a plan_id does not see the first key's review."""
+        await review_plan(plan_content=PLAN, plan_id="shared", bypass_cache=True)
+        monkeypatch.setattr(
+            server, "get_config_from_headers", lambda: {"api_key": "sk-other"}
+        )
+        result = await review_plan(
+            plan_content=PLAN, plan_id="shared", incremental=True, bypass_cache=True
+        )
+        assert "incremental" not in result
+        assert len(upstream.calls) == 2
@@ -0,0 +1,128 @@
+"""Tests for the fake OpenAI server and load generator in scripts/."""
+import httpx
+import openai
+import pytest
+
+import server
+from scripts.fake_openai import FakeOpenAIConfig, create_app, parse_latency
+from scripts.loadtest import TargetStats, percentile
+
+MESSAGES = [{"role": "user", "content": "How should we roll this out?"}]
+
+
+def fake_client(config: FakeOpenAIConfig) -> openai.AsyncOpenAI:
+    transport = httpx.ASGITransport(app=create_app(config))
+    return openai.AsyncOpenAI(
+        api_key="sk-fake",
+        base_url="http://fake/v1",
+        http_client=httpx.AsyncClient(transport=transport),
+        max_retries=0,
+    )
+
+
+class TestFakeOpenAI:
+    """Tests for the stand-in chat completions endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_completion_reports_usage_and_rate_limits(self) -> None:
+        client = fake_client(FakeOpenAIConfig(completion_tokens=8, rpm=100))
+        raw = await client.chat.completions.with_raw_response.create(
+            model="gpt-4o", messages=MESSAGES  # type: ignore[arg-type]
+        )
+        response = raw.parse()
+        assert len(response.choices[0].message.content.split()) == 8
+        assert response.usage.completion_tokens == 8
+        assert raw.headers["x-ratelimit-remaining-requests"] == "99"
+
+    @pytest.mark.asyncio
+    async def test_streaming_with_usage(self) -> None:
+        client = fake_client(FakeOpenAIConfig(completion_tokens=5))
+        stream = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=MESSAGES,  # type: ignore[arg-type]
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        text, usage = "", None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+            usage = chunk.usage or usage
+        assert len(text.split()) == 5
+        assert usage is not None and usage.completion_tokens == 5
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_and_exhausted_budget(self) -> None:
+        client = fake_client(FakeOpenAIConfig(error_rate=1.0, error_statuses=[503]))
+        with pytest.raises(openai.InternalServerError):
+            await client.chat.completions.create(
+                model="gpt-4o", messages=MESSAGES  # type: ignore[arg-type]
+            )
+
+        client = fake_client(FakeOpenAIConfig(rpm=1))
+        await client.chat.completions.create(
+            model="gpt-4o", messages=MESSAGES  # type: ignore[arg-type]
+        )
+        with pytest.raises(openai.RateLimitError) as excinfo:
+            await client.chat.completions.create(
+                model="gpt-4o", messages=MESSAGES  # type: ignore[arg-type]
+            )
+        assert excinfo.value.response.headers["x-ratelimit-remaining-requests"] == "0"
+        assert "retry-after" in excinfo.value.response.headers
+
+    @pytest.mark.asyncio
+    async def test_json_schema_response_format(self) -> None:
+        client = fake_client(FakeOpenAIConfig(completion_tokens=12))
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=MESSAGES,  # type: ignore[arg-type]
+            response_format=server.REVIEW_JSON_SCHEMA_FORMAT,  # type: ignore[arg-type]
+        )
+        review = server.parse_review_json(response.choices[0].message.content)
+        assert review is not None and review["overall_score"] == 0.75
+
+    @pytest.mark.asyncio
+    async def test_prompt_format_review_gets_review_json(self) -> None:
+        """Reviews on models without json_schema still get a parseable review."""
+        messages = server.build_review_messages(
+            server.ReviewLevel.QUICK, "Plan Content:\nShip it"
+        )
+        client = fake_client(FakeOpenAIConfig(completion_tokens=12))
+        response = await client.chat.completions.create(
+            model="gpt-4", messages=messages  # type: ignore[arg-type]
+        )
+        assert server.parse_review_json(response.choices[0].message.content)
+
+        client = fake_client(FakeOpenAIConfig(malformed_rate=1.0))
+        response = await client.chat.completions.create(
+            model="gpt-4", messages=messages  # type: ignore[arg-type]
+        )
+        assert server.parse_review_json(response.choices[0].message.content) is None
+
+    def test_latency_specs(self) -> None:
+        assert parse_latency("fixed:0.25")() == 0.25
+        assert 0.1 <= parse_latency("uniform:0.1,0.2")() <= 0.2
+        assert parse_latency("normal:-5,0.1")() == 0.0
+        with pytest.raises(ValueError):
+            parse_latency("pareto:1")
+
+
+class TestLoadReport:
+    """Tests for load test result aggregation."""
+
+    def test_percentiles(self) -> None:
+        values = [float(n) for n in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 95) == 0.0
+
+    def test_report_separates_errors(self) -> None:
+        stats = TargetStats()
+        for latency in (0.1, 0.2, 0.3):
+            stats.record(latency, None)
+        stats.record(5.0, "http_503")
+        report = stats.report(elapsed=1.5)
+        assert report["requests"] == 4
+        assert report["error_types"] == {"http_503": 1}
+        assert report["throughput_rps"] == 2.0
+        assert report["latency_ms"]["max"] == 300.0
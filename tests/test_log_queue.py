@@ -0,0 +1,120 @@
+"""Tests for level-gated log helpers and the queued log sink."""
+import io
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from queue import Queue
+from typing import Any, Dict, List
+
+import pytest
+
+import server
+from server import DroppingQueueHandler, LogWriter, render_json
+
+
+class RecordingLogger:
+    """Stand-in for the structlog logger with a fixed level."""
+
+    def __init__(self, debug: bool) -> None:
+        self.debug_enabled = debug
+        self.events: List[Dict[str, Any]] = []
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.debug_enabled or level > logging.DEBUG
+
+    def debug(self, event: str, **kwargs: Any) -> None:
+        self.events.append({"event": event, **kwargs})
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+class TestLevelGating:
+    """Debug helpers do no work when DEBUG is filtered out."""
+
+    def test_helpers_skip_when_debug_off(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        fake = RecordingLogger(debug=False)
+        monkeypatch.setattr(server, "logger", fake)
+        messages = [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]
+        server.log_openai_request("gpt-4", messages, 100, "sk-test")
+        server.log_openai_response(object())
+        server.log_mcp_call("phone_a_friend", question="why?")
+        assert fake.events == []
+
+    def test_helpers_log_when_debug_on(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        fake = RecordingLogger(debug=True)
+        monkeypatch.setattr(server, "logger", fake)
+        server.log_mcp_call("phone_a_friend", question="why?", api_key="sk-test")
+        assert fake.events[0]["parameters"] == {"question_length": 4}
+
+    @pytest.mark.asyncio
+    async def test_tool_call_sites_skip_log_fields_when_debug_off(
+        self, fake_upstream: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tools do not even build log_mcp_call arguments at INFO."""
+        calls: List[str] = []
+        monkeypatch.setattr(
+            server, "log_mcp_call", lambda tool, **_kwargs: calls.append(tool)
+        )
+        root = logging.getLogger()
+        level = root.level
+        root.setLevel(logging.INFO)
+        try:
+            phone_a_friend = server.mcp._tool_manager._tools["phone_a_friend"].fn
+            await phone_a_friend(question="x" * 500)
+        finally:
+            root.setLevel(level)
+        assert calls == []
+
+
+class TestPrometheusFallback:
+    """The server runs without the optional prometheus_client package."""
+
+    def test_import_without_prometheus_client(self) -> None:
+        code = (
+            "import sys; sys.modules['prometheus_client'] = None; "
+            "import server; assert not server.PROMETHEUS_AVAILABLE; "
+            "server.LOG_RECORDS_DROPPED.inc()"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(server.__file__).parent,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+
+
+class TestQueuedSink:
+    """Tests for DroppingQueueHandler and LogWriter."""
+
+    def test_full_queue_drops_instead_of_blocking(self) -> None:
+        handler = DroppingQueueHandler(Queue(maxsize=1))
+        handler.handle(make_record("kept"))
+        handler.handle(make_record("dropped"))
+        assert handler.dropped == 1
+        assert handler.queue.get_nowait().getMessage() == "kept"
+
+    def test_writer_formats_on_its_thread_and_flushes_on_stop(self) -> None:
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        handler = DroppingQueueHandler(Queue(maxsize=100))
+        writer = LogWriter(handler.queue, target)
+        writer.start()
+        for n in range(20):
+            handler.handle(make_record(f"line {n}"))
+        writer.stop()
+        writer.stop()  # idempotent, e.g. shutdown hook then atexit
+        lines = stream.getvalue().splitlines()
+        assert lines[0] == "INFO line 0" and len(lines) == 20
+
+    def test_render_json_handles_arbitrary_values(self) -> None:
+        rendered = render_json({"event": "x", 1: "one", "obj": object()}, default=repr)
+        data = json.loads(rendered)
+        assert data["1"] == "one"
+        assert data["obj"].startswith("<object")
@@ -0,0 +1,122 @@
+"""Tests for map-reduce review of large plans."""
+import json
+from typing import Any, Dict
+
+import pytest
+
+import server
+from server import chunk_plan_sections, estimate_tokens, mcp, split_plan_sections
+from tests.conftest import FakeUpstream
+
+review_plan = mcp._tool_manager._tools["review_plan"].fn  # type: ignore[attr-defined]
+
+LARGE_PLAN = "\n\n".join(
+    f"## Section {i}\n" + "\n".join(f"- step {i}.{j} " + "x" * 60 for j in range(10))
+    for i in range(6)
+)
+
+
+def map_reduce_reply(kwargs: Dict[str, Any]) -> str:
+    """Score parts by number and reply to the reduce step with merged findings."""
+    prompt = kwargs["messages"][-1]["content"]
+    if "Partial reviews:" in prompt:
+        return json.dumps(
+            {
+                "overall_score": 0.1,
+                "strengths": ["merged strength"],
+                "weaknesses": ["merged weakness"],
+                "suggestions": ["merged suggestion"],
+                "detailed_feedback": "merged feedback",
+            }
+        )
+    score = 0.9 if "part 1 of" in prompt else 0.5
+    return json.dumps(
+        {
+            "overall_score": score,
+            "strengths": ["s"],
+            "weaknesses": ["w"],
+            "suggestions": ["g"],
+            "detailed_feedback": "part feedback",
+        }
+    )
+
+
+class TestChunking:
+    """Tests for section-aware chunking."""
+
+    def test_chunks_respect_budget(self) -> None:
+        """Every chunk stays within the token budget and nothing is lost."""
+        sections = split_plan_sections(LARGE_PLAN)
+        chunks = chunk_plan_sections(sections, max_tokens=300)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert sum(estimate_tokens(text) for _title, text in chunk) <= 300
+        joined = "".join(text for chunk in chunks for _title, text in chunk)
+        assert joined.count("step") == 60
+
+    def test_oversized_section_is_split(self) -> None:
+        """A single section larger than the budget is split into parts."""
+        sections = [("Huge", "\n".join("y" * 100 for _ in range(50)))]
+        chunks = chunk_plan_sections(sections, max_tokens=200)
+        titles = [title for chunk in chunks for title, _text in chunk]
+        assert len(titles) > 1
+        assert titles[0] == "Huge (part 1)"
+
+
+class TestMapReduceReview:
+    """Tests for review_plan on plans above the map-reduce threshold."""
+
+    @pytest.mark.asyncio
+    async def test_large_plan_is_reviewed_in_parallel_chunks(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Chunks are reviewed separately and merged with a weighted score."""
+        monkeypatch.setattr(server, "MAP_REDUCE_THRESHOLD_TOKENS", 500)
+        monkeypatch.setattr(server, "MAP_REDUCE_CHUNK_TOKENS", 600)
+        fake_upstream.reply = map_reduce_reply
+
+        result = await review_plan(plan_content=LARGE_PLAN, bypass_cache=True)
+
+        chunks = result["map_reduce"]["chunks"]
+        assert chunks > 1
+        assert len(fake_upstream.calls) == chunks + 1
+        assert result["strengths"] == ["merged strength"]
+        assert result["detailed_feedback"] == "merged feedback"
+        # Weighted mean of the part scores, not the reduce step's own score
+        assert 0.5 < result["overall_score"] < 0.9
+
+    @pytest.mark.asyncio
+    async def test_malformed_chunk_fails_the_review(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """No made-up score is averaged in for a chunk that did not parse."""
+        monkeypatch.setattr(server, "MAP_REDUCE_THRESHOLD_TOKENS", 500)
+        monkeypatch.setattr(server, "MAP_REDUCE_CHUNK_TOKENS", 600)
+
+        def reply(kwargs: Dict[str, Any]) -> str:
+            if "part 2 of" in kwargs["messages"][-1]["content"]:
+                return "This part looks fine to me."
+            return map_reduce_reply(kwargs)
+
+        fake_upstream.reply = reply
+        with pytest.raises(server.MalformedReviewError):
+            await review_plan(plan_content=LARGE_PLAN, bypass_cache=True)
+
+    @pytest.mark.asyncio
+    async def test_malformed_reduce_merges_locally(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A reduce step that does not parse falls back to the chunk findings."""
+        monkeypatch.setattr(server, "MAP_REDUCE_THRESHOLD_TOKENS", 500)
+        monkeypatch.setattr(server, "MAP_REDUCE_CHUNK_TOKENS", 600)
+
+        def reply(kwargs: Dict[str, Any]) -> str:
+            if "Partial reviews:" in kwargs["messages"][-1]["content"]:
+                return "Merged: all good."
+            return map_reduce_reply(kwargs)
+
+        fake_upstream.reply = reply
+        result = await review_plan(plan_content=LARGE_PLAN, bypass_cache=True)
+        assert result["strengths"] == ["s"]
+        assert "Part 1" in result["detailed_feedback"]
+        assert 0.5 < result["overall_score"] < 0.9
@@ -56,3 +56,25 @@ def test_prometheus_metrics_endpoint() -> None:
     assert res.status_code == 200
     assert "text/plain" in res.headers.get("content-type", "")
 
+
+def test_metrics_summary_etag_revalidation() -> None:
+    client = TestClient(server.http_app)
+    res = client.get("/api/metrics/summary")
+    etag = res.headers["etag"]
+    assert "max-age" in res.headers["cache-control"]
+    res = client.get("/api/metrics/summary", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    server.increment_tally("etag_test", "success")
+    res = client.get("/api/metrics/summary", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+
+
+def test_metrics_summary_serves_materialized_db_totals() -> None:
+    cache = server.MetricsSummaryCache(interval=30)
+    cache.db_tallies = {"review_plan": {"success": 7}}
+    cache.db_generated_at = "2025-01-01T00:00:00"
+    content, etag = cache.snapshot()
+    assert content["source"] == "database"
+    assert content["tallies"] == {"review_plan": {"success": 7}}
+    assert cache.snapshot()[1] == etag
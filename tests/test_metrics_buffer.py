@@ -0,0 +1,100 @@
+"""Tests for write-behind batching of request_counts metrics."""
+import asyncio
+from datetime import date
+from typing import Any, Dict, List
+
+import pytest
+
+import server
+from server import RequestCountBuffer
+
+
+@pytest.fixture
+def flushed(monkeypatch: pytest.MonkeyPatch) -> List[Dict[Any, int]]:
+    """Capture batches passed to the DB flush instead of writing them."""
+    batches: List[Dict[Any, int]] = []
+
+    async def fake_flush(counts: Dict[Any, int]) -> bool:
+        batches.append(dict(counts))
+        return True
+
+    monkeypatch.setattr(server, "db_flush_counts", fake_flush)
+    return batches
+
+
+class TestRequestCountBuffer:
+    """Tests for RequestCountBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_per_key(self, flushed: List[Dict[Any, int]]) -> None:
+        """Repeated increments become one count per (tool, status, day)."""
+        buffer = RequestCountBuffer(interval=60, max_pending=100)
+        for _ in range(3):
+            buffer.add("phone_a_friend", "success")
+        buffer.add("phone_a_friend", "error")
+        await buffer.aclose()
+        today = date.today()
+        assert flushed == [
+            {
+                ("phone_a_friend", "success", today): 3,
+                ("phone_a_friend", "error", today): 1,
+            }
+        ]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_triggers_flush(
+        self, flushed: List[Dict[Any, int]]
+    ) -> None:
+        """Reaching max_pending flushes without waiting for the timer."""
+        buffer = RequestCountBuffer(interval=60, max_pending=2)
+        buffer.add("review_plan", "success")
+        buffer.add("review_plan", "success")
+        await asyncio.sleep(0.05)
+        assert len(flushed) == 1
+        await buffer.aclose()
+
+    @pytest.mark.asyncio
+    async def test_timer_flush(self, flushed: List[Dict[Any, int]]) -> None:
+        """Buffered counts are written on the flush interval."""
+        buffer = RequestCountBuffer(interval=0.01, max_pending=100)
+        buffer.add("review_plan", "success")
+        await asyncio.sleep(0.1)
+        assert len(flushed) == 1
+        await buffer.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Counts from a failed flush are kept for the next attempt."""
+        results = iter([False, True])
+        batches: List[Dict[Any, int]] = []
+
+        async def flaky_flush(counts: Dict[Any, int]) -> bool:
+            batches.append(dict(counts))
+            return next(results)
+
+        monkeypatch.setattr(server, "db_flush_counts", flaky_flush)
+        buffer = RequestCountBuffer(interval=60, max_pending=100)
+        buffer.add("review_plan", "success")
+        await buffer.flush()
+        assert buffer.pending == 1
+        buffer.add("review_plan", "success")
+        await buffer.aclose()
+        assert list(batches[-1].values()) == [2]
+
+
+class TestMetricsDB:
+    """Tests for the pooled metrics DB helpers."""
+
+    @pytest.mark.asyncio
+    async def test_flush_without_tracking_drops_counts(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """With tracking off, no pool is opened and counts are not retried."""
+        monkeypatch.setattr(server, "TRACK_METRICS_DB", False)
+        counts = {("review_plan", "success", date.today()): 1}
+        assert await server.db_flush_counts(counts) is True
+        assert await server.initialize_metrics_db() is None
+        assert server._metrics_pool is None
@@ -0,0 +1,63 @@
+"""Tests for the live metrics SSE broadcast."""
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import TallyBroadcaster
+
+
+def parse_event(raw: str) -> tuple[str, dict]:
+    lines = dict(line.split(": ", 1) for line in raw.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+class TestTallyBroadcaster:
+    """Tests for TallyBroadcaster."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_into_one_shared_event(self) -> None:
+        """Increments within an interval become one event for every viewer."""
+        broadcaster = TallyBroadcaster(interval=0.01)
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+        broadcaster.mark("review_plan", "success")
+        broadcaster.mark("review_plan", "success")
+        broadcaster.mark("phone_a_friend", "error")
+        await asyncio.sleep(0.05)
+        event = first.get_nowait()
+        assert second.get_nowait() is event
+        assert first.empty()
+        name, data = parse_event(event)
+        assert name == "delta"
+        assert data["tallies"] == {
+            "review_plan": {"success": 2},
+            "phone_a_friend": {"error": 1},
+        }
+
+    def test_no_viewers_no_work(self) -> None:
+        """Without subscribers increments are not buffered."""
+        broadcaster = TallyBroadcaster(interval=1)
+        broadcaster.mark("review_plan", "success")
+        assert broadcaster._pending == {}
+
+    @pytest.mark.asyncio
+    async def test_slow_viewer_gets_snapshot(self) -> None:
+        """A full queue is replaced by a snapshot event."""
+        broadcaster = TallyBroadcaster(interval=0.001, max_queue=1)
+        queue = broadcaster.subscribe()
+        for _ in range(2):
+            broadcaster.mark("review_plan", "success")
+            await asyncio.sleep(0.01)
+        name, data = parse_event(queue.get_nowait())
+        assert name == "snapshot"
+        assert "tallies" in data
+
+
+def test_metrics_stream_viewer_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(server, "METRICS_STREAM_MAX_CLIENTS", 0)
+    client = TestClient(server.http_app)
+    res = client.get("/api/metrics/stream")
+    assert res.status_code == 503
@@ -0,0 +1,170 @@
+"""Tests for the latency-aware model router."""
+import json
+from typing import Any, Dict, List
+
+import httpx
+import openai
+import pytest
+
+import server
+from server import ModelRouter, ReviewLevel
+
+ROUTES = {"quick": ["fast", "strong"]}
+REQUEST = httpx.Request("POST", "https://example.invalid")
+
+
+@pytest.fixture
+def router(monkeypatch: pytest.MonkeyPatch) -> ModelRouter:
+    monkeypatch.setattr(server, "MODEL_ROUTER_ENABLED", True)
+    return ModelRouter(
+        ROUTES, latency_slo=10, max_error_rate=0.3, alpha=0.5, stats_ttl=300
+    )
+
+
+class TestModelRouter:
+    """Tests for ModelRouter."""
+
+    def test_prefers_first_healthy_candidate(self, router: ModelRouter) -> None:
+        assert router.choose("quick") == ("fast", "preferred")
+        router.observe("fast", 2.0, ok=True)
+        assert router.choose("quick") == ("fast", "preferred")
+
+    def test_falls_back_when_slo_breached(self, router: ModelRouter) -> None:
+        """A model whose EWMA latency exceeds the SLO is skipped."""
+        router.observe("fast", 30.0, ok=True)
+        assert router.choose("quick") == ("strong", "fallback")
+
+    def test_error_rate_triggers_fallback(self, router: ModelRouter) -> None:
+        router.observe("fast", 1.0, ok=True)
+        router.observe("fast", None, ok=False)
+        assert router.stats("fast")["error_rate"] == 0.5
+        assert router.choose("quick")[0] == "strong"
+
+    def test_all_degraded_picks_fastest(self, router: ModelRouter) -> None:
+        router.observe("fast", 40.0, ok=True)
+        router.observe("strong", 20.0, ok=True)
+        assert router.choose("quick") == ("strong", "degraded")
+
+    def test_stale_stats_are_probed_again(
+        self, router: ModelRouter, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        router.observe("fast", 30.0, ok=True)
+        later = server.time.monotonic() + 600
+        monkeypatch.setattr(server.time, "monotonic", lambda: later)
+        assert router.choose("quick") == ("fast", "preferred")
+
+    def test_disabled_uses_default_model(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(server, "MODEL_ROUTER_ENABLED", False)
+        router = ModelRouter(ROUTES, 10, 0.3, 0.5, 300)
+        assert router.choose("quick") == (server.DEFAULT_MODEL, "default")
+
+
+class TestRoutingMetadata:
+    """review_plan reports its routing decision."""
+
+    @pytest.mark.asyncio
+    async def test_review_result_has_routing(
+        self, fake_upstream: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(server, "MODEL_ROUTER_ENABLED", True)
+        fake_upstream.reply = lambda _kwargs: json.dumps(
+            {
+                "overall_score": 0.8,
+                "strengths": [],
+                "weaknesses": [],
+                "suggestions": [],
+                "detailed_feedback": "fine",
+            }
+        )
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        result = await review_plan(
+            plan_content="# Plan\nShip", review_level=ReviewLevel.QUICK
+        )
+        routing = result["routing"]
+        assert routing["model"] == server.model_router.routes["quick"][0]
+        assert routing["reason"] in {"preferred", "fallback", "degraded"}
+        assert fake_upstream.calls[0]["model"] == routing["model"]
+
+        result = await review_plan(plan_content="# Plan\nOther", model="gpt-4")
+        assert result["routing"]["reason"] == "parameter"
+
+
+class TestRouterObservations:
+    """Only upstream faults count against a model's health."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "exc",
+        [
+            openai.BadRequestError(
+                "bad", response=httpx.Response(400, request=REQUEST), body=None
+            ),
+            openai.AuthenticationError(
+                "no", response=httpx.Response(401, request=REQUEST), body=None
+            ),
+            openai.RateLimitError(
+                "slow", response=httpx.Response(429, request=REQUEST), body=None
+            ),
+            server.CircuitOpenError(
+                "open", response=server.synthetic_upstream_response(503), body=None
+            ),
+        ],
+    )
+    async def test_caller_errors_are_not_observed(
+        self, exc: Exception, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        observed: List[bool] = []
+        monkeypatch.setattr(
+            server.model_router, "observe", lambda _m, _l, ok: observed.append(ok)
+        )
+
+        async def fail(*_args: Any, **_kwargs: Any) -> Any:
+            raise exc
+
+        monkeypatch.setattr(server, "create_chat_completion", fail)
+        with pytest.raises(type(exc)):
+            await server.call_upstream("phone_a_friend", "sk-test", model="gpt-4")
+        assert observed == []
+
+    @pytest.mark.asyncio
+    async def test_upstream_faults_are_observed(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        observed: List[bool] = []
+        monkeypatch.setattr(
+            server.model_router, "observe", lambda _m, _l, ok: observed.append(ok)
+        )
+
+        async def fail(*_args: Any, **_kwargs: Any) -> Any:
+            raise openai.InternalServerError(
+                "boom", response=httpx.Response(500, request=REQUEST), body=None
+            )
+
+        monkeypatch.setattr(server, "create_chat_completion", fail)
+        with pytest.raises(openai.InternalServerError):
+            await server.call_upstream("phone_a_friend", "sk-test", model="gpt-4")
+        assert observed == [False]
+
+
+class TestRoutedModelLogging:
+    """phone_a_friend tools log the model they actually route to."""
+
+    @pytest.mark.asyncio
+    async def test_logged_model_matches_upstream_model(
+        self, fake_upstream: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(server, "MODEL_ROUTER_ENABLED", True)
+        logged: List[Dict[str, Any]] = []
+        monkeypatch.setattr(
+            server, "log_mcp_call", lambda _tool, **kwargs: logged.append(kwargs)
+        )
+        monkeypatch.setattr(server.logger, "isEnabledFor", lambda _level: True)
+        tools = server.mcp._tool_manager._tools
+        await tools["phone_a_friend"].fn(question="Why?")
+        await tools["phone_a_friend_batch"].fn(
+            items=[server.BatchQuestion(question="Why?")]
+        )
+        assert [entry["model"] for entry in logged] == [
+            call["model"] for call in fake_upstream.calls
+        ]
+        assert logged[0]["model_source"] not in {"parameter", "header"}
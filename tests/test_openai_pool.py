@@ -0,0 +1,84 @@
+"""Tests for the pooled async OpenAI client layer."""
+import asyncio
+import time
+from typing import Any
+
+import openai
+import pytest
+
+from server import OpenAIClientPool, api_key_fingerprint
+
+
+class TestOpenAIClientPool:
+    """Tests for OpenAIClientPool."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_client_per_key(self) -> None:
+        """The same API key returns the same async client."""
+        pool = OpenAIClientPool(max_clients=4)
+        try:
+            first = pool.get("sk-test-one")
+            second = pool.get("sk-test-one")
+            assert isinstance(first, openai.AsyncOpenAI)
+            assert first is second
+            assert len(pool) == 1
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_clients_share_connection_pool(self) -> None:
+        """Different keys get different clients over one HTTP pool."""
+        pool = OpenAIClientPool(max_clients=4)
+        try:
+            one = pool.get("sk-test-one")
+            two = pool.get("sk-test-two")
+            assert one is not two
+            assert one._client is two._client
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self) -> None:
+        """The least recently used key is evicted past capacity."""
+        pool = OpenAIClientPool(max_clients=2)
+        try:
+            one = pool.get("sk-test-one")
+            pool.get("sk-test-two")
+            pool.get("sk-test-one")
+            pool.get("sk-test-three")
+            assert len(pool) == 2
+            assert pool.get("sk-test-one") is one
+            assert api_key_fingerprint("sk-test-two") not in pool._clients
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_reap_idle(self) -> None:
+        """Clients idle past the TTL are dropped."""
+        pool = OpenAIClientPool(max_clients=4, idle_ttl=10)
+        try:
+            pool.get("sk-test-one")
+            assert pool.reap_idle(time.monotonic() + 60) == 1
+            assert len(pool) == 0
+        finally:
+            await pool.aclose()
+
+    def test_loop_change_closes_previous_http_client(self) -> None:
+        """A pool reused on a new event loop closes the client it replaces."""
+        pool = OpenAIClientPool(max_clients=4)
+
+        async def first() -> Any:
+            pool.get("sk-test-one")
+            return pool._http_client
+
+        async def second() -> Any:
+            pool.get("sk-test-one")
+            replaced = pool._http_client
+            await pool.aclose()
+            return replaced
+
+        old = asyncio.run(first())
+        new = asyncio.run(second())
+        assert new is not old
+        assert old.is_closed
+        assert new.is_closed
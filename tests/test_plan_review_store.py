@@ -0,0 +1,76 @@
+"""Tests for the bounded plan review store."""
+import time
+from typing import Any
+
+import pytest
+
+import server
+from server import PlanReview, PlanReviewStore, ReviewLevel
+
+OWNER = "owner-1"
+
+
+def make_review(plan_id: str, feedback: str = "fine") -> PlanReview:
+    return PlanReview(
+        plan_id=plan_id,
+        review_level=ReviewLevel.QUICK,
+        overall_score=0.5,
+        strengths=[],
+        weaknesses=[],
+        suggestions=[],
+        detailed_feedback=feedback,
+    )
+
+
+class TestPlanReviewStore:
+    """Tests for PlanReviewStore."""
+
+    def test_entry_limit_evicts_least_recently_used(self) -> None:
+        """The oldest untouched review goes first past max_entries."""
+        store = PlanReviewStore(max_entries=2, max_bytes=1 << 20, ttl=60)
+        store[OWNER, "a"] = make_review("a")
+        store[OWNER, "b"] = make_review("b")
+        assert store.get((OWNER, "a")) is not None
+        store[OWNER, "c"] = make_review("c")
+        assert len(store) == 2
+        assert (OWNER, "a") in store and (OWNER, "b") not in store
+
+    def test_byte_budget(self) -> None:
+        """Large reviews push older ones out and bytes are tracked."""
+        store = PlanReviewStore(max_entries=10, max_bytes=3000, ttl=60)
+        store[OWNER, "a"] = make_review("a", "x" * 1000)
+        store[OWNER, "b"] = make_review("b", "x" * 1000)
+        store[OWNER, "c"] = make_review("c", "x" * 1000)
+        assert (OWNER, "a") not in store
+        assert 0 < store.current_bytes <= 3000
+        store.clear()
+        assert store.stats() == {"plan_reviews_count": 0, "plan_reviews_bytes": 0}
+
+    def test_ttl_expiry(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Reviews older than the TTL are dropped and excluded from stats."""
+        store = PlanReviewStore(max_entries=10, max_bytes=1 << 20, ttl=10)
+        store[OWNER, "a"] = make_review("a")
+        later = time.monotonic() + 60
+        monkeypatch.setattr(server.time, "monotonic", lambda: later)
+        assert store.stats()["plan_reviews_count"] == 0
+        with pytest.raises(KeyError):
+            store[OWNER, "a"]
+
+    def test_entries_are_scoped_by_owner(self) -> None:
+        """The same plan_id under another owner is a separate entry."""
+        store = PlanReviewStore(max_entries=10, max_bytes=1 << 20, ttl=60)
+        store[OWNER, "a"] = make_review("a", "mine")
+        assert store.get(("owner-2", "a")) is None
+        store["owner-2", "a"] = make_review("a", "theirs")
+        assert store[OWNER, "a"].detailed_feedback == "mine"
+        assert len(store) == 2
+
+    @pytest.mark.asyncio
+    async def test_health_check_reports_store(self, fake_upstream: Any) -> None:
+        """health_check reports entry count and approximate bytes."""
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        health_check = server.mcp._tool_manager._tools["health_check"].fn
+        await review_plan(plan_content="# Plan\nDo things", plan_id="p1")
+        result = await health_check()
+        assert result["plan_reviews_count"] == 1
+        assert result["plan_reviews_bytes"] > 0
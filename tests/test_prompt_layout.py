@@ -0,0 +1,68 @@
+"""Tests for the prefix-stable review prompt layout."""
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+import server
+from server import ReviewLevel, build_review_messages
+
+
+def counter_value(counter: Any, **labels: str) -> float:
+    """Read a labelled counter, tolerating the dummy fallback."""
+    child = counter.labels(**labels)
+    value = getattr(child, "_value", None)
+    return value.get() if value is not None else 0.0
+
+
+class TestReviewMessages:
+    """Tests for build_review_messages."""
+
+    def test_system_prompt_is_static_per_level(self) -> None:
+        """Different plans, focus areas and context share one system prefix."""
+        first = build_review_messages(
+            ReviewLevel.STANDARD, "Plan A", ["security"], "startup"
+        )
+        second = build_review_messages(ReviewLevel.STANDARD, "Plan B")
+        assert first[0] == second[0]
+        assert first[0]["role"] == "system"
+        assert "Plan A" not in first[0]["content"]
+        assert not first[0]["content"].startswith((" ", "\n"))
+
+    def test_levels_have_distinct_frameworks(self) -> None:
+        """Each review level compiles to its own system prompt."""
+        prompts = {server.REVIEW_SYSTEM_PROMPTS[level] for level in ReviewLevel}
+        assert len(prompts) == len(ReviewLevel)
+
+    def test_variable_content_follows_in_user_message(self) -> None:
+        """Focus areas and context precede the plan in the user message."""
+        messages = build_review_messages(
+            ReviewLevel.QUICK, "Plan Content:\nShip it", ["cost"], "small team"
+        )
+        user = messages[1]["content"]
+        assert user.index("cost") < user.index("small team") < user.index("Ship")
+
+
+class TestPromptCacheMetrics:
+    """Tests for upstream prompt cache accounting."""
+
+    @pytest.mark.asyncio
+    async def test_cached_tokens_are_counted(self, fake_upstream: Any) -> None:
+        """Cached prompt tokens reported upstream feed the counters."""
+        fake_upstream.usage = SimpleNamespace(
+            prompt_tokens=1200,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+        bucket = server.api_key_bucket(server.api_key_fingerprint("sk-test"))
+        labels = {"tool": "review_plan", "model": "gpt-4", "key_bucket": bucket}
+        before = counter_value(server.UPSTREAM_CACHED_PROMPT_TOKENS, **labels)
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        await review_plan(plan_content="# Plan\nDo things", model="gpt-4")
+        after = counter_value(server.UPSTREAM_CACHED_PROMPT_TOKENS, **labels)
+        if server.PROMETHEUS_AVAILABLE:
+            assert after - before == 1024
+        assert fake_upstream.calls[0]["messages"][0]["role"] == "system"
+
+    def test_missing_usage_is_ignored(self) -> None:
+        """Responses without usage data are skipped."""
+        server.record_token_usage("phone_a_friend", "gpt-4", "sk-x", "none", object())
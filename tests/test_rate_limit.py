@@ -0,0 +1,105 @@
+"""Tests for the client-side upstream rate limiter."""
+import asyncio
+from typing import Any, Dict
+
+import httpx
+import openai
+import pytest
+
+import server
+from server import RateLimiter, parse_reset_duration
+
+HEADERS = {
+    "x-ratelimit-limit-requests": "60",
+    "x-ratelimit-remaining-requests": "59",
+    "x-ratelimit-reset-requests": "1s",
+    "x-ratelimit-limit-tokens": "1000",
+    "x-ratelimit-remaining-tokens": "0",
+    "x-ratelimit-reset-tokens": "6m0s",
+}
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter and header parsing."""
+
+    def test_parse_reset_duration(self) -> None:
+        assert parse_reset_duration("6m0s") == 360
+        assert parse_reset_duration("20ms") == pytest.approx(0.02)
+        assert parse_reset_duration("1h2m3.5s") == pytest.approx(3723.5)
+        assert parse_reset_duration("") is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_limits_do_not_delay(self) -> None:
+        """Before any headers are seen calls pass straight through."""
+        limiter = RateLimiter("gpt-4", max_wait=0.01)
+        for _ in range(100):
+            await limiter.acquire(10_000)
+
+    @pytest.mark.asyncio
+    async def test_exhausted_bucket_fails_fast(self) -> None:
+        """A wait beyond max_wait raises a RateLimitError without calling out."""
+        limiter = RateLimiter("gpt-4", max_wait=0.5)
+        limiter.update_from_headers(HEADERS)
+        with pytest.raises(openai.RateLimitError):
+            await limiter.acquire(500)
+
+    @pytest.mark.asyncio
+    async def test_short_deficit_queues(self) -> None:
+        """Calls wait for the bucket to refill when that fits in max_wait."""
+        limiter = RateLimiter("gpt-4", max_wait=5)
+        limiter.update_from_headers(
+            {
+                "x-ratelimit-limit-requests": "10",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "200ms",
+            }
+        )
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await limiter.acquire(1)
+        assert loop.time() - started >= 0.015
+
+
+class TestCreateChatCompletion:
+    """create_chat_completion seeds the limiter from response headers."""
+
+    @pytest.mark.asyncio
+    async def test_headers_seed_limiter(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            body: Dict[str, Any] = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "hi"},
+                    }
+                ],
+            }
+            return httpx.Response(200, json=body, headers=HEADERS)
+
+        client = openai.AsyncOpenAI(
+            api_key="sk-test",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(server.openai_clients, "get", lambda _key: client)
+        registry = server.RateLimiterRegistry(max_keys=4, max_wait=0.1)
+        monkeypatch.setattr(server, "rate_limiters", registry)
+        monkeypatch.setattr(server, "circuit_breakers", {})
+
+        response = await server.create_chat_completion(
+            "sk-test",
+            model="gpt-4",
+            messages=[{"role": "user", "content": "hello"}],
+            max_tokens=100,
+        )
+        assert response.choices[0].message.content == "hi"
+        limiter = registry.get("sk-test", "gpt-4")
+        assert limiter.tokens.limit == 1000
+        with pytest.raises(openai.RateLimitError):
+            await server.create_chat_completion(
+                "sk-test", model="gpt-4", messages=[], max_tokens=500
+            )
@@ -0,0 +1,175 @@
+"""Tests for upstream retries and the circuit breaker."""
+from typing import Any, Dict, List
+
+import httpx
+import openai
+import pytest
+
+import server
+from server import CircuitBreaker, CircuitOpenError, retry_reason
+
+
+def completion_body() -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "ok"},
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def scripted_upstream(monkeypatch: pytest.MonkeyPatch) -> List[httpx.Response]:
+    """Serve queued responses to create_chat_completion without delays."""
+    responses: List[httpx.Response] = []
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    client = openai.AsyncOpenAI(
+        api_key="sk-test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(server.openai_clients, "get", lambda _key: client)
+    monkeypatch.setattr(server, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(server, "UPSTREAM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(server, "circuit_breakers", {})
+    return responses
+
+
+async def complete() -> Any:
+    return await server.create_chat_completion(
+        "sk-test", model="gpt-4", messages=[{"role": "user", "content": "hi"}]
+    )
+
+
+class TestRetries:
+    """Tests for retrying transient upstream failures."""
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(
+        self, scripted_upstream: List[httpx.Response]
+    ) -> None:
+        """A 503 then a 429 with Retry-After are retried to success."""
+        scripted_upstream.extend(
+            [
+                httpx.Response(503, json={"error": {"message": "busy"}}),
+                httpx.Response(
+                    429,
+                    json={"error": {"message": "slow down"}},
+                    headers={"retry-after-ms": "5"},
+                ),
+                httpx.Response(200, json=completion_body()),
+            ]
+        )
+        response = await complete()
+        assert response.choices[0].message.content == "ok"
+        assert scripted_upstream == []
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(
+        self, scripted_upstream: List[httpx.Response]
+    ) -> None:
+        scripted_upstream.extend(
+            [
+                httpx.Response(400, json={"error": {"message": "bad"}}),
+                httpx.Response(200, json=completion_body()),
+            ]
+        )
+        with pytest.raises(openai.BadRequestError):
+            await complete()
+        assert len(scripted_upstream) == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(
+        self,
+        scripted_upstream: List[httpx.Response],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(server, "UPSTREAM_MAX_RETRIES", 1)
+        scripted_upstream.extend(
+            [httpx.Response(500, json={"error": {"message": "boom"}})] * 3
+        )
+        with pytest.raises(openai.InternalServerError):
+            await complete()
+        assert len(scripted_upstream) == 1
+
+    def test_retry_classification(self) -> None:
+        request = httpx.Request("POST", "https://example.invalid")
+        assert retry_reason(openai.APIConnectionError(request=request)) == (
+            "connection"
+        )
+        assert retry_reason(ValueError("nope")) is None
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+
+    def test_opens_and_probes(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Consecutive failures open the circuit; one probe closes it again."""
+        now = [1000.0]
+        monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker("gpt-4", failure_threshold=2, reset_timeout=30)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        now[0] += 31
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(
+        self,
+        scripted_upstream: List[httpx.Response],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(server, "UPSTREAM_MAX_RETRIES", 0)
+        monkeypatch.setattr(server, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 1)
+        scripted_upstream.append(httpx.Response(502, json={"error": {}}))
+        with pytest.raises(openai.InternalServerError):
+            await complete()
+        scripted_upstream.append(httpx.Response(200, json=completion_body()))
+        with pytest.raises(CircuitOpenError):
+            await complete()
+        assert len(scripted_upstream) == 1
+
+    @pytest.mark.asyncio
+    async def test_timeouts_and_conflicts_do_not_open_circuit(
+        self,
+        scripted_upstream: List[httpx.Response],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Only connection errors and 5xx count as breaker failures."""
+        monkeypatch.setattr(server, "UPSTREAM_MAX_RETRIES", 0)
+        monkeypatch.setattr(server, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 1)
+        scripted_upstream.append(httpx.Response(408, json={"error": {}}))
+        with pytest.raises(openai.APIStatusError):
+            await complete()
+        scripted_upstream.append(httpx.Response(409, json={"error": {}}))
+        with pytest.raises(openai.ConflictError):
+            await complete()
+        breaker = server.circuit_breaker_for("gpt-4")
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        async def time_out(*_args: Any) -> Any:
+            raise openai.APITimeoutError(httpx.Request("POST", "https://x.invalid"))
+
+        monkeypatch.setattr(server, "attempt_chat_completion", time_out)
+        with pytest.raises(openai.APITimeoutError):
+            await complete()
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,142 @@
+"""Tests for the phone_a_friend and review_plan response caches."""
+import pytest
+
+import server
+from server import TTLCache, cache_key, canonicalize_plan, mcp
+from tests.conftest import FakeUpstream
+
+phone_a_friend = mcp._tool_manager._tools["phone_a_friend"].fn  # type: ignore[attr-defined]
+review_plan = mcp._tool_manager._tools["review_plan"].fn  # type: ignore[attr-defined]
+
+REVIEW_JSON = (
+    '{"overall_score": 0.8, "strengths": ["clear"], "weaknesses": [], '
+    '"suggestions": ["add risks"], "detailed_feedback": "Looks good."}'
+)
+
+
+class TestTTLCache:
+    """Tests for the TTL/LRU/byte-budget cache."""
+
+    def test_hit_and_miss(self) -> None:
+        """Stored values are returned until they expire."""
+        cache = TTLCache("test", max_bytes=10_000, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", "answer")
+        assert cache.get("a") == "answer"
+
+    def test_ttl_expiry(self) -> None:
+        """Expired entries are treated as misses and dropped."""
+        cache = TTLCache("test", max_bytes=10_000, ttl=0)
+        cache.set("a", "answer")
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_byte_budget_evicts_lru(self) -> None:
+        """The least recently used entry is evicted when over budget."""
+        entry_size = len("x" * 100) + len("a") + TTLCache.ENTRY_OVERHEAD
+        cache = TTLCache("test", max_bytes=entry_size * 2, ttl=60)
+        cache.set("a", "x" * 100)
+        cache.set("b", "x" * 100)
+        cache.get("a")
+        cache.set("c", "x" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.current_bytes <= cache.max_bytes
+
+    def test_cache_key_is_stable(self) -> None:
+        """Equal inputs hash to the same key."""
+        assert cache_key("gpt-4", "prompt", 100, 0.3) == cache_key(
+            "gpt-4", "prompt", 100, 0.3
+        )
+        assert cache_key("gpt-4", "prompt", 100, 0.3) != cache_key(
+            "gpt-4", "prompt", 200, 0.3
+        )
+
+
+class TestPhoneAFriendCache:
+    """Tests for cached phone_a_friend calls."""
+
+    @pytest.fixture
+    def upstream(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> FakeUpstream:
+        """Enable the response cache and number each upstream answer."""
+        monkeypatch.setattr(server, "RESPONSE_CACHE_ENABLED", True)
+        fake_upstream.reply = lambda _kwargs: f"answer {len(fake_upstream.calls)}"
+        return fake_upstream
+
+    @pytest.mark.asyncio
+    async def test_repeat_question_is_cached(self, upstream: FakeUpstream) -> None:
+        """A repeated question is answered without a second upstream call."""
+        first = await phone_a_friend(question="What is 2+2?", model="gpt-4")
+        second = await phone_a_friend(question="What is 2+2?", model="gpt-4")
+        assert first == second == "answer 1"
+        assert len(upstream.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_bypass_cache(self, upstream: FakeUpstream) -> None:
+        """bypass_cache forces an upstream call."""
+        await phone_a_friend(question="What is 2+2?", model="gpt-4")
+        result = await phone_a_friend(
+            question="What is 2+2?", model="gpt-4", bypass_cache=True
+        )
+        assert result == "answer 2"
+        assert len(upstream.calls) == 2
+
+
+class TestPlanReviewCache:
+    """Tests for the content-addressed review_plan cache."""
+
+    @pytest.fixture
+    def upstream(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> FakeUpstream:
+        """Enable the review cache and reply with a fixed review."""
+        monkeypatch.setattr(server, "REVIEW_CACHE_ENABLED", True)
+        fake_upstream.reply = lambda _kwargs: REVIEW_JSON
+        return fake_upstream
+
+    def test_canonicalize_ignores_formatting(self) -> None:
+        """Whitespace, bullets and bold markers do not change the canonical form."""
+        original = "# Plan\n\n* **Build** the thing\n2) Ship it\n"
+        reformatted = "#   Plan ##\r\n   - Build   the thing\n\n\n1. Ship it"
+        assert canonicalize_plan(original) == canonicalize_plan(reformatted)
+        assert canonicalize_plan("# Plan\n- Build") != canonicalize_plan(
+            "# Plan\n- Buy"
+        )
+
+    @pytest.mark.asyncio
+    async def test_formatting_only_edit_hits_cache(
+        self, upstream: FakeUpstream
+    ) -> None:
+        """A reformatted plan returns the stored review."""
+        first = await review_plan(plan_content="# Plan\n* Build it\n", model="gpt-4")
+        second = await review_plan(plan_content="# Plan\n\n-   Build it", model="gpt-4")
+        assert len(upstream.calls) == 1
+        assert first["plan_id"] == second["plan_id"]
+        assert first["plan_id"].startswith("plan_")
+        assert second["overall_score"] == 0.8
+
+    @pytest.mark.asyncio
+    async def test_review_level_changes_key(self, upstream: FakeUpstream) -> None:
+        """Different review levels are cached and identified separately."""
+        quick = await review_plan(
+            plan_content="# Plan", review_level=server.ReviewLevel.QUICK
+        )
+        expert = await review_plan(
+            plan_content="# Plan", review_level=server.ReviewLevel.EXPERT
+        )
+        assert len(upstream.calls) == 2
+        assert quick["plan_id"] != expert["plan_id"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_review_is_not_cached(self, upstream: FakeUpstream) -> None:
+        """A malformed review is retried on the next call, not reused."""
+        upstream.reply = lambda _kwargs: "I could not produce JSON this time."
+        with pytest.raises(server.MalformedReviewError):
+            await review_plan(plan_content="# Plan\nShip", model="gpt-4")
+        upstream.reply = lambda _kwargs: REVIEW_JSON
+        second = await review_plan(plan_content="# Plan\nShip", model="gpt-4")
+        assert len(upstream.calls) == 2
+        assert second["overall_score"] == 0.8
@@ -0,0 +1,157 @@
+"""Tests for the persistent plan review repository and lookup tools."""
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator, List
+
+import pytest
+
+import server
+from server import (
+    PlanReview,
+    PostgresReviewRepository,
+    ReviewLevel,
+    ReviewRepository,
+    SQLiteReviewRepository,
+)
+
+
+def make_review(plan_id: str, reviewed_at: datetime) -> PlanReview:
+    return PlanReview(
+        plan_id=plan_id,
+        review_level=ReviewLevel.QUICK,
+        overall_score=0.5,
+        strengths=["clear"],
+        weaknesses=[],
+        suggestions=[],
+        detailed_feedback="fine",
+        reviewed_at=reviewed_at,
+    )
+
+
+class TestSQLiteReviewRepository:
+    """Tests for SQLiteReviewRepository."""
+
+    def test_latest_review_per_plan(self, tmp_path: Path) -> None:
+        """get returns the newest review for the owner and plan."""
+        repo = SQLiteReviewRepository(str(tmp_path / "r.db"))
+        start = datetime(2025, 1, 1)
+        repo.save("owner", make_review("p1", start))
+        repo.save("owner", make_review("p1", start + timedelta(hours=1)))
+        repo.save("other", make_review("p1", start + timedelta(hours=2)))
+        latest = repo.get("owner", "p1")
+        assert latest is not None
+        assert latest.reviewed_at == start + timedelta(hours=1)
+        assert repo.get("owner", "missing") is None
+        repo.close()
+
+    def test_cursor_pagination(self, tmp_path: Path) -> None:
+        """Pages are newest first, disjoint, and end with no cursor."""
+        repo = SQLiteReviewRepository(str(tmp_path / "r.db"))
+        start = datetime(2025, 1, 1)
+        for i in range(5):
+            repo.save("owner", make_review(f"p{i}", start + timedelta(minutes=i)))
+        # Same timestamp twice: the row id breaks the tie
+        repo.save("owner", make_review("p5", start + timedelta(minutes=4)))
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = repo.list("owner", 2, cursor)
+            seen.extend(review.plan_id for review in page)
+            if cursor is None:
+                break
+        assert seen == ["p5", "p4", "p3", "p2", "p1", "p0"]
+        history, _ = repo.list("owner", 10, plan_id="p3")
+        assert [review.plan_id for review in history] == ["p3"]
+        repo.close()
+
+    def test_invalid_cursor(self, tmp_path: Path) -> None:
+        repo = SQLiteReviewRepository(str(tmp_path / "r.db"))
+        with pytest.raises(ValueError):
+            repo.list("owner", 2, "not-a-cursor")
+        repo.close()
+
+
+class FakeConnectionPool:
+    """psycopg_pool.ConnectionPool stand-in whose connections can drop."""
+
+    check_connection = None
+
+    def __init__(self, _url: str, **_kwargs: Any) -> None:
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.checkouts = 0
+        self.drop_next = False
+        self.closed = False
+
+    def open(self, wait: bool = False, timeout: float = 0) -> None:
+        pass
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        self.checkouts += 1
+        if self.drop_next:
+            self.drop_next = False
+            raise sqlite3.OperationalError("server closed the connection")
+        yield self.db
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestPostgresReviewRepository:
+    """Tests for PostgresReviewRepository over a connection pool."""
+
+    def test_base_repository_is_abstract(self) -> None:
+        with pytest.raises(TypeError):
+            ReviewRepository()  # type: ignore[abstract]
+
+    def test_recovers_after_dropped_connection(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Each query borrows a pooled connection, so one failure is not fatal."""
+        pools: List[FakeConnectionPool] = []
+
+        class RecordingPool(FakeConnectionPool):
+            def __init__(self, url: str, **kwargs: Any) -> None:
+                super().__init__(url, **kwargs)
+                pools.append(self)
+
+        fake_module = SimpleNamespace(ConnectionPool=RecordingPool)
+        monkeypatch.setattr(
+            server.importlib, "import_module", lambda _name: fake_module
+        )
+        repo = PostgresReviewRepository("postgresql://example")
+        repo.placeholder = "?"
+        repo.schema = SQLiteReviewRepository.schema[1:]
+        start = datetime(2025, 1, 1)
+        repo.save("owner", make_review("p1", start))
+        pools[0].drop_next = True
+        with pytest.raises(sqlite3.OperationalError):
+            repo.get("owner", "p1")
+        latest = repo.get("owner", "p1")
+        assert latest is not None and latest.plan_id == "p1"
+        assert len(pools) == 1
+        repo.close()
+        assert pools[0].closed
+
+
+class TestReviewLookupTools:
+    """Tests for get_plan_review and list_plan_reviews."""
+
+    @pytest.mark.asyncio
+    async def test_review_survives_memory_loss(self, fake_upstream: Any) -> None:
+        """Reviews can be fetched after the in-memory store is cleared."""
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        get_plan_review = server.mcp._tool_manager._tools["get_plan_review"].fn
+        list_plan_reviews = server.mcp._tool_manager._tools["list_plan_reviews"].fn
+        await review_plan(plan_content="# Plan\nDo things", plan_id="p1")
+        server.plan_reviews.clear()
+        result = await get_plan_review(plan_id="p1")
+        assert result["plan_id"] == "p1"
+        listing = await list_plan_reviews()
+        assert [review["plan_id"] for review in listing["reviews"]] == ["p1"]
+        assert listing["next_cursor"] is None
+        with pytest.raises(ValueError):
+            await get_plan_review(plan_id="unknown")
@@ -0,0 +1,148 @@
+"""Tests for single-flight coalescing of identical upstream requests."""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+import pytest
+
+import server
+from server import SingleFlight, mcp
+from tests.conftest import FakeUpstream
+
+phone_a_friend = mcp._tool_manager._tools["phone_a_friend"].fn  # type: ignore[attr-defined]
+
+
+class RecordingStreamer:
+    """Collects the deltas an MCPProgressStreamer would send."""
+
+    def __init__(self) -> None:
+        self.deltas: List[str] = []
+
+    async def __call__(self, text: str) -> None:
+        self.deltas.append(text)
+
+    async def flush(self) -> None:
+        pass
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight helper."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_task(self) -> None:
+        """Callers with the same key share one call and its result."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def call() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "shared"
+
+        results = await asyncio.gather(
+            *(flights.run("tool", "key", call) for _ in range(5))
+        )
+        assert results == ["shared"] * 5
+        assert calls == 1
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_fail_followers(self) -> None:
+        """The shared call keeps running while any caller still waits."""
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call() -> str:
+            await release.wait()
+            return "done"
+
+        leader = asyncio.create_task(flights.run("tool", "key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("tool", "key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await follower == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancels_shared_call(self) -> None:
+        """The upstream call is cancelled once nobody is waiting for it."""
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def call() -> None:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flights.run("tool", "key", call))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert len(flights) == 0
+
+
+class TestPhoneAFriendCoalescing:
+    """Tests for coalesced phone_a_friend calls."""
+
+    @pytest.mark.asyncio
+    async def test_identical_questions_make_one_upstream_call(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A burst of identical questions issues one completion."""
+        original = fake_upstream.create
+
+        async def slow_create(
+            api_key: str,
+            on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+            **kwargs: Any,
+        ) -> Any:
+            await asyncio.sleep(0.01)
+            return await original(api_key, on_delta, **kwargs)
+
+        monkeypatch.setattr(server, "create_chat_completion", slow_create)
+        fake_upstream.reply = lambda _kwargs: "4"
+        answers = await asyncio.gather(
+            *(phone_a_friend(question="What is 2+2?") for _ in range(3))
+        )
+        assert answers == ["4", "4", "4"]
+        assert len(fake_upstream.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_caller_does_not_join(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A streaming caller gets its own completion and deltas."""
+        original = fake_upstream.create
+
+        async def slow_create(
+            api_key: str,
+            on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+            **kwargs: Any,
+        ) -> Any:
+            await asyncio.sleep(0.01)
+            return await original(api_key, on_delta, **kwargs)
+
+        monkeypatch.setattr(server, "create_chat_completion", slow_create)
+        fake_upstream.reply = lambda _kwargs: "four"
+        streamer = RecordingStreamer()
+        header_config = {"api_key": "sk-test"}
+        answers = await asyncio.gather(
+            server.ask_friend("phone_a_friend", header_config, "What is 2+2?"),
+            server.ask_friend(
+                "phone_a_friend",
+                header_config,
+                "What is 2+2?",
+                streamer=streamer,  # type: ignore[arg-type]
+            ),
+        )
+        assert answers == ["four", "four"]
+        assert len(fake_upstream.calls) == 2
+        assert "".join(streamer.deltas).strip() == "four"
@@ -0,0 +1,130 @@
+"""Tests for streamed completions and partial-output forwarding."""
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import MCPProgressStreamer, collect_stream
+from tests.conftest import FakeUpstream
+
+
+def chunk(content: Optional[str], finish_reason: Optional[str] = None) -> Any:
+    """Build a minimal streamed chat completion chunk."""
+    delta = SimpleNamespace(content=content)
+    choice = SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason)
+    return SimpleNamespace(
+        id="chatcmpl-stream", model="gpt-4", created=1, usage=None, choices=[choice]
+    )
+
+
+class FakeStream:
+    """Async iterable of chunks with the ``close()`` of openai's AsyncStream."""
+
+    def __init__(self, chunks: List[Any]) -> None:
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        for item in self.chunks:
+            yield item
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeContext:
+    """Records notifications sent through a FastMCP context."""
+
+    def __init__(self, progress_token: Optional[str]) -> None:
+        self.request_context = SimpleNamespace(
+            meta=SimpleNamespace(progressToken=progress_token)
+        )
+        self.progress: List[Any] = []
+        self.logs: List[str] = []
+
+    async def report_progress(
+        self, progress: float, total: Optional[float] = None, message: str = ""
+    ) -> None:
+        self.progress.append((progress, message))
+
+    async def log(self, message: str, **kwargs: Any) -> None:
+        self.logs.append(message)
+
+
+class TestCollectStream:
+    """Tests for aggregating streamed chunks."""
+
+    @pytest.mark.asyncio
+    async def test_aggregates_text_and_forwards_deltas(self) -> None:
+        """Deltas are forwarded in order and joined into one completion."""
+        seen: List[str] = []
+
+        async def on_delta(text: str) -> None:
+            seen.append(text)
+
+        stream = FakeStream([chunk("Hel"), chunk("lo"), chunk(None, "stop")])
+        completion = await collect_stream(stream, on_delta)
+        assert seen == ["Hel", "lo"]
+        assert stream.closed
+        assert completion.choices[0].message.content == "Hello"
+        assert completion.choices[0].finish_reason == "stop"
+        assert completion.model == "gpt-4"
+
+    @pytest.mark.asyncio
+    async def test_stream_closed_when_on_delta_raises(self) -> None:
+        """A consumer that bails out mid-stream still releases the connection."""
+
+        async def on_delta(text: str) -> None:
+            raise server.MalformedReviewError(text)
+
+        stream = FakeStream([chunk("Hel"), chunk("lo")])
+        with pytest.raises(server.MalformedReviewError):
+            await collect_stream(stream, on_delta)
+        assert stream.closed
+
+
+class TestMCPProgressStreamer:
+    """Tests for MCP partial-output notifications."""
+
+    @pytest.mark.asyncio
+    async def test_progress_notifications_are_coalesced(self) -> None:
+        """Deltas inside the interval are sent as one progress notification."""
+        ctx = FakeContext(progress_token="tok")
+        streamer = MCPProgressStreamer(ctx, "phone_a_friend", interval=60)  # type: ignore[arg-type]
+        for piece in ["a", "b", "c"]:
+            await streamer(piece)
+        await streamer.flush()
+        assert ctx.progress == [(1, "a"), (3, "bc")]
+        assert ctx.logs == []
+
+    @pytest.mark.asyncio
+    async def test_log_fallback_without_progress_token(self) -> None:
+        """Clients without a progress token get log notifications."""
+        ctx = FakeContext(progress_token=None)
+        streamer = MCPProgressStreamer(ctx, "review_plan", interval=0)  # type: ignore[arg-type]
+        await streamer("partial")
+        assert ctx.logs == ["partial"]
+
+
+class TestDemoEventStream:
+    """Tests for SSE on the demo routes."""
+
+    def test_phone_a_friend_sse(
+        self, fake_upstream: FakeUpstream, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The demo route streams delta events followed by the final result."""
+        monkeypatch.setattr(server, "ENABLE_DEMOS", True)
+        fake_upstream.reply = lambda _kwargs: "Paris is the capital"
+        client = TestClient(server.http_app)
+        res = client.post(
+            "/api/demo/phone-a-friend",
+            json={"question": "Capital of France?", "api_key": "sk-test"},
+            headers={"Accept": "text/event-stream"},
+        )
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        body = res.text
+        assert body.count("event: delta") == 4
+        assert 'event: result\ndata: {"answer": "Paris is the capital"}' in body
@@ -0,0 +1,157 @@
+"""Tests for schema-constrained review output and streaming validation."""
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+import server
+from server import MalformedReviewError, ReviewStreamValidator, parse_review_json
+
+REVIEW = {
+    "overall_score": 0.8,
+    "strengths": ['clear "goals"', "owner named"],
+    "weaknesses": [],
+    "suggestions": ["add a rollback {plan}"],
+    "detailed_feedback": "Solid plan, see } and \\ above.",
+}
+REVIEW_JSON = json.dumps(REVIEW)
+
+
+def feed_in_chunks(validator: ReviewStreamValidator, text: str, size: int = 4) -> None:
+    while text:
+        validator.feed(text[:size])
+        text = text[size:]
+
+
+class TestReviewStreamValidator:
+    """Tests for ReviewStreamValidator."""
+
+    def test_accepts_valid_review_across_chunks(self) -> None:
+        validator = ReviewStreamValidator(strict=True)
+        feed_in_chunks(validator, REVIEW_JSON)
+        validator.finish()
+
+    def test_prose_is_skipped_unless_strict(self) -> None:
+        text = f"Here is my review:\n```json\n{REVIEW_JSON}\n```"
+        validator = ReviewStreamValidator(strict=False)
+        feed_in_chunks(validator, text)
+        validator.finish()
+        with pytest.raises(MalformedReviewError, match="char 1:"):
+            ReviewStreamValidator(strict=True).feed(text)
+
+    @pytest.mark.parametrize(
+        "prefix, reason",
+        [
+            ('{"overall_score": 7', "outside 0..1"),
+            ('{"overall_score": 0.5, "strengths": "one', "wrong type"),
+            ('{"overall_score": 0.5, "strengths": [3', "list of strings"),
+            ('{"score": 0.5', "unknown field"),
+        ],
+    )
+    def test_fails_early(self, prefix: str, reason: str) -> None:
+        validator = ReviewStreamValidator(strict=True)
+        with pytest.raises(MalformedReviewError, match=reason):
+            validator.feed(prefix + ", and much more text that never gets generated")
+        assert validator.chars <= len(prefix) + 2
+
+    def test_truncated_review_fails_on_finish(self) -> None:
+        validator = ReviewStreamValidator(strict=True)
+        validator.feed(REVIEW_JSON[:60])
+        with pytest.raises(MalformedReviewError, match="incomplete"):
+            validator.finish()
+
+
+class TestParseReviewJson:
+    """parse_review_json validates against the review schema."""
+
+    def test_structured_and_embedded(self) -> None:
+        assert parse_review_json(REVIEW_JSON) == REVIEW
+        assert parse_review_json(f"Review:\n{REVIEW_JSON}\nThanks") == REVIEW
+
+    def test_rejects_invalid_reviews(self) -> None:
+        assert parse_review_json(json.dumps({**REVIEW, "overall_score": 7})) is None
+        assert parse_review_json(json.dumps({**REVIEW, "strengths": "x"})) is None
+        assert parse_review_json('{"overall_score": 0.5}') is None
+
+
+class TestReviewPlanStructuredOutput:
+    """review_plan requests a JSON schema and retries malformed streams."""
+
+    @pytest.mark.asyncio
+    async def test_json_schema_only_for_supporting_models(
+        self, fake_upstream: Any
+    ) -> None:
+        fake_upstream.reply = lambda _kwargs: REVIEW_JSON
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        result = await review_plan(plan_content="# Plan\nShip", model="gpt-4o")
+        response_format = fake_upstream.calls[0]["response_format"]
+        assert response_format["json_schema"]["strict"] is True
+        schema = response_format["json_schema"]["schema"]
+        assert set(schema["required"]) == set(REVIEW)
+        assert result["overall_score"] == 0.8
+
+        await review_plan(plan_content="# Plan\nOther", model="gpt-4")
+        assert "response_format" not in fake_upstream.calls[1]
+
+    @pytest.mark.asyncio
+    async def test_malformed_stream_is_retried(self, fake_upstream: Any) -> None:
+        replies = iter(["Sure! Here is the review you asked for", REVIEW_JSON])
+
+        def reply(_kwargs: Dict[str, Any]) -> str:
+            return next(replies)
+
+        fake_upstream.reply = reply
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        result = await review_plan(plan_content="# Plan\nShip", model="gpt-4o")
+        assert len(fake_upstream.calls) == 2
+        assert result["overall_score"] == 0.8
+        assert result["strengths"] == REVIEW["strengths"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_after_retries_raises(self, fake_upstream: Any) -> None:
+        """Truncated text is never returned as the review."""
+        fake_upstream.reply = lambda _kwargs: '{"overall_score": 0.5, "score": 1}'
+        with pytest.raises(MalformedReviewError):
+            await server.review_completion("review_plan", "sk-test", "gpt-4o", [], 500)
+        assert len(fake_upstream.calls) == 1 + server.REVIEW_MALFORMED_RETRIES
+
+    @pytest.mark.asyncio
+    async def test_no_retry_once_deltas_were_forwarded(
+        self, fake_upstream: Any
+    ) -> None:
+        """A streaming client never sees a second attempt appended to the first."""
+        fake_upstream.reply = lambda _kwargs: '{"overall_score": 0.5, "score": 1}'
+        seen: List[str] = []
+
+        async def on_delta(text: str) -> None:
+            seen.append(text)
+
+        with pytest.raises(MalformedReviewError):
+            await server.review_completion(
+                "review_plan", "sk-test", "gpt-4o", [], 500, on_delta=on_delta
+            )
+        assert len(fake_upstream.calls) == 1
+        assert "".join(seen) == '{"overall_score": 0.5, '
+
+    @pytest.mark.asyncio
+    async def test_malformed_review_does_not_penalize_model(
+        self, fake_upstream: Any
+    ) -> None:
+        """Client-side validation failures are not counted as upstream errors."""
+        fake_upstream.reply = lambda _kwargs: "Sure! Here is the review"
+        before = server.model_router.stats("gpt-4o-router-test")
+        with pytest.raises(MalformedReviewError):
+            await server.review_completion(
+                "review_plan", "sk-test", "gpt-4o-router-test", [], 500
+            )
+        assert server.model_router.stats("gpt-4o-router-test") == before
+
+    @pytest.mark.asyncio
+    async def test_malformed_complete_review_fails(self, fake_upstream: Any) -> None:
+        """A review that only fails once complete is not given a made-up score."""
+        fake_upstream.reply = lambda _kwargs: "Looks solid overall, ship it."
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        with pytest.raises(MalformedReviewError):
+            await review_plan(plan_content="# Plan\nShip", model="gpt-4")
+        assert len(fake_upstream.calls) == 1
+        assert server.plan_reviews.stats()["plan_reviews_count"] == 0
@@ -0,0 +1,114 @@
+"""Tests for token usage and estimated cost accounting."""
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import UsageLedger, api_key_fingerprint, estimate_cost
+
+REVIEW_JSON = json.dumps(
+    {
+        "overall_score": 0.8,
+        "strengths": ["clear"],
+        "weaknesses": [],
+        "suggestions": [],
+        "detailed_feedback": "Looks good.",
+    }
+)
+
+
+class TestEstimateCost:
+    """Tests for estimate_cost."""
+
+    def test_longest_prefix_wins(self) -> None:
+        # gpt-4o-mini must not be priced as gpt-4o or gpt-4
+        assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0, 0) == 0.15
+        assert estimate_cost("gpt-4o", 0, 0, 1_000_000) == 10.0
+
+    def test_cached_tokens_use_cached_rate(self) -> None:
+        assert estimate_cost("gpt-4o", 1_000_000, 1_000_000, 0) == 1.25
+
+    def test_unknown_model_costs_nothing(self) -> None:
+        assert estimate_cost("mystery-model", 1000, 0, 1000) == 0.0
+
+
+class TestUsageLedger:
+    """Tests for UsageLedger."""
+
+    def test_breakdown_by_tool_model_and_level(self) -> None:
+        ledger = UsageLedger(window=3600, bucket_seconds=60, max_keys=10)
+        ledger.record(
+            "k1", "review_plan", "gpt-4o", "deep_dive", 100, 0, 50, 0.5, now=0
+        )
+        ledger.record(
+            "k1", "review_plan", "gpt-4o", "deep_dive", 100, 20, 50, 0.5, now=90
+        )
+        ledger.record(
+            "k1", "phone_a_friend", "gpt-4o-mini", "none", 10, 0, 5, 0.01, now=100
+        )
+        usage = ledger.usage("k1", now=120)
+        assert usage["requests"] == 3
+        assert usage["prompt_tokens"] == 210
+        assert usage["cached_tokens"] == 20
+        assert usage["cost_usd"] == 1.01
+        top = usage["breakdown"][0]
+        assert (top["tool"], top["review_level"], top["requests"]) == (
+            "review_plan",
+            "deep_dive",
+            2,
+        )
+
+    def test_window_expires_old_buckets(self) -> None:
+        ledger = UsageLedger(window=300, bucket_seconds=60, max_keys=10)
+        ledger.record("k1", "review_plan", "gpt-4", "quick", 100, 0, 10, 1.0, now=0)
+        ledger.record("k1", "review_plan", "gpt-4", "quick", 100, 0, 10, 1.0, now=400)
+        assert ledger.usage("k1", now=420)["requests"] == 1
+
+    def test_top_orders_by_cost_and_evicts_lru(self) -> None:
+        ledger = UsageLedger(window=3600, bucket_seconds=60, max_keys=2)
+        ledger.record("cheap", "t", "m", "none", 1, 0, 1, 0.1, now=0)
+        ledger.record("pricey", "t", "m", "none", 1, 0, 1, 5.0, now=0)
+        assert [u["key"] for u in ledger.top(5, now=10)] == ["pricey", "cheap"]
+        ledger.record("new", "t", "m", "none", 1, 0, 1, 1.0, now=20)
+        assert len(ledger) == 2
+        assert "cheap" not in [u["key"] for u in ledger.top(5, now=30)]
+
+
+class TestUsageRoute:
+    """Tests for /api/metrics/usage."""
+
+    @pytest.mark.asyncio
+    async def test_calls_are_recorded_per_key(
+        self, fake_upstream: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(server, "usage_ledger", UsageLedger(3600, 60, 10))
+        fake_upstream.usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=200)
+        fake_upstream.reply = lambda _kwargs: REVIEW_JSON
+        review_plan = server.mcp._tool_manager._tools["review_plan"].fn
+        await review_plan(plan_content="# Plan\nShip it", model="gpt-4o")
+
+        client = TestClient(server.http_app)
+        response = client.get(
+            "/api/metrics/usage", headers={"X-OpenAI-API-Key": "sk-test"}
+        )
+        assert response.status_code == 200
+        usage = response.json()
+        assert usage["key"] == api_key_fingerprint("sk-test")
+        assert usage["requests"] == 1
+        assert usage["completion_tokens"] == 200
+        assert usage["cost_usd"] == pytest.approx(0.0045)
+        assert usage["breakdown"][0]["review_level"] == "standard"
+
+    def test_requires_key_or_admin_token(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(server, "USAGE_ADMIN_TOKEN", "s3cret")
+        client = TestClient(server.http_app)
+        assert client.get("/api/metrics/usage").status_code == 401
+        wrong = {"Authorization": "Bearer nope"}
+        assert client.get("/api/metrics/usage", headers=wrong).status_code == 401
+        admin = {"Authorization": "Bearer s3cret"}
+        response = client.get("/api/metrics/usage?limit=5", headers=admin)
+        assert response.status_code == 200
+        assert "keys" in response.json()